@@ -1,9 +1,6 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
 from pathlib import Path
 import io
-import importlib.util
 import sys
 
 # ================= Page Config =================
@@ -15,27 +12,39 @@ st.set_page_config(
 # ================= Paths =================
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "db" / "workforce.db"
-EXPORT_SCRIPT_PATH = BASE_DIR / "import" / "06_export_excel.py"
 
-# ================= Load export_official_excel dynamically =================
-spec = importlib.util.spec_from_file_location(
-    "export_module", EXPORT_SCRIPT_PATH
-)
-export_module = importlib.util.module_from_spec(spec)
-sys.modules["export_module"] = export_module
-spec.loader.exec_module(export_module)
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from cbi.bitmap_index import BitmapIndexStore
+from cbi.export_cache import ExportCache, make_export_key
+from cbi.pagination import keyset_slice
+from phase2.app.paginated_table import paginated_table
+
+# ================= Export Cache =================
+@st.cache_resource
+def get_export_cache():
+    # One cache per server process, shared by all sessions.
+    return ExportCache()
 
-export_official_excel = export_module.export_official_excel
+def build_official_report(frame):
+    # Loaded on the first export request to keep openpyxl off the cold start.
+    from cbi.excel_export import export_official_excel
+
+    output = io.BytesIO()
+    export_official_excel(frame, output)
+    return output.getvalue()
 
 # ================= Data Load =================
-@st.cache_data
-def load_base():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql("SELECT * FROM v_workforce_base_canonical", conn)
-    conn.close()
-    return df
+@st.cache_resource
+def get_index_store():
+    # Canonical base plus bitmap index, reloaded whenever the data version
+    # moves (e.g. after an apply). Options, KPIs and filtering all use it.
+    return BitmapIndexStore(DB_PATH)
 
-df = load_base()
+# The version comes with the index it was built from, so the export key
+# always names the data the report is built from.
+data_version, index = get_index_store().snapshot()
 
 # ================= Title =================
 st.title("Workforce Analytics")
@@ -47,7 +56,7 @@ with st.sidebar:
 
     # ---------- Region ----------
     st.subheader("Region")
-    all_regions = sorted(df["region_name"].dropna().unique().tolist())
+    all_regions = index.options("region_name")
     if "region_selection" not in st.session_state:
         st.session_state.region_selection = all_regions.copy()
 
@@ -67,7 +76,7 @@ with st.sidebar:
 
     # ---------- Specialty ----------
     st.subheader("Specialty")
-    all_specialties = sorted(df["specialty_name"].dropna().unique().tolist())
+    all_specialties = index.options("specialty_name")
     if "specialty_selection" not in st.session_state:
         st.session_state.specialty_selection = all_specialties.copy()
 
@@ -87,7 +96,7 @@ with st.sidebar:
 
     # ---------- Workplace ----------
     st.subheader("Workplace")
-    all_workplaces = sorted(df["workplace_name"].dropna().unique().tolist())
+    all_workplaces = index.options("workplace_name")
     if "workplace_selection" not in st.session_state:
         st.session_state.workplace_selection = all_workplaces.copy()
 
@@ -104,35 +113,32 @@ with st.sidebar:
     )
 
 # ================= Apply Filters =================
-filtered_df = df.copy()
-
-if st.session_state.region_selection:
-    filtered_df = filtered_df[
-        filtered_df["region_name"].isin(st.session_state.region_selection)
-    ]
-
-if st.session_state.specialty_selection:
-    filtered_df = filtered_df[
-        filtered_df["specialty_name"].isin(st.session_state.specialty_selection)
-    ]
-
-if st.session_state.workplace_selection:
-    filtered_df = filtered_df[
-        filtered_df["workplace_name"].isin(st.session_state.workplace_selection)
-    ]
+selection = dict(
+    regions=st.session_state.region_selection,
+    workplaces=st.session_state.workplace_selection,
+    specialties=st.session_state.specialty_selection
+)
+filtered_df = index.frame(**selection)
 
 # ================= KPIs =================
+total_rows = index.count(**selection)
 c1, c2, c3 = st.columns(3)
-c1.metric("Persons", filtered_df["person_id"].nunique())
-c2.metric("Specialties", filtered_df["specialty_name"].nunique())
-c3.metric("Workplaces", filtered_df["workplace_name"].nunique())
+c1.metric("Persons", total_rows)
+c2.metric("Specialties", len(index.options("specialty_name", **selection)))
+c3.metric("Workplaces", len(index.options("workplace_name", **selection)))
 
 st.divider()
 
 # ================= Table =================
 st.subheader("Filtered Workforce Records")
-st.dataframe(
-    filtered_df,
+# Only the visible page is serialized to the browser.
+paginated_table(
+    "legacy_rows",
+    lambda after: keyset_slice(filtered_df, "person_id", after),
+    total_rows,
+    key_column="person_id",
+    # Cursors from an older snapshot may point past rows that have moved.
+    signature=(data_version, tuple(tuple(sorted(v)) for v in selection.values())),
     use_container_width=True,
     height=500
 )
@@ -141,12 +147,28 @@ st.dataframe(
 st.divider()
 st.subheader("Export")
 
-output = io.BytesIO()
-export_official_excel(filtered_df, output)
-
-st.download_button(
-    label="Download Official Report (Exact Baseline)",
-    data=output.getvalue(),
-    file_name="Workforce_Report_Filtered.xlsx",
-    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Built only on request, then reused until the filters or the data change.
+export_key = make_export_key(
+    st.session_state.region_selection,
+    st.session_state.workplace_selection,
+    st.session_state.specialty_selection,
+    data_version
 )
+export_cache = get_export_cache()
+export_cache.discard_versions_except(data_version)
+
+report = export_cache.get(export_key)
+if report is None and st.button("Prepare Official Report"):
+    with st.spinner("Building workbook..."):
+        report = export_cache.get_or_build(
+            export_key,
+            lambda: build_official_report(filtered_df)
+        )
+
+if report is not None:
+    st.download_button(
+        label="Download Official Report (Exact Baseline)",
+        data=report,
+        file_name="Workforce_Report_Filtered.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
@@ -1,9 +1,17 @@
 from __future__ import annotations
 
 import sqlite3
+import string
 from datetime import datetime
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from cbi.canonical_data import canonical_table_exists, refresh_canonical_base
+from cbi.connections import checkpoint, get_pool
+from cbi.count_cube import apply_count_delta, count_cube_exists, snapshot_person_keys
+from cbi.data_version import bump_data_version, read_write_counter
+from cbi.fingerprints import settle_staged_fingerprints
+from cbi.staging_conflicts import collapse_batch, ensure_reject_reason_column
 from config.paths import DB_PATH
 
 
@@ -13,11 +21,119 @@ DIMENSIONS = {
     "workplace": ("workplaces", "workplace_id", "workplace_name"),
 }
 
+# "set" applies a batch with bulk statements over a temp table; "row" is the
+# original per-row loop, kept as a reference implementation.
+APPLY_MODES = ("set", "row")
+DEFAULT_APPLY_MODE = "set"
 
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+# An UPDATE whose resolved ids match the person's current ones is "elided":
+# persons is not written, but the staging row is still APPLIED. "record" keeps
+# its "No data change detected" audit row, "skip" leaves it out.
+NOOP_AUDIT_POLICIES = ("record", "skip")
+DEFAULT_NOOP_AUDIT = "record"
+
+_DIMENSION_COLUMNS = {table_name: (id_col, name_col) for table_name, id_col, name_col in DIMENSIONS.values()}
+
+# SQLite's NOCASE collation only folds ASCII letters.
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+class DimensionCache:
+    """
+    Bidirectional name <-> id lookup for the `DIMENSIONS` tables.
+
+    Warmed with one query per table. Rows inserted through the cache are
+    recorded as they are created, so resolution is a dict lookup.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, Dict[str, int]] = {table: {} for table in _DIMENSION_COLUMNS}
+        self._names: Dict[str, Dict[int, str]] = {table: {} for table in _DIMENSION_COLUMNS}
+
+    @classmethod
+    def load(cls, cur: sqlite3.Cursor) -> "DimensionCache":
+        cache = cls()
+        for table_name in _DIMENSION_COLUMNS:
+            cache._load_rows(cur, table_name)
+        return cache
+
+    def copy(self) -> "DimensionCache":
+        clone = DimensionCache()
+        for table_name in _DIMENSION_COLUMNS:
+            clone._ids[table_name] = dict(self._ids[table_name])
+            clone._names[table_name] = dict(self._names[table_name])
+        return clone
+
+    def _load_rows(self, cur: sqlite3.Cursor, table_name: str, after_id: int = 0) -> None:
+        id_col, name_col = _DIMENSION_COLUMNS[table_name]
+        rows = cur.execute(
+            f"SELECT {id_col}, {name_col} FROM {table_name} WHERE {id_col} > ? ORDER BY {id_col}",
+            (after_id,),
+        ).fetchall()
+        for row_id, name in rows:
+            self.add(table_name, int(row_id), name)
+
+    def add(self, table_name: str, row_id: int, name: Optional[str]) -> None:
+        self._names[table_name][row_id] = name
+        # Exact-match lookups in SQLite return the lowest id for a repeated name.
+        if name is not None:
+            self._ids[table_name].setdefault(name, row_id)
+
+    def get_id(self, table_name: str, name: Optional[str]) -> Optional[int]:
+        if name is None:
+            return None
+        return self._ids[table_name].get(name)
+
+    def get_name(self, table_name: str, row_id: Optional[int]) -> Optional[str]:
+        if row_id is None:
+            return None
+        return self._names[table_name].get(row_id)
+
+    def ensure_ids(self, cur: sqlite3.Cursor, table_name: str, names: Iterable[str]) -> None:
+        """
+        Insert every name not yet known with one `executemany`, in the given order.
+
+        Names the table's NOCASE unique index would reject (case variants of a
+        stored name or of an earlier name in `names`) are left out rather than
+        ignored by the insert, which would still use up an AUTOINCREMENT id.
+        They stay unresolved.
+        """
+        taken = {name.translate(_NOCASE) for name in self._ids[table_name]}
+        missing = []
+        for name in dict.fromkeys(names):
+            key = name.translate(_NOCASE)
+            if key not in taken:
+                taken.add(key)
+                missing.append(name)
+        if not missing:
+            return
+
+        id_col, name_col = _DIMENSION_COLUMNS[table_name]
+        known_max = max(self._names[table_name], default=0)
+        cur.executemany(
+            f"INSERT OR IGNORE INTO {table_name} ({name_col}) VALUES (?)",
+            [(name,) for name in missing],
+        )
+        self._load_rows(cur, table_name, after_id=known_max)
+
+
+# Process-wide cache, only published after a successful commit. It is keyed
+# on the database and its write counter, so any write that bumps the counter
+# (another apply, a reload through the import scripts) retires it.
+_shared_dimension_cache: Optional[Tuple[Path, int, DimensionCache]] = None
+
+
+def invalidate_dimension_cache() -> None:
+    global _shared_dimension_cache
+    _shared_dimension_cache = None
+
+
+def _dimension_cache_for_apply(cur: sqlite3.Cursor, shared: bool) -> DimensionCache:
+    if shared and _shared_dimension_cache is not None:
+        db_path, version, cache = _shared_dimension_cache
+        if db_path == DB_PATH and version == read_write_counter(cur.connection):
+            return cache.copy()
+    return DimensionCache.load(cur)
 
 
 def normalize_text(value: object) -> Optional[str]:
@@ -52,11 +168,24 @@ def get_or_create_dimension_id(
     id_col: str,
     name_col: str,
     name_value: object,
+    cache: Optional[DimensionCache] = None,
 ) -> int:
     normalized = normalize_text(name_value)
     if not normalized:
         raise ValueError(f"Missing value for {name_col}")
 
+    if cache is not None:
+        cached_id = cache.get_id(table_name, normalized)
+        if cached_id is not None:
+            return cached_id
+        cur.execute(
+            f"INSERT INTO {table_name} ({name_col}) VALUES (?)",
+            (normalized,),
+        )
+        new_id = int(cur.lastrowid)
+        cache.add(table_name, new_id, normalized)
+        return new_id
+
     row = cur.execute(
         f"SELECT {id_col} FROM {table_name} WHERE {name_col} = ?",
         (normalized,),
@@ -77,9 +206,12 @@ def get_dimension_name(
     id_col: str,
     name_col: str,
     row_id: Optional[int],
+    cache: Optional[DimensionCache] = None,
 ) -> Optional[str]:
     if row_id is None:
         return None
+    if cache is not None:
+        return cache.get_name(table_name, row_id)
     row = cur.execute(
         f"SELECT {name_col} FROM {table_name} WHERE {id_col} = ?",
         (row_id,),
@@ -101,121 +233,148 @@ def append_source_note(cur: sqlite3.Cursor, staging_id: int, message: str) -> No
     )
 
 
-def apply_batch(batch_id: int) -> Dict[str, int]:
-    conn = get_conn()
-    cur = conn.cursor()
+def _new_summary(region_name: object, workplace_name: object, specialty_name: object) -> str:
+    # Audit the names as they are stored, like _update_summary.
+    return (
+        "Initial record created "
+        f"(Region={normalize_text(region_name)}, Workplace={normalize_text(workplace_name)}, "
+        f"Specialty={normalize_text(specialty_name)})"
+    )
 
-    try:
-        rows = cur.execute(
-            """
-            SELECT
-                staging_id,
-                person_id,
-                action_type,
-                specialty_name,
-                region_name,
-                workplace_name
-            FROM workforce_staging
-            WHERE batch_id = ?
-              AND status = 'APPROVED'
-            ORDER BY staging_id
-            """,
-            (batch_id,),
-        ).fetchall()
 
-        if not rows:
-            return {
-                "batch_id": batch_id,
-                "total_rows": 0,
-                "applied_rows": 0,
-                "rejected_rows": 0,
-                "batch_status": "NOOP",
-            }
+def _update_summary(
+    old_specialty: Optional[str],
+    old_region: Optional[str],
+    old_workplace: Optional[str],
+    specialty_name: object,
+    region_name: object,
+    workplace_name: object,
+) -> str:
+    # Compare the names as they are stored, so padding alone is not a change.
+    specialty_name = normalize_text(specialty_name)
+    region_name = normalize_text(region_name)
+    workplace_name = normalize_text(workplace_name)
 
-        applied_rows = 0
-        rejected_rows = 0
+    summary_parts: List[str] = []
+    if old_specialty != specialty_name:
+        summary_parts.append(
+            f"Specialty changed: {old_specialty} -> {specialty_name}"
+        )
+    if old_region != region_name:
+        summary_parts.append(
+            f"Region changed: {old_region} -> {region_name}"
+        )
+    if old_workplace != workplace_name:
+        summary_parts.append(
+            f"Workplace changed: {old_workplace} -> {workplace_name}"
+        )
 
-        for row in rows:
-            (
-                staging_id,
-                person_id_raw,
-                action_type_raw,
-                specialty_name,
-                region_name,
-                workplace_name,
-            ) = row
+    if not summary_parts:
+        summary_parts.append("No data change detected")
 
-            person_id = normalize_text(person_id_raw)
-            action_type = (normalize_text(action_type_raw) or "").upper()
+    return " | ".join(summary_parts)
 
-            try:
-                specialty_id = get_or_create_dimension_id(
-                    cur, *DIMENSIONS["specialty"], specialty_name
-                )
-                region_id = get_or_create_dimension_id(
-                    cur, *DIMENSIONS["region"], region_name
-                )
-                workplace_id = get_or_create_dimension_id(
-                    cur, *DIMENSIONS["workplace"], workplace_name
-                )
 
-                if action_type == "NEW":
-                    if not person_id:
-                        raise ValueError("NEW record is missing person_id")
+def _apply_rows_row_by_row(
+    conn: sqlite3.Connection,
+    batch_id: int,
+    rows: List[tuple],
+    cache: DimensionCache,
+    noop_audit: str = DEFAULT_NOOP_AUDIT,
+) -> Tuple[int, int, int, Set[str]]:
+    cur = conn.cursor()
+    applied_rows = 0
+    rejected_rows = 0
+    elided_rows = 0
+    changed_ids: Set[str] = set()
 
-                    exists = cur.execute(
-                        "SELECT 1 FROM persons WHERE person_id = ?",
-                        (person_id,),
-                    ).fetchone()
-                    if exists:
-                        raise ValueError("person_id already exists for NEW action")
+    for row in rows:
+        (
+            staging_id,
+            person_id_raw,
+            action_type_raw,
+            specialty_name,
+            region_name,
+            workplace_name,
+        ) = row
 
-                    cur.execute(
-                        """
-                        INSERT INTO persons
-                        (person_id, specialty_id, region_id, workplace_id)
-                        VALUES (?, ?, ?, ?)
-                        """,
-                        (person_id, specialty_id, region_id, workplace_id),
-                    )
+        person_id = normalize_text(person_id_raw)
+        action_type = (normalize_text(action_type_raw) or "").upper()
 
-                    summary = (
-                        "Initial record created "
-                        f"(Region={region_name}, Workplace={workplace_name}, "
-                        f"Specialty={specialty_name})"
-                    )
-                    write_audit_entry(
-                        conn=conn,
-                        person_id=person_id,
-                        batch_id=batch_id,
-                        action_type="NEW",
-                        summary=summary,
-                    )
+        try:
+            specialty_id = get_or_create_dimension_id(
+                cur, *DIMENSIONS["specialty"], specialty_name, cache
+            )
+            region_id = get_or_create_dimension_id(
+                cur, *DIMENSIONS["region"], region_name, cache
+            )
+            workplace_id = get_or_create_dimension_id(
+                cur, *DIMENSIONS["workplace"], workplace_name, cache
+            )
 
-                elif action_type == "UPDATE":
-                    if not person_id:
-                        raise ValueError("UPDATE record is missing person_id")
+            if action_type == "NEW":
+                if not person_id:
+                    raise ValueError("NEW record is missing person_id")
 
-                    old = cur.execute(
-                        """
-                        SELECT specialty_id, region_id, workplace_id
-                        FROM persons
-                        WHERE person_id = ?
-                        """,
-                        (person_id,),
-                    ).fetchone()
-                    if not old:
-                        raise ValueError("person_id not found for UPDATE action")
-
-                    old_specialty_id, old_region_id, old_workplace_id = old
-                    old_specialty = get_dimension_name(
-                        cur, *DIMENSIONS["specialty"], old_specialty_id
-                    )
-                    old_region = get_dimension_name(cur, *DIMENSIONS["region"], old_region_id)
-                    old_workplace = get_dimension_name(
-                        cur, *DIMENSIONS["workplace"], old_workplace_id
-                    )
+                exists = cur.execute(
+                    "SELECT 1 FROM persons WHERE person_id = ?",
+                    (person_id,),
+                ).fetchone()
+                if exists:
+                    raise ValueError("person_id already exists for NEW action")
+
+                cur.execute(
+                    """
+                    INSERT INTO persons
+                    (person_id, specialty_id, region_id, workplace_id)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (person_id, specialty_id, region_id, workplace_id),
+                )
+                changed_ids.add(person_id)
+
+                write_audit_entry(
+                    conn=conn,
+                    person_id=person_id,
+                    batch_id=batch_id,
+                    action_type="NEW",
+                    summary=_new_summary(region_name, workplace_name, specialty_name),
+                )
+
+            elif action_type == "UPDATE":
+                if not person_id:
+                    raise ValueError("UPDATE record is missing person_id")
+
+                old = cur.execute(
+                    """
+                    SELECT specialty_id, region_id, workplace_id
+                    FROM persons
+                    WHERE person_id = ?
+                    """,
+                    (person_id,),
+                ).fetchone()
+                if not old:
+                    raise ValueError("person_id not found for UPDATE action")
+
+                old_specialty_id, old_region_id, old_workplace_id = old
+                old_specialty = get_dimension_name(
+                    cur, *DIMENSIONS["specialty"], old_specialty_id, cache
+                )
+                old_region = get_dimension_name(
+                    cur, *DIMENSIONS["region"], old_region_id, cache
+                )
+                old_workplace = get_dimension_name(
+                    cur, *DIMENSIONS["workplace"], old_workplace_id, cache
+                )
 
+                elided = (specialty_id, region_id, workplace_id) == (
+                    old_specialty_id,
+                    old_region_id,
+                    old_workplace_id,
+                )
+                if elided:
+                    elided_rows += 1
+                else:
                     cur.execute(
                         """
                         UPDATE persons
@@ -224,57 +383,521 @@ def apply_batch(batch_id: int) -> Dict[str, int]:
                         """,
                         (specialty_id, region_id, workplace_id, person_id),
                     )
+                    changed_ids.add(person_id)
 
-                    summary_parts: List[str] = []
-                    if old_specialty != specialty_name:
-                        summary_parts.append(
-                            f"Specialty changed: {old_specialty} -> {specialty_name}"
-                        )
-                    if old_region != region_name:
-                        summary_parts.append(
-                            f"Region changed: {old_region} -> {region_name}"
-                        )
-                    if old_workplace != workplace_name:
-                        summary_parts.append(
-                            f"Workplace changed: {old_workplace} -> {workplace_name}"
-                        )
-
-                    if not summary_parts:
-                        summary_parts.append("No data change detected")
-
+                if not elided or noop_audit == "record":
                     write_audit_entry(
                         conn=conn,
                         person_id=person_id,
                         batch_id=batch_id,
                         action_type="UPDATE",
-                        summary=" | ".join(summary_parts),
+                        summary=_update_summary(
+                            old_specialty,
+                            old_region,
+                            old_workplace,
+                            specialty_name,
+                            region_name,
+                            workplace_name,
+                        ),
                     )
 
-                else:
-                    raise ValueError(f"Unsupported action_type: {action_type_raw}")
+            else:
+                raise ValueError(f"Unsupported action_type: {action_type_raw}")
 
-                cur.execute(
-                    """
-                    UPDATE workforce_staging
-                    SET status = 'APPLIED'
-                    WHERE staging_id = ?
-                    """,
-                    (staging_id,),
-                )
-                applied_rows += 1
+            cur.execute(
+                """
+                UPDATE workforce_staging
+                SET status = 'APPLIED'
+                WHERE staging_id = ?
+                """,
+                (staging_id,),
+            )
+            applied_rows += 1
 
-            except Exception as row_error:
-                rejected_rows += 1
-                error_note = f"APPLY_ERROR: {row_error}"
-                cur.execute(
-                    """
-                    UPDATE workforce_staging
-                    SET status = 'REJECTED'
-                    WHERE staging_id = ?
-                    """,
-                    (staging_id,),
+        except Exception as row_error:
+            rejected_rows += 1
+            error_note = f"APPLY_ERROR: {row_error}"
+            cur.execute(
+                """
+                UPDATE workforce_staging
+                SET status = 'REJECTED'
+                WHERE staging_id = ?
+                """,
+                (staging_id,),
+            )
+            append_source_note(cur, staging_id, error_note)
+
+    return applied_rows, rejected_rows, elided_rows, changed_ids
+
+
+def _resolve_dimensions_in_bulk(
+    cur: sqlite3.Cursor,
+    cache: DimensionCache,
+    prepared: List[dict],
+) -> None:
+    # Dimensions are resolved in the same order as the row loop, so a row that
+    # fails on specialty never creates its region or workplace.
+    for key, (table_name, _id_col, name_col) in DIMENSIONS.items():
+        for entry in prepared:
+            if entry["error"] is None and entry["values"][key] is None:
+                entry["error"] = f"Missing value for {name_col}"
+
+        cache.ensure_ids(
+            cur,
+            table_name,
+            (entry["values"][key] for entry in prepared if entry["error"] is None),
+        )
+
+        for entry in prepared:
+            if entry["error"] is not None:
+                continue
+            dimension_id = cache.get_id(table_name, entry["values"][key])
+            if dimension_id is None:
+                # A case-variant of an existing name is skipped by INSERT OR
+                # IGNORE; the row loop fails the same rows on the unique index.
+                entry["error"] = f"UNIQUE constraint failed: {table_name}.{name_col}"
+            else:
+                entry["ids"][key] = dimension_id
+
+
+def _load_apply_rows(
+    cur: sqlite3.Cursor,
+    rows: List[tuple],
+    cache: DimensionCache,
+) -> None:
+    """
+    Stage the batch into a temp table with the same normalization and
+    dimension resolution the row loop applies, so every later step can work
+    on whole sets of rows.
+    """
+    prepared = []
+    for (
+        staging_id,
+        person_id_raw,
+        action_type_raw,
+        specialty_name,
+        region_name,
+        workplace_name,
+    ) in rows:
+        person_id = normalize_text(person_id_raw)
+        action_type = (normalize_text(action_type_raw) or "").upper()
+
+        action_error = None
+        if action_type in ("NEW", "UPDATE"):
+            if not person_id:
+                action_error = f"{action_type} record is missing person_id"
+        else:
+            action_error = f"Unsupported action_type: {action_type_raw}"
+
+        prepared.append(
+            {
+                "row": (
+                    staging_id,
+                    person_id,
+                    action_type,
+                    specialty_name,
+                    region_name,
+                    workplace_name,
+                    action_error,
+                ),
+                "values": {
+                    "specialty": normalize_text(specialty_name),
+                    "region": normalize_text(region_name),
+                    "workplace": normalize_text(workplace_name),
+                },
+                "ids": {"specialty": None, "region": None, "workplace": None},
+                "error": None,
+            }
+        )
+
+    _resolve_dimensions_in_bulk(cur, cache, prepared)
+
+    cur.execute("DROP TABLE IF EXISTS temp.apply_rows")
+    cur.execute(
+        """
+        CREATE TEMP TABLE apply_rows (
+            staging_id        INTEGER PRIMARY KEY,
+            person_id         TEXT,
+            action_type       TEXT,
+            specialty_raw     TEXT,
+            region_raw        TEXT,
+            workplace_raw     TEXT,
+            action_error      TEXT,
+            specialty_id      INTEGER,
+            region_id         INTEGER,
+            workplace_id      INTEGER,
+            error             TEXT,
+            old_specialty_id  INTEGER,
+            old_region_id     INTEGER,
+            old_workplace_id  INTEGER,
+            person_existed    INTEGER,
+            elided            INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    cur.executemany(
+        """
+        INSERT INTO apply_rows
+        (
+            staging_id,
+            person_id,
+            action_type,
+            specialty_raw,
+            region_raw,
+            workplace_raw,
+            action_error,
+            specialty_id,
+            region_id,
+            workplace_id,
+            error
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            entry["row"]
+            + (
+                entry["ids"]["specialty"],
+                entry["ids"]["region"],
+                entry["ids"]["workplace"],
+                entry["error"],
+            )
+            for entry in prepared
+        ),
+    )
+    cur.execute(
+        "CREATE INDEX temp.idx_apply_rows_person ON apply_rows (person_id, staging_id)"
+    )
+
+
+def _classify_rows_set_based(cur: sqlite3.Cursor) -> None:
+    cur.execute(
+        """
+        UPDATE apply_rows
+        SET error = action_error
+        WHERE error IS NULL
+          AND action_error IS NOT NULL
+        """
+    )
+    cur.execute(
+        """
+        UPDATE apply_rows
+        SET (old_specialty_id, old_region_id, old_workplace_id, person_existed) = (
+            SELECT p.specialty_id, p.region_id, p.workplace_id, 1
+            FROM persons p
+            WHERE p.person_id = apply_rows.person_id
+        )
+        WHERE error IS NULL
+        """
+    )
+    # Only the first NEW per person can succeed, and only for unknown persons.
+    cur.execute(
+        """
+        UPDATE apply_rows
+        SET error = 'person_id already exists for NEW action'
+        WHERE error IS NULL
+          AND action_type = 'NEW'
+          AND (
+              person_existed = 1
+              OR staging_id > (
+                  SELECT MIN(t.staging_id)
+                  FROM apply_rows t
+                  WHERE t.person_id = apply_rows.person_id
+                    AND t.action_type = 'NEW'
+                    AND t.error IS NULL
+              )
+          )
+        """
+    )
+    # An UPDATE may target a person created earlier in the same batch.
+    cur.execute(
+        """
+        UPDATE apply_rows
+        SET error = 'person_id not found for UPDATE action'
+        WHERE error IS NULL
+          AND action_type = 'UPDATE'
+          AND person_existed IS NULL
+          AND NOT EXISTS (
+              SELECT 1
+              FROM apply_rows t
+              WHERE t.person_id = apply_rows.person_id
+                AND t.action_type = 'NEW'
+                AND t.error IS NULL
+                AND t.staging_id < apply_rows.staging_id
+          )
+        """
+    )
+
+
+def _collect_audit_rows_set_based(
+    cur: sqlite3.Cursor,
+    batch_id: int,
+    cache: DimensionCache,
+    noop_audit: str = DEFAULT_NOOP_AUDIT,
+) -> Tuple[List[tuple], List[int]]:
+    """
+    Audit rows for the applied rows, and the staging_ids of the elided ones.
+    """
+    # The "old" side of an UPDATE is the previous applied row for the same
+    # person in this batch, or the persons row as it was before the batch. An
+    # UPDATE whose ids equal the old ones changes nothing.
+    applied = cur.execute(
+        """
+        SELECT
+            staging_id,
+            person_id,
+            action_type,
+            specialty_raw,
+            region_raw,
+            workplace_raw,
+            specialty_id,
+            region_id,
+            workplace_id,
+            CASE WHEN LAG(staging_id) OVER w IS NULL
+                 THEN old_specialty_id ELSE LAG(specialty_id) OVER w END,
+            CASE WHEN LAG(staging_id) OVER w IS NULL
+                 THEN old_region_id ELSE LAG(region_id) OVER w END,
+            CASE WHEN LAG(staging_id) OVER w IS NULL
+                 THEN old_workplace_id ELSE LAG(workplace_id) OVER w END
+        FROM apply_rows
+        WHERE error IS NULL
+        WINDOW w AS (PARTITION BY person_id ORDER BY staging_id)
+        ORDER BY staging_id
+        """
+    ).fetchall()
+
+    specialty_table = DIMENSIONS["specialty"][0]
+    region_table = DIMENSIONS["region"][0]
+    workplace_table = DIMENSIONS["workplace"][0]
+
+    audit_rows = []
+    elided_ids = []
+    for (
+        staging_id,
+        person_id,
+        action_type,
+        specialty_name,
+        region_name,
+        workplace_name,
+        specialty_id,
+        region_id,
+        workplace_id,
+        old_specialty_id,
+        old_region_id,
+        old_workplace_id,
+    ) in applied:
+        if action_type == "NEW":
+            summary = _new_summary(region_name, workplace_name, specialty_name)
+        else:
+            if (specialty_id, region_id, workplace_id) == (old_specialty_id, old_region_id, old_workplace_id):
+                elided_ids.append(staging_id)
+                if noop_audit != "record":
+                    continue
+            summary = _update_summary(
+                cache.get_name(specialty_table, old_specialty_id),
+                cache.get_name(region_table, old_region_id),
+                cache.get_name(workplace_table, old_workplace_id),
+                specialty_name,
+                region_name,
+                workplace_name,
+            )
+        audit_rows.append((person_id, batch_id, action_type, summary))
+    return audit_rows, elided_ids
+
+
+def _apply_rows_set_based(
+    conn: sqlite3.Connection,
+    batch_id: int,
+    rows: List[tuple],
+    cache: DimensionCache,
+    noop_audit: str = DEFAULT_NOOP_AUDIT,
+) -> Tuple[int, int, int, Set[str]]:
+    """
+    Apply a batch with a fixed number of statements over a temp table.
+
+    Produces the same persons, audit rows, staging statuses and REJECTED
+    notes as `_apply_rows_row_by_row`. Returns (applied, rejected, elided,
+    ids of the persons written).
+    """
+    cur = conn.cursor()
+    try:
+        _load_apply_rows(cur, rows, cache)
+        _classify_rows_set_based(cur)
+
+        audit_rows, elided_ids = _collect_audit_rows_set_based(cur, batch_id, cache, noop_audit)
+        cur.executemany(
+            "UPDATE apply_rows SET elided = 1 WHERE staging_id = ?",
+            [(staging_id,) for staging_id in elided_ids],
+        )
+
+        cur.execute(
+            """
+            INSERT INTO persons
+            (person_id, specialty_id, region_id, workplace_id)
+            SELECT person_id, specialty_id, region_id, workplace_id
+            FROM apply_rows
+            WHERE error IS NULL
+              AND action_type = 'NEW'
+            ORDER BY staging_id
+            """
+        )
+        cur.execute(
+            """
+            UPDATE persons
+            SET (specialty_id, region_id, workplace_id) = (
+                SELECT t.specialty_id, t.region_id, t.workplace_id
+                FROM apply_rows t
+                WHERE t.person_id = persons.person_id
+                  AND t.action_type = 'UPDATE'
+                  AND t.error IS NULL
+                  AND t.elided = 0
+                ORDER BY t.staging_id DESC
+                LIMIT 1
+            )
+            WHERE person_id IN (
+                SELECT person_id
+                FROM apply_rows
+                WHERE action_type = 'UPDATE'
+                  AND error IS NULL
+                  AND elided = 0
+            )
+            """
+        )
+        cur.executemany(
+            """
+            INSERT INTO workforce_audit_timeline
+            (person_id, batch_id, action_type, change_summary)
+            VALUES (?, ?, ?, ?)
+            """,
+            audit_rows,
+        )
+
+        cur.execute(
+            """
+            UPDATE workforce_staging
+            SET status = 'APPLIED'
+            WHERE staging_id IN (
+                SELECT staging_id FROM apply_rows WHERE error IS NULL
+            )
+            """
+        )
+        cur.execute(
+            """
+            UPDATE workforce_staging
+            SET status = 'REJECTED',
+                source_note = (
+                    SELECT CASE
+                        WHEN workforce_staging.source_note IS NULL
+                             OR TRIM(workforce_staging.source_note) = ''
+                        THEN 'APPLY_ERROR: ' || t.error
+                        ELSE workforce_staging.source_note || ' | APPLY_ERROR: ' || t.error
+                    END
+                    FROM apply_rows t
+                    WHERE t.staging_id = workforce_staging.staging_id
                 )
-                append_source_note(cur, staging_id, error_note)
+            WHERE staging_id IN (
+                SELECT staging_id FROM apply_rows WHERE error IS NOT NULL
+            )
+            """
+        )
+
+        applied_rows = cur.execute("SELECT COUNT(*) FROM apply_rows WHERE error IS NULL").fetchone()[0]
+        changed_ids = {
+            row[0]
+            for row in cur.execute(
+                "SELECT DISTINCT person_id FROM apply_rows WHERE error IS NULL AND elided = 0"
+            )
+        }
+        return applied_rows, len(rows) - applied_rows, len(elided_ids), changed_ids
+    finally:
+        cur.execute("DROP TABLE IF EXISTS temp.apply_rows")
+
+
+def apply_batch(
+    batch_id: int,
+    mode: str = DEFAULT_APPLY_MODE,
+    share_dimension_cache: bool = False,
+    collapse_duplicates: bool = False,
+    noop_audit: str = DEFAULT_NOOP_AUDIT,
+) -> Dict[str, int]:
+    """
+    Apply the APPROVED rows of a batch to persons in one transaction.
+
+    With collapse_duplicates, the batch is first reduced to its last APPROVED
+    row per person_id (see collapse_batch); the superseded rows are REJECTED
+    and counted in `superseded_rows`. UPDATE rows that change nothing are
+    APPLIED without writing persons and counted in `elided_rows`; noop_audit
+    (see NOOP_AUDIT_POLICIES) decides whether they get an audit row.
+    """
+    global _shared_dimension_cache
+
+    if mode not in APPLY_MODES:
+        raise ValueError(f"Unsupported apply mode: {mode}")
+    if noop_audit not in NOOP_AUDIT_POLICIES:
+        raise ValueError(f"Unsupported no-op audit policy: {noop_audit}")
+
+    pool = get_pool(DB_PATH)
+    conn = pool.acquire()
+    cur = conn.cursor()
+
+    try:
+        # Take the write lock up front so a concurrent writer makes this wait
+        # (up to the busy timeout) instead of failing mid-batch. In WAL mode
+        # readers keep seeing the pre-batch state until the commit.
+        cur.execute("BEGIN IMMEDIATE")
+        superseded_rows = 0
+        if collapse_duplicates:
+            superseded_rows = collapse_batch(conn, batch_id, statuses=("APPROVED",))["superseded_rows"]
+        rows = cur.execute(
+            """
+            SELECT
+                staging_id,
+                person_id,
+                action_type,
+                specialty_name,
+                region_name,
+                workplace_name
+            FROM workforce_staging
+            WHERE batch_id = ?
+              AND status = 'APPROVED'
+            ORDER BY staging_id
+            """,
+            (batch_id,),
+        ).fetchall()
+
+        if not rows:
+            conn.commit()
+            return {
+                "batch_id": batch_id,
+                "total_rows": 0,
+                "applied_rows": 0,
+                "rejected_rows": 0,
+                "elided_rows": 0,
+                "superseded_rows": superseded_rows,
+                "batch_status": "NOOP",
+            }
+
+        # Keep the count cube and the materialized canonical base in step
+        # with the persons this batch touches.
+        touched_ids = [normalize_text(row[1]) for row in rows]
+        maintain_cube = count_cube_exists(conn)
+        maintain_canonical = canonical_table_exists(conn)
+        if maintain_cube:
+            cube_before = snapshot_person_keys(conn, touched_ids)
+
+        cache = _dimension_cache_for_apply(cur, share_dimension_cache)
+        apply_rows = _apply_rows_set_based if mode == "set" else _apply_rows_row_by_row
+        applied_rows, rejected_rows, elided_rows, changed_ids = apply_rows(
+            conn, batch_id, rows, cache, noop_audit
+        )
+
+        if maintain_cube:
+            apply_count_delta(conn, cube_before, snapshot_person_keys(conn, touched_ids))
+        if maintain_canonical:
+            # Persons whose rows were all elided keep their materialized rows.
+            refresh_canonical_base(conn, [pid for pid in touched_ids if pid in changed_ids])
+
+        # Master CSV refresh rows: only applied rows move the stored hashes.
+        settle_staged_fingerprints(conn, batch_id)
 
         if applied_rows == 0:
             batch_status = "REJECTED"
@@ -291,21 +914,54 @@ def apply_batch(batch_id: int) -> Dict[str, int]:
             """,
             (batch_status, batch_id),
         )
+        bump_data_version(conn)
+        version = read_write_counter(conn)
 
         conn.commit()
+        checkpoint(conn)
+        if share_dimension_cache:
+            _shared_dimension_cache = (DB_PATH, version, cache)
         return {
             "batch_id": batch_id,
             "total_rows": len(rows),
             "applied_rows": applied_rows,
             "rejected_rows": rejected_rows,
+            "elided_rows": elided_rows,
+            "superseded_rows": superseded_rows,
             "batch_status": batch_status,
         }
 
     except Exception:
         conn.rollback()
+        if share_dimension_cache:
+            invalidate_dimension_cache()
         raise
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+def update_batch_status(conn: sqlite3.Connection, batch_id: int, status: str) -> None:
+    """
+    Move a batch and its staging rows to `status`, e.g. APPROVED so that
+    apply_approved_changes picks the batch up.
+
+    Rows rejected with a reject_reason (intake errors, superseded rows) stay
+    rejected. Runs in the caller's transaction.
+    """
+    ensure_reject_reason_column(conn)
+    conn.execute(
+        "UPDATE cbi_batches SET status = ? WHERE batch_id = ?",
+        (status, batch_id),
+    )
+    conn.execute(
+        """
+        UPDATE workforce_staging
+        SET status = ?
+        WHERE batch_id = ?
+          AND NOT (status = 'REJECTED' AND reject_reason IS NOT NULL)
+        """,
+        (status, batch_id),
+    )
 
 
 def _create_auto_batch_for_unassigned_approved(conn: sqlite3.Connection) -> Optional[int]:
@@ -343,12 +999,23 @@ def _create_auto_batch_for_unassigned_approved(conn: sqlite3.Connection) -> Opti
     return batch_id
 
 
-def apply_approved_changes(batch_id: Optional[int] = None) -> List[Dict[str, int]]:
+def apply_approved_changes(
+    batch_id: Optional[int] = None,
+    mode: str = DEFAULT_APPLY_MODE,
+    share_dimension_cache: bool = False,
+    collapse_duplicates: bool = False,
+    noop_audit: str = DEFAULT_NOOP_AUDIT,
+) -> List[Dict[str, int]]:
+    options = {
+        "mode": mode,
+        "share_dimension_cache": share_dimension_cache,
+        "collapse_duplicates": collapse_duplicates,
+        "noop_audit": noop_audit,
+    }
     if batch_id is not None:
-        return [apply_batch(batch_id)]
+        return [apply_batch(batch_id, **options)]
 
-    conn = get_conn()
-    try:
+    with get_pool(DB_PATH).connection() as conn:
         _create_auto_batch_for_unassigned_approved(conn)
         rows = conn.execute(
             """
@@ -359,8 +1026,6 @@ def apply_approved_changes(batch_id: Optional[int] = None) -> List[Dict[str, int
             """
         ).fetchall()
         conn.commit()
-    finally:
-        conn.close()
 
     batch_ids = [int(row[0]) for row in rows]
-    return [apply_batch(bid) for bid in batch_ids]
+    return [apply_batch(bid, **options) for bid in batch_ids]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cbi.canonical_data import CATEGORY_COLUMNS, VersionedStore, read_canonical_base
+
+
+# Set bits per byte value, for counting rows in a packed bitmap.
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
+
+class BitmapIndex:
+    """
+    Packed row bitmaps per region, workplace and specialty of a canonical frame.
+
+    A selection ORs the bitmaps of the chosen names within a dimension and ANDs
+    the dimensions together, so counts, option lists and filtered rows never
+    rescan the name columns. Filters take a list of names per dimension; None
+    or an empty list means no filter. Names not in the frame match no rows.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self.row_count = len(df)
+        self._categories: Dict[str, pd.Index] = {}
+        self._bitmaps: Dict[str, np.ndarray] = {}
+        for column in CATEGORY_COLUMNS:
+            series = df[column]
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("category")
+            categories = series.cat.categories
+            codes = series.cat.codes.to_numpy()
+            # Set each row's bit straight in the packed bitmap of its
+            # category, in packbits' big-endian bit order; no unpacked
+            # category x row matrix is ever built.
+            bitmaps = np.zeros((len(categories), (self.row_count + 7) // 8), dtype=np.uint8)
+            positions = np.flatnonzero(codes >= 0)
+            np.bitwise_or.at(
+                bitmaps,
+                (codes[positions], positions >> 3),
+                (0x80 >> (positions & 7)).astype(np.uint8),
+            )
+            self._categories[column] = categories
+            self._bitmaps[column] = bitmaps
+
+        self._all_rows = np.packbits(np.ones(self.row_count, dtype=bool))
+
+    def mask(
+        self,
+        regions: Optional[Sequence[str]] = None,
+        workplaces: Optional[Sequence[str]] = None,
+        specialties: Optional[Sequence[str]] = None,
+    ) -> np.ndarray:
+        mask = self._all_rows.copy()
+        for column, selection in zip(CATEGORY_COLUMNS, (regions, workplaces, specialties)):
+            if not selection:
+                continue
+            positions = self._categories[column].get_indexer(list(selection))
+            positions = positions[positions >= 0]
+            if len(positions):
+                mask &= np.bitwise_or.reduce(self._bitmaps[column][positions], axis=0)
+            else:
+                mask[:] = 0
+        return mask
+
+    def count(self, **filters: Optional[Sequence[str]]) -> int:
+        return int(_POPCOUNT[self.mask(**filters)].sum())
+
+    def rows(self, **filters: Optional[Sequence[str]]) -> np.ndarray:
+        """
+        Positions of the matching rows, in frame order.
+        """
+        bits = np.unpackbits(self.mask(**filters), count=self.row_count)
+        return np.flatnonzero(bits)
+
+    def frame(self, **filters: Optional[Sequence[str]]) -> pd.DataFrame:
+        return self.df.iloc[self.rows(**filters)]
+
+    def options(self, column: str, **filters: Optional[Sequence[str]]) -> List[str]:
+        """
+        Sorted names of `column` that occur in the selected rows.
+        """
+        hits = (self._bitmaps[column] & self.mask(**filters)).any(axis=1)
+        return sorted(self._categories[column][hits].tolist())
+
+
+class BitmapIndexStore(VersionedStore):
+    """
+    Canonical base with its bitmap index, shared by all sessions; read-only.
+    """
+
+    def load(self, conn: sqlite3.Connection) -> BitmapIndex:
+        return BitmapIndex(read_canonical_base(conn))
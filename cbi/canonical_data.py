@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from cbi.connections import get_pool
+from cbi.data_version import current_data_version
+from config.paths import DB_PATH
+
+
+CANONICAL_VIEW = "v_workforce_base_canonical"
+# Materialized copy of the view, built by import/13_materialize_canonical_base.py.
+CANONICAL_TABLE = "workforce_base_canonical"
+CATEGORY_COLUMNS = ("region_name", "workplace_name", "specialty_name")
+
+
+def canonical_table_exists(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (CANONICAL_TABLE,),
+    ).fetchone()
+    return row is not None
+
+
+def canonical_source(conn: sqlite3.Connection) -> str:
+    """
+    The materialized table when it exists, otherwise the live view.
+    """
+    return CANONICAL_TABLE if canonical_table_exists(conn) else CANONICAL_VIEW
+
+
+def refresh_canonical_base(
+    conn: sqlite3.Connection,
+    person_ids: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Re-derive materialized rows from the view inside the caller's transaction.
+
+    Only the given persons are refreshed; pass None for a full refresh, which
+    is needed whenever specialty aliases change.
+    """
+    if person_ids is None:
+        conn.execute(f"DELETE FROM {CANONICAL_TABLE}")
+        conn.execute(f"INSERT INTO {CANONICAL_TABLE} SELECT * FROM {CANONICAL_VIEW}")
+        return
+
+    ids = list(dict.fromkeys(pid for pid in person_ids if pid is not None))
+    # Chunked to stay below SQLite's bound parameter limit.
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        conn.execute(f"DELETE FROM {CANONICAL_TABLE} WHERE person_id IN ({placeholders})", chunk)
+        conn.execute(
+            f"INSERT INTO {CANONICAL_TABLE} SELECT * FROM {CANONICAL_VIEW} WHERE person_id IN ({placeholders})",
+            chunk,
+        )
+
+
+def canonical_filter_clause(
+    regions: Optional[Iterable[str]] = None,
+    workplaces: Optional[Iterable[str]] = None,
+    specialties: Optional[Iterable[str]] = None,
+) -> Tuple[str, List[str]]:
+    """
+    WHERE clause and parameters for a region/workplace/specialty selection.
+
+    An empty or missing selection leaves that dimension unfiltered. Each
+    predicate is backed by a covering index on the materialized table.
+    """
+    clause = "WHERE 1 = 1"
+    params: List[str] = []
+    for column, selected in zip(CATEGORY_COLUMNS, (regions, workplaces, specialties)):
+        selected = list(selected or [])
+        if selected:
+            placeholders = ",".join("?" for _ in selected)
+            clause += f" AND {column} IN ({placeholders})"
+            params.extend(selected)
+    return clause, params
+
+
+def read_canonical_base(
+    conn: sqlite3.Connection,
+    regions: Optional[Iterable[str]] = None,
+    workplaces: Optional[Iterable[str]] = None,
+    specialties: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read the canonical base, filtered in SQL, with the dimension names as
+    sorted Categoricals.
+    """
+    clause, params = canonical_filter_clause(regions, workplaces, specialties)
+    df = pd.read_sql(f"SELECT * FROM {canonical_source(conn)} {clause}", conn, params=params)
+    for column in CATEGORY_COLUMNS:
+        categories = sorted(df[column].dropna().unique().tolist())
+        df[column] = pd.Categorical(df[column], categories=categories)
+    return df
+
+
+class VersionedStore:
+    """
+    Process-wide value loaded from the database, reloaded only when the data
+    version changes. Subclasses implement `load`.
+
+    The returned value is shared between sessions and must be treated as
+    read-only. Loads run on a pooled read-only connection.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DB_PATH,
+        version_fn: Optional[Callable[[Path], Hashable]] = None,
+    ) -> None:
+        self.db_path = db_path
+        self._version_fn = version_fn or current_data_version
+        self._version: Optional[Hashable] = None
+        self._value: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[Hashable]:
+        return self._version
+
+    def load(self, conn: sqlite3.Connection) -> Any:
+        raise NotImplementedError
+
+    def get(self) -> Any:
+        return self.snapshot()[1]
+
+    def snapshot(self) -> Tuple[Hashable, Any]:
+        """
+        The current value with the data version it was loaded at, read
+        together so keys derived from the version match the value.
+        """
+        version = self._version_fn(self.db_path)
+        with self._lock:
+            if self._value is None or version != self._version:
+                with get_pool(self.db_path, read_only=True).connection() as conn:
+                    self._value = self.load(conn)
+                self._version = version
+            return self._version, self._value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._value = None
+            self._version = None
+
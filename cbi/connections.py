@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+from config.paths import DB_PATH
+
+
+BUSY_TIMEOUT_MS = 5000
+# Negative cache_size is in KiB: 32 MiB of page cache per connection.
+CACHE_SIZE_KIB = 32 * 1024
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+# Prepared statements kept per connection; pooled connections keep theirs
+# between page runs.
+STATEMENT_CACHE_SIZE = 256
+
+READ_POOL_SIZE = 4
+WRITE_POOL_SIZE = 2
+
+# WAL checkpoint policy. SQLite checkpoints on commit once the log passes
+# WAL_AUTOCHECKPOINT_PAGES; writers that just committed a large change also
+# run a PASSIVE checkpoint, which never waits for readers. A checkpointed log
+# is truncated back to JOURNAL_SIZE_LIMIT_BYTES.
+WAL_AUTOCHECKPOINT_PAGES = 1000
+JOURNAL_SIZE_LIMIT_BYTES = 64 * 1024 * 1024
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+DEFAULT_CHECKPOINT_MODE = "PASSIVE"
+
+# Databases already switched to WAL by this process.
+_wal_databases: Set[Path] = set()
+
+
+def _enable_wal(conn: sqlite3.Connection) -> bool:
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        return True
+    # The switch needs an exclusive lock. If another connection holds one,
+    # stay in the current mode rather than wait; the next connection retries.
+    conn.execute("PRAGMA busy_timeout = 0")
+    try:
+        return conn.execute("PRAGMA journal_mode = WAL").fetchone()[0] == "wal"
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+
+
+def connect(db_path: Path = DB_PATH, read_only: bool = False) -> sqlite3.Connection:
+    """
+    New connection to db_path with the project's PRAGMAs applied.
+
+    Read-only connections are opened with mode=ro and query_only, so a stray
+    write fails instead of taking the write lock. The database is switched to
+    WAL, which is persistent, before the first connection of either kind:
+    readers then see the last committed state while a write transaction is
+    open, and never block the writer's commit.
+    """
+    resolved = Path(db_path).resolve()
+    if read_only and resolved not in _wal_databases and resolved.exists():
+        switcher = sqlite3.connect(resolved)
+        try:
+            if _enable_wal(switcher):
+                _wal_databases.add(resolved)
+        finally:
+            switcher.close()
+
+    if read_only:
+        target = f"{resolved.as_uri()}?mode=ro"
+    else:
+        target = str(db_path)
+    conn = sqlite3.connect(
+        target,
+        uri=read_only,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Pooled connections move between Streamlit script threads; the pool
+        # hands each one to a single user at a time.
+        check_same_thread=False,
+    )
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        if _enable_wal(conn):
+            _wal_databases.add(resolved)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {WAL_AUTOCHECKPOINT_PAGES}")
+        conn.execute(f"PRAGMA journal_size_limit = {JOURNAL_SIZE_LIMIT_BYTES}")
+    return conn
+
+
+def checkpoint(conn: sqlite3.Connection, mode: str = DEFAULT_CHECKPOINT_MODE) -> Tuple[int, int, int]:
+    """
+    Checkpoint the WAL; returns (busy, log pages, checkpointed pages).
+    """
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Unsupported checkpoint mode: {mode}")
+    busy, log_pages, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    return busy, log_pages, checkpointed
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool of tuned connections to one database.
+
+    Up to max_idle connections are kept between uses; more are opened on
+    demand and closed when returned. A returned connection has any open
+    transaction rolled back and its row_factory reset.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, read_only: bool = False, max_idle: int = READ_POOL_SIZE) -> None:
+        self.db_path = db_path
+        self.read_only = read_only
+        self.max_idle = max_idle
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return connect(self.db_path, read_only=self.read_only)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+        except sqlite3.ProgrammingError:
+            # Closed by the caller; nothing to return.
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools: Dict[Tuple[Path, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path = DB_PATH, read_only: bool = False) -> ConnectionPool:
+    """
+    Process-wide pool for db_path, one each for reads and writes.
+    """
+    key = (Path(db_path), read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                db_path,
+                read_only=read_only,
+                max_idle=READ_POOL_SIZE if read_only else WRITE_POOL_SIZE,
+            )
+    return pool
+
+
+def read_connection(db_path: Path = DB_PATH):
+    """
+    Pooled read-only connection, as a context manager.
+    """
+    return get_pool(db_path, read_only=True).connection()
+
+
+def write_connection(db_path: Path = DB_PATH):
+    """
+    Pooled write connection, as a context manager. Callers commit; anything
+    left uncommitted is rolled back when the connection is returned.
+    """
+    return get_pool(db_path, read_only=False).connection()
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
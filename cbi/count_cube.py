@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from cbi.canonical_data import VersionedStore
+
+
+CUBE_TABLE = "workforce_count_cube"
+CUBE_COLUMNS = ("region_name", "workplace_name", "specialty_name")
+
+# Missing dimension ids are stored as 0 so the cube key stays unique.
+CubeKey = Tuple[int, int, int]
+
+CUBE_CELLS_SQL = """
+SELECT
+    IFNULL(region_id, 0) AS region_id,
+    IFNULL(workplace_id, 0) AS workplace_id,
+    IFNULL(specialty_id, 0) AS specialty_id,
+    COUNT(*) AS person_count
+FROM persons
+GROUP BY 1, 2, 3
+"""
+
+
+def count_cube_exists(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (CUBE_TABLE,),
+    ).fetchone()
+    return row is not None
+
+
+def create_count_cube_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CUBE_TABLE} (
+            region_id     INTEGER NOT NULL,
+            workplace_id  INTEGER NOT NULL,
+            specialty_id  INTEGER NOT NULL,
+            person_count  INTEGER NOT NULL,
+            PRIMARY KEY (region_id, workplace_id, specialty_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def rebuild_count_cube(conn: sqlite3.Connection) -> None:
+    create_count_cube_table(conn)
+    conn.execute(f"DELETE FROM {CUBE_TABLE}")
+    conn.execute(
+        f"INSERT INTO {CUBE_TABLE} (region_id, workplace_id, specialty_id, person_count) {CUBE_CELLS_SQL}"
+    )
+
+
+def snapshot_person_keys(conn: sqlite3.Connection, person_ids: Iterable[str]) -> Counter:
+    """
+    Cube cells currently occupied by the given persons.
+    """
+    ids = list(dict.fromkeys(pid for pid in person_ids if pid is not None))
+    cells: Counter = Counter()
+    # Chunked to stay below SQLite's bound parameter limit.
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT IFNULL(region_id, 0), IFNULL(workplace_id, 0), IFNULL(specialty_id, 0)
+            FROM persons
+            WHERE person_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        cells.update(tuple(row) for row in rows)
+    return cells
+
+
+def apply_count_delta(conn: sqlite3.Connection, before: Counter, after: Counter) -> None:
+    """
+    Move the counts of persons whose cells changed from `before` to `after`.
+    """
+    delta: Dict[CubeKey, int] = {}
+    for key in set(before) | set(after):
+        change = after.get(key, 0) - before.get(key, 0)
+        if change:
+            delta[key] = change
+    if not delta:
+        return
+
+    conn.executemany(
+        f"""
+        INSERT INTO {CUBE_TABLE} (region_id, workplace_id, specialty_id, person_count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (region_id, workplace_id, specialty_id)
+        DO UPDATE SET person_count = person_count + excluded.person_count
+        """,
+        [(*key, change) for key, change in delta.items()],
+    )
+    conn.execute(f"DELETE FROM {CUBE_TABLE} WHERE person_count <= 0")
+
+
+def read_count_cube(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    Cube cells by canonical name, mirroring v_workforce_base_canonical.
+
+    Read-only: before 12_create_count_cube.py has run, the cells are grouped
+    from persons on the fly.
+    """
+    source = CUBE_TABLE if count_cube_exists(conn) else f"({CUBE_CELLS_SQL})"
+    return pd.read_sql(
+        f"""
+        SELECT
+            r.region_name,
+            w.workplace_name,
+            COALESCE(a.canonical_name, s.specialty_name) AS specialty_name,
+            SUM(c.person_count) AS person_count
+        FROM {source} c
+        JOIN specialties s ON c.specialty_id = s.specialty_id
+        LEFT JOIN specialty_aliases a ON a.alias_name = s.specialty_name
+        LEFT JOIN regions r ON c.region_id = r.region_id
+        LEFT JOIN workplaces w ON c.workplace_id = w.workplace_id
+        GROUP BY 1, 2, 3
+        """,
+        conn,
+    )
+
+
+class CountCube:
+    """
+    Person counts per region x workplace x specialty.
+
+    Filters take a list of names per dimension; None or an empty list means
+    no filter, as in the analytics pages.
+    """
+
+    def __init__(self, cells: pd.DataFrame) -> None:
+        self.cells = cells
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> "CountCube":
+        return cls(read_count_cube(conn))
+
+    def filtered(
+        self,
+        regions: Optional[Sequence[str]] = None,
+        workplaces: Optional[Sequence[str]] = None,
+        specialties: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        mask = pd.Series(True, index=self.cells.index)
+        for column, selection in zip(CUBE_COLUMNS, (regions, workplaces, specialties)):
+            if selection:
+                mask &= self.cells[column].isin(selection)
+        return self.cells[mask]
+
+    def options(self, column: str, **filters: Optional[Sequence[str]]) -> List[str]:
+        values = self.filtered(**filters)[column].dropna().unique().tolist()
+        return sorted(values)
+
+    def totals(self, **filters: Optional[Sequence[str]]) -> Dict[str, int]:
+        cells = self.filtered(**filters)
+        return {
+            "persons": int(cells["person_count"].sum()),
+            "regions": int(cells["region_name"].nunique()),
+            "workplaces": int(cells["workplace_name"].nunique()),
+            "specialties": int(cells["specialty_name"].nunique()),
+        }
+
+
+class CountCubeStore(VersionedStore):
+    def load(self, conn: sqlite3.Connection) -> CountCube:
+        return CountCube.from_connection(conn)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from cbi.connections import connect
+from config.paths import DB_PATH
+
+
+DATA_VERSION_TABLE = "cbi_data_version"
+
+
+def ensure_data_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} (
+            id          INTEGER PRIMARY KEY CHECK (id = 1),
+            version     INTEGER NOT NULL,
+            updated_at  TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(f"INSERT OR IGNORE INTO {DATA_VERSION_TABLE} (id, version) VALUES (1, 0)")
+
+
+def bump_data_version(conn: sqlite3.Connection) -> None:
+    """
+    Increment the write counter inside the caller's transaction.
+    """
+    ensure_data_version_table(conn)
+    conn.execute(
+        f"""
+        UPDATE {DATA_VERSION_TABLE}
+        SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+        """
+    )
+
+
+def read_write_counter(conn: sqlite3.Connection) -> int:
+    try:
+        row = conn.execute(f"SELECT version FROM {DATA_VERSION_TABLE} WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+class DataVersionTracker:
+    """
+    Monotonic data version of one database, for keying cached frames and exports.
+
+    A dedicated connection watches `PRAGMA data_version`, which moves on every
+    commit made through any other connection, including other processes.
+    Together with the write counter bumped by apply_batch and the import
+    scripts, any change to that pair advances the version by one.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH) -> None:
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._state: Optional[Tuple[int, int]] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                # Not pooled: PRAGMA data_version is relative to this connection.
+                self._conn = connect(self.db_path, read_only=True)
+            state = (
+                int(self._conn.execute("PRAGMA data_version").fetchone()[0]),
+                read_write_counter(self._conn),
+            )
+            if state != self._state:
+                self._state = state
+                self._version += 1
+            return self._version
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_trackers: Dict[Path, DataVersionTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def current_data_version(db_path: Path = DB_PATH) -> int:
+    """
+    Current version of db_path from its process-wide tracker.
+    """
+    with _trackers_lock:
+        tracker = _trackers.get(db_path)
+        if tracker is None:
+            tracker = _trackers[db_path] = DataVersionTracker(db_path)
+    return tracker.current()
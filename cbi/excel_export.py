@@ -0,0 +1,586 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from cbi.canonical_data import canonical_filter_clause, canonical_source
+from cbi.connections import read_connection
+from config.paths import CACHE_DIR, CSV_PATH, DB_PATH, EXPORTS_DIR
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow ships with streamlit; fall back to pickle without it.
+    feather = None
+
+REQUIRED_COLUMNS = {
+    "person_id",
+    "region_name",
+    "workplace_name",
+    "specialty_name",
+}
+
+TOTAL_LABEL = "الإجمالي"
+
+OutputTarget = Union[str, Path, BytesIO, BinaryIO]
+
+DRILLDOWN_CACHE_DIR = CACHE_DIR
+# Master CSV column that persons.person_id was loaded from.
+DRILLDOWN_KEY_COLUMN = "civil id"
+# Text columns with at most this share of distinct values are cached as categoricals.
+CATEGORY_MAX_RATIO = 0.5
+
+
+HEADER_FONT = Font(name="Calibri", size=11, bold=True, color="FFFFFFFF")
+HEADER_FILL = PatternFill(fill_type="solid", fgColor="FF404040")
+BODY_FONT = Font(name="Calibri", size=11, bold=False)
+TOTAL_FONT = Font(name="Calibri", size=11, bold=True)
+ROW_FILLS = [
+    PatternFill(fill_type="solid", fgColor="FFE9EDF3"),  # style 3
+    PatternFill(fill_type="solid", fgColor="FFDDE5ED"),  # style 5
+    PatternFill(fill_type="solid", fgColor="FFF2EEE8"),  # style 6
+    PatternFill(fill_type="solid", fgColor="FFE6EBE7"),  # style 7
+    PatternFill(fill_type="solid", fgColor="FFEEF1F4"),  # style 8
+]
+TOTAL_FILL = PatternFill(fill_type="solid", fgColor="FFD9D9D9")
+THIN_SIDE = Side(style="thin")
+THIN_BORDER = Border(
+    left=THIN_SIDE,
+    right=THIN_SIDE,
+    top=THIN_SIDE,
+    bottom=THIN_SIDE,
+)
+CENTER_ALIGN = Alignment(horizontal="center", vertical="center")
+HEADER_ALIGN = Alignment(horizontal="center", vertical="top")
+
+# "streaming" writes pre-styled rows once through a write-only workbook;
+# "standard" builds the full workbook and styles it afterwards.
+EXPORT_ENGINES = ("streaming", "standard")
+DEFAULT_EXPORT_ENGINE = "streaming"
+
+STYLE_HEADER = "wds_header"
+STYLE_TOTAL = "wds_total"
+STYLE_DRILLDOWN_HEADER = "wds_drilldown_header"
+STYLE_BODY = [f"wds_body_{idx}" for idx in range(len(ROW_FILLS))]
+
+# Column widths are planned from the DataFrames before writing. Pivot widths
+# only look at the header and the first rows; None measures every row.
+REGION_LABEL_WIDTHS = [31]
+REGION_WORKPLACE_LABEL_WIDTHS = [31, 45]
+PIVOT_MIN_WIDTH = 7
+PIVOT_MAX_WIDTH = 45
+PIVOT_WIDTH_SAMPLE_ROWS = 29
+DRILLDOWN_MIN_WIDTH = 10
+DRILLDOWN_MAX_WIDTH = 50
+DRILLDOWN_WIDTH_SAMPLE_ROWS = None
+
+
+def _validate_columns(df: pd.DataFrame) -> None:
+    missing = REQUIRED_COLUMNS - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns for export: {sorted(missing)}")
+
+
+def _build_pivots(df_base: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    grp_region = (
+        df_base.groupby(["region_name", "specialty_name"], dropna=False)
+        .size()
+        .reset_index(name="count")
+    )
+    pivot_region = grp_region.pivot_table(
+        index="region_name",
+        columns="specialty_name",
+        values="count",
+        aggfunc="sum",
+        fill_value=0,
+        margins=True,
+        margins_name=TOTAL_LABEL,
+    )
+    pivot_region = pivot_region.reset_index()
+
+    grp_region_wp = (
+        df_base.groupby(
+            ["region_name", "workplace_name", "specialty_name"],
+            dropna=False,
+        )
+        .size()
+        .reset_index(name="count")
+    )
+    pivot_region_wp = grp_region_wp.pivot_table(
+        index=["region_name", "workplace_name"],
+        columns="specialty_name",
+        values="count",
+        aggfunc="sum",
+        fill_value=0,
+        margins=True,
+        margins_name=TOTAL_LABEL,
+    )
+    pivot_region_wp = pivot_region_wp.reset_index()
+
+    return pivot_region, pivot_region_wp
+
+
+def _sanitize_df(df: pd.DataFrame) -> pd.DataFrame:
+    # astype(object) first so categorical columns accept the "" fill value.
+    clean = df.copy()
+    clean["person_id"] = clean["person_id"].astype(object).fillna("").astype(str).str.strip()
+    clean["region_name"] = clean["region_name"].astype(object).fillna("").astype(str).str.strip()
+    clean["workplace_name"] = clean["workplace_name"].astype(object).fillna("").astype(str).str.strip()
+    clean["specialty_name"] = clean["specialty_name"].astype(object).fillna("").astype(str).str.strip()
+    return clean
+
+
+def _plan_column_widths(
+    df: pd.DataFrame,
+    min_width: int,
+    max_width: int,
+    sample_rows: Optional[int] = None,
+) -> List[int]:
+    """
+    Width per column from the longest header or value, padded by 2 and clamped.
+
+    Only the first sample_rows rows are measured when given. Missing values
+    count as empty.
+    """
+    sample = df if sample_rows is None else df.head(sample_rows)
+    widths = []
+    for col_idx, column in enumerate(df.columns):
+        values = sample.iloc[:, col_idx]
+        lengths = values.astype(str).str.len().where(values.notna(), 0)
+        longest = max(len(str(column)), int(lengths.max()) if len(lengths) else 0)
+        widths.append(max(min_width, min(max_width, longest + 2)))
+    return widths
+
+
+def _pivot_column_widths(df: pd.DataFrame, label_widths: Sequence[int]) -> List[int]:
+    planned = _plan_column_widths(
+        df.iloc[:, len(label_widths):],
+        PIVOT_MIN_WIDTH,
+        PIVOT_MAX_WIDTH,
+        sample_rows=PIVOT_WIDTH_SAMPLE_ROWS,
+    )
+    return list(label_widths) + planned
+
+
+def _drilldown_column_widths(df: pd.DataFrame) -> List[int]:
+    return _plan_column_widths(
+        df,
+        DRILLDOWN_MIN_WIDTH,
+        DRILLDOWN_MAX_WIDTH,
+        sample_rows=DRILLDOWN_WIDTH_SAMPLE_ROWS,
+    )
+
+
+def _set_column_widths(ws, widths: Sequence[int]) -> None:
+    for col_idx, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+
+def _read_source_csv() -> pd.DataFrame:
+    try:
+        return pd.read_csv(CSV_PATH, low_memory=False)
+    except UnicodeDecodeError:
+        return pd.read_csv(CSV_PATH, encoding="utf-8-sig", low_memory=False)
+
+
+def _drilldown_cache_path() -> Path:
+    stat = CSV_PATH.stat()
+    source_key = hashlib.sha1(str(CSV_PATH.resolve()).encode("utf-8")).hexdigest()[:12]
+    suffix = ".feather" if feather is not None else ".pkl"
+    return DRILLDOWN_CACHE_DIR / f"drilldown_{source_key}_{stat.st_size}_{stat.st_mtime_ns}{suffix}"
+
+
+def _to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    compact = df.copy()
+    for column in compact.columns:
+        series = compact[column]
+        if series.dtype == object and series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+            compact[column] = series.astype("category")
+    return compact
+
+
+def _write_drilldown_cache(df: pd.DataFrame, cache_path: Path) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    if feather is not None:
+        feather.write_feather(_to_columnar(df), tmp_path, compression="uncompressed")
+    else:
+        _to_columnar(df).to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+
+    # Older snapshots of the same source are never read again.
+    source_prefix = cache_path.name.split("_", 2)[:2]
+    for stale in cache_path.parent.glob("_".join(source_prefix) + "_*"):
+        if stale != cache_path:
+            stale.unlink(missing_ok=True)
+
+
+def _read_drilldown_cache(cache_path: Path) -> pd.DataFrame:
+    if cache_path.suffix == ".feather":
+        df = feather.read_feather(cache_path, memory_map=True)
+    else:
+        df = pd.read_pickle(cache_path)
+
+    # Arrow hands back missing text as None; the CSV parse yields NaN.
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].where(df[column].notna(), np.nan)
+    return df
+
+
+def _load_original_drilldown_data() -> pd.DataFrame:
+    if not CSV_PATH.exists():
+        raise FileNotFoundError(f"Source file not found: {CSV_PATH}")
+
+    cache_path = _drilldown_cache_path()
+    if cache_path.exists():
+        try:
+            return _read_drilldown_cache(cache_path)
+        except Exception:
+            cache_path.unlink(missing_ok=True)
+
+    df = _read_source_csv()
+    try:
+        _write_drilldown_cache(df, cache_path)
+    except Exception:
+        # The cache is an optimization only; exports still work from the CSV.
+        pass
+    return df
+
+
+def _filter_drilldown(drilldown_df: pd.DataFrame, person_ids: pd.Series) -> pd.DataFrame:
+    """
+    Keep the source rows of the exported persons, in CSV order.
+
+    The key is normalized the same way 03_load_persons.py derived person_id.
+    A source without the key column cannot be matched and is kept whole, as
+    the exporter did before the drilldown was filtered.
+    """
+    if DRILLDOWN_KEY_COLUMN not in drilldown_df.columns:
+        return drilldown_df
+    key_index = pd.Index(drilldown_df[DRILLDOWN_KEY_COLUMN].astype(str).str.strip())
+    mask = key_index.isin(pd.Index(person_ids.unique()))
+    return drilldown_df[mask]
+
+
+def _write_dataframe(ws, df: pd.DataFrame) -> None:
+    headers = [str(c) for c in df.columns]
+    for col_idx, header in enumerate(headers, start=1):
+        ws.cell(row=1, column=col_idx, value=header)
+
+    for row_idx, row in enumerate(df.itertuples(index=False), start=2):
+        for col_idx, value in enumerate(row, start=1):
+            ws.cell(row=row_idx, column=col_idx, value=value)
+
+
+def _style_header_row(ws, col_count: int) -> None:
+    for col_idx in range(1, col_count + 1):
+        cell = ws.cell(row=1, column=col_idx)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        cell.border = THIN_BORDER
+        cell.alignment = CENTER_ALIGN
+
+
+def _style_total_row(ws, row_idx: int, col_count: int) -> None:
+    for col_idx in range(1, col_count + 1):
+        cell = ws.cell(row=row_idx, column=col_idx)
+        cell.font = TOTAL_FONT
+        cell.fill = TOTAL_FILL
+        cell.border = THIN_BORDER
+        cell.alignment = CENTER_ALIGN
+
+
+def _style_region_sheet(ws, data_row_count: int, col_count: int, widths: Sequence[int]) -> None:
+    _style_header_row(ws, col_count)
+
+    total_row = data_row_count + 1
+    for row_idx in range(2, total_row):
+        row_fill = ROW_FILLS[(row_idx - 2) % len(ROW_FILLS)]
+        for col_idx in range(1, col_count):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            cell.font = BODY_FONT
+            cell.fill = row_fill
+            cell.border = THIN_BORDER
+            cell.alignment = CENTER_ALIGN
+
+    _style_total_row(ws, total_row, col_count)
+
+    # Total column is always gray/bold for all data rows.
+    for row_idx in range(2, total_row):
+        cell = ws.cell(row=row_idx, column=col_count)
+        cell.font = TOTAL_FONT
+        cell.fill = TOTAL_FILL
+        cell.border = THIN_BORDER
+        cell.alignment = CENTER_ALIGN
+
+    ws.freeze_panes = "B2"
+    _set_column_widths(ws, widths)
+
+
+def _style_region_workplace_sheet(ws, data_row_count: int, col_count: int, widths: Sequence[int]) -> None:
+    _style_header_row(ws, col_count)
+
+    total_row = data_row_count + 1
+    current_region = None
+    style_index = -1
+
+    for row_idx in range(2, total_row):
+        region = ws.cell(row=row_idx, column=1).value
+        if region != current_region:
+            current_region = region
+            style_index = (style_index + 1) % len(ROW_FILLS)
+        row_fill = ROW_FILLS[style_index]
+
+        for col_idx in range(1, col_count):
+            cell = ws.cell(row=row_idx, column=col_idx)
+            cell.font = BODY_FONT
+            cell.fill = row_fill
+            cell.border = THIN_BORDER
+            cell.alignment = CENTER_ALIGN
+
+    _style_total_row(ws, total_row, col_count)
+
+    for row_idx in range(2, total_row):
+        cell = ws.cell(row=row_idx, column=col_count)
+        cell.font = TOTAL_FONT
+        cell.fill = TOTAL_FILL
+        cell.border = THIN_BORDER
+        cell.alignment = CENTER_ALIGN
+
+    ws.freeze_panes = "C2"
+    _set_column_widths(ws, widths)
+
+
+def _style_drilldown_sheet(ws, col_count: int, widths: Sequence[int]) -> None:
+    for col_idx in range(1, col_count + 1):
+        cell = ws.cell(row=1, column=col_idx)
+        cell.font = TOTAL_FONT
+        cell.border = THIN_BORDER
+        cell.alignment = HEADER_ALIGN
+
+    _set_column_widths(ws, widths)
+
+
+def _register_named_styles(wb: Workbook) -> None:
+    def add_style(name: str, font: Font, fill: Optional[PatternFill], alignment: Alignment) -> None:
+        style = NamedStyle(name=name)
+        style.font = font
+        if fill is not None:
+            style.fill = fill
+        style.border = THIN_BORDER
+        style.alignment = alignment
+        wb.add_named_style(style)
+
+    add_style(STYLE_HEADER, HEADER_FONT, HEADER_FILL, CENTER_ALIGN)
+    add_style(STYLE_TOTAL, TOTAL_FONT, TOTAL_FILL, CENTER_ALIGN)
+    add_style(STYLE_DRILLDOWN_HEADER, TOTAL_FONT, None, HEADER_ALIGN)
+    for name, fill in zip(STYLE_BODY, ROW_FILLS):
+        add_style(name, BODY_FONT, fill, CENTER_ALIGN)
+
+
+def _styled_row(ws, values: Iterable[object], styles: Sequence[str]) -> List[WriteOnlyCell]:
+    row = []
+    for value, style in zip(values, styles):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        row.append(cell)
+    return row
+
+
+def _stream_pivot_sheet(
+    ws,
+    df: pd.DataFrame,
+    label_widths: Sequence[int],
+    group_fills_by_region: bool,
+) -> None:
+    """
+    Stream a pivot sheet with the layout of _style_region_sheet (one label
+    column) or _style_region_workplace_sheet (two label columns).
+    """
+    col_count = len(df.columns)
+    label_cols = len(label_widths)
+    _set_column_widths(ws, _pivot_column_widths(df, label_widths))
+    ws.freeze_panes = f"{get_column_letter(label_cols + 1)}2"
+
+    ws.append(_styled_row(ws, [str(c) for c in df.columns], [STYLE_HEADER] * col_count))
+
+    total_offset = len(df) - 1
+    current_region = None
+    style_index = -1
+    for offset, row in enumerate(df.itertuples(index=False)):
+        if offset == total_offset:
+            styles = [STYLE_TOTAL] * col_count
+        else:
+            if group_fills_by_region:
+                if row[0] != current_region:
+                    current_region = row[0]
+                    style_index = (style_index + 1) % len(STYLE_BODY)
+            else:
+                style_index = offset % len(STYLE_BODY)
+            styles = [STYLE_BODY[style_index]] * (col_count - 1) + [STYLE_TOTAL]
+        ws.append(_styled_row(ws, row, styles))
+
+
+def _stream_drilldown_sheet(ws, df: pd.DataFrame) -> None:
+    _set_column_widths(ws, _drilldown_column_widths(df))
+    headers = [str(c) for c in df.columns]
+    ws.append(_styled_row(ws, headers, [STYLE_DRILLDOWN_HEADER] * len(headers)))
+    for row in df.itertuples(index=False):
+        ws.append(list(row))
+
+
+def _export_streaming(
+    output: OutputTarget,
+    pivot_region: pd.DataFrame,
+    pivot_region_wp: pd.DataFrame,
+    drilldown_df: Optional[pd.DataFrame],
+) -> None:
+    wb = Workbook(write_only=True)
+    _register_named_styles(wb)
+
+    _stream_pivot_sheet(
+        wb.create_sheet("Region x Specialty"),
+        pivot_region,
+        REGION_LABEL_WIDTHS,
+        group_fills_by_region=False,
+    )
+    _stream_pivot_sheet(
+        wb.create_sheet("Region+Workplace x Specialty"),
+        pivot_region_wp,
+        REGION_WORKPLACE_LABEL_WIDTHS,
+        group_fills_by_region=True,
+    )
+    if drilldown_df is not None:
+        _stream_drilldown_sheet(wb.create_sheet("Drilldown_Filtered"), drilldown_df)
+
+    wb.save(output)
+
+
+def _export_standard(
+    output: OutputTarget,
+    pivot_region: pd.DataFrame,
+    pivot_region_wp: pd.DataFrame,
+    drilldown_df: Optional[pd.DataFrame],
+) -> None:
+    wb = Workbook()
+    default_ws = wb.active
+    wb.remove(default_ws)
+
+    ws_region = wb.create_sheet("Region x Specialty")
+    _write_dataframe(ws_region, pivot_region)
+    _style_region_sheet(
+        ws_region,
+        data_row_count=len(pivot_region),
+        col_count=len(pivot_region.columns),
+        widths=_pivot_column_widths(pivot_region, REGION_LABEL_WIDTHS),
+    )
+
+    ws_region_wp = wb.create_sheet("Region+Workplace x Specialty")
+    _write_dataframe(ws_region_wp, pivot_region_wp)
+    _style_region_workplace_sheet(
+        ws_region_wp,
+        data_row_count=len(pivot_region_wp),
+        col_count=len(pivot_region_wp.columns),
+        widths=_pivot_column_widths(pivot_region_wp, REGION_WORKPLACE_LABEL_WIDTHS),
+    )
+
+    if drilldown_df is not None:
+        ws_drilldown = wb.create_sheet("Drilldown_Filtered")
+        _write_dataframe(ws_drilldown, drilldown_df)
+        _style_drilldown_sheet(
+            ws_drilldown,
+            col_count=len(drilldown_df.columns),
+            widths=_drilldown_column_widths(drilldown_df),
+        )
+
+    wb.save(output)
+
+
+def export_official_excel(
+    df_base: pd.DataFrame,
+    output: OutputTarget,
+    include_drilldown: bool = True,
+    engine: str = DEFAULT_EXPORT_ENGINE,
+) -> OutputTarget:
+    """
+    Export a filtered canonical dataframe to the official workbook format.
+
+    The Drilldown_Filtered sheet holds the master CSV rows of the exported
+    persons only; pass include_drilldown=False to leave it out. Both engines
+    produce the same layout; "streaming" keeps memory bounded for large
+    drilldowns.
+    """
+    if engine not in EXPORT_ENGINES:
+        raise ValueError(f"Unsupported export engine: {engine}")
+
+    _validate_columns(df_base)
+    if df_base.empty:
+        raise ValueError("No data available for export.")
+
+    records_df = _sanitize_df(df_base)
+    pivot_region, pivot_region_wp = _build_pivots(records_df)
+    drilldown_df = None
+    if include_drilldown:
+        drilldown_df = _filter_drilldown(_load_original_drilldown_data(), records_df["person_id"])
+
+    if engine == "streaming":
+        _export_streaming(output, pivot_region, pivot_region_wp, drilldown_df)
+    else:
+        _export_standard(output, pivot_region, pivot_region_wp, drilldown_df)
+    return output
+
+
+def _load_filtered_rows(
+    selected_regions: Iterable[str] | None = None,
+    selected_workplaces: Iterable[str] | None = None,
+    selected_specialties: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    with read_connection(DB_PATH) as conn:
+        clause, params = canonical_filter_clause(
+            selected_regions, selected_workplaces, selected_specialties
+        )
+        query = f"""
+            SELECT
+                person_id,
+                region_name,
+                workplace_name,
+                specialty_name
+            FROM {canonical_source(conn)}
+            {clause}
+        """
+        return pd.read_sql(query, conn, params=params)
+
+
+def export_workforce_excel(
+    selected_regions: Iterable[str] | None = None,
+    selected_workplaces: Iterable[str] | None = None,
+    selected_specialties: Iterable[str] | None = None,
+    output_filename: str = "Workforce_Analytics.xlsx",
+    include_drilldown: bool = True,
+    engine: str = DEFAULT_EXPORT_ENGINE,
+) -> Path:
+    """
+    Backward-compatible helper that reads from DB then exports to disk.
+    """
+    df_base = _load_filtered_rows(
+        selected_regions=selected_regions,
+        selected_workplaces=selected_workplaces,
+        selected_specialties=selected_specialties,
+    )
+    if df_base.empty:
+        raise ValueError("No data available for the selected filters.")
+
+    EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = EXPORTS_DIR / output_filename
+    export_official_excel(df_base, output_path, include_drilldown=include_drilldown, engine=engine)
+    return output_path
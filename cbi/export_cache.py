@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Optional, Tuple
+
+
+DEFAULT_EXPORT_CACHE_BYTES = 64 * 1024 * 1024
+
+ExportKey = Tuple[Hashable, ...]
+
+
+def normalize_selection(values: Optional[Iterable[object]]) -> Tuple[str, ...]:
+    """
+    Order- and duplicate-insensitive form of a filter selection.
+    """
+    if not values:
+        return ()
+    return tuple(sorted({str(v).strip() for v in values if v is not None}))
+
+
+def make_export_key(
+    regions: Optional[Iterable[object]],
+    workplaces: Optional[Iterable[object]],
+    specialties: Optional[Iterable[object]],
+    data_version: Hashable,
+    **options: Hashable,
+) -> ExportKey:
+    return (
+        normalize_selection(regions),
+        normalize_selection(workplaces),
+        normalize_selection(specialties),
+        data_version,
+        tuple(sorted(options.items())),
+    )
+
+
+class ExportCache:
+    """
+    Generated workbook bytes keyed by filter selection and data version.
+
+    Least recently used entries are evicted once the stored bytes exceed
+    max_bytes; a single workbook larger than the budget is never stored.
+    Safe to share between Streamlit sessions.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_EXPORT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[ExportKey, bytes]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: ExportKey) -> bool:
+        return key in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: ExportKey) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: ExportKey, data: bytes) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            if len(data) > self.max_bytes:
+                return
+
+            self._entries[key] = data
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def get_or_build(self, key: ExportKey, build: Callable[[], bytes]) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = build()
+            self.put(key, data)
+        return data
+
+    def discard_versions_except(self, data_version: Hashable) -> None:
+        """
+        Drop entries built from any other data version.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[3] != data_version]:
+                self._total_bytes -= len(self._entries.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
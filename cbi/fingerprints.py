@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pandas as pd
+
+
+FINGERPRINT_TABLE = "person_fingerprints"
+# Hashes of master CSV rows that were staged rather than written, keyed by
+# staging row. They only reach person_fingerprints once the row is APPLIED.
+STAGED_FINGERPRINT_TABLE = "staged_fingerprints"
+
+
+def create_fingerprint_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+            person_id     TEXT PRIMARY KEY NOT NULL,
+            row_hash      TEXT NOT NULL,
+            refreshed_at  TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {STAGED_FINGERPRINT_TABLE} (
+            staging_id  INTEGER PRIMARY KEY NOT NULL,
+            row_hash    TEXT NOT NULL
+        )
+        """
+    )
+
+
+def staged_fingerprints_exist(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (STAGED_FINGERPRINT_TABLE,),
+    ).fetchone()
+    return row is not None
+
+
+def pending_staged_hashes(conn: sqlite3.Connection) -> pd.DataFrame:
+    """
+    (person_id, row_hash) of staged refresh rows that may still be applied.
+    """
+    return pd.read_sql(
+        f"""
+        SELECT DISTINCT s.person_id, f.row_hash
+        FROM {STAGED_FINGERPRINT_TABLE} f
+        JOIN workforce_staging s ON s.staging_id = f.staging_id
+        WHERE s.status IN ('PENDING', 'APPROVED')
+        """,
+        conn,
+    )
+
+
+def settle_staged_fingerprints(conn: sqlite3.Connection, batch_id: int) -> int:
+    """
+    Promote the staged hashes of the batch's APPLIED rows to
+    person_fingerprints and drop the hashes of rows that can no longer be
+    applied. Rejected rows leave the stored hash alone, so the next refresh
+    picks the change up again. Runs in the caller's transaction; returns the
+    number of fingerprints promoted.
+    """
+    if not staged_fingerprints_exist(conn):
+        return 0
+    promoted = conn.execute(
+        f"""
+        INSERT OR REPLACE INTO {FINGERPRINT_TABLE} (person_id, row_hash, refreshed_at)
+        SELECT s.person_id, f.row_hash, CURRENT_TIMESTAMP
+        FROM {STAGED_FINGERPRINT_TABLE} f
+        JOIN workforce_staging s ON s.staging_id = f.staging_id
+        WHERE s.batch_id = ?
+          AND s.status = 'APPLIED'
+        ORDER BY s.staging_id
+        """,
+        (batch_id,),
+    ).rowcount
+    conn.execute(
+        f"""
+        DELETE FROM {STAGED_FINGERPRINT_TABLE}
+        WHERE staging_id NOT IN (
+            SELECT staging_id
+            FROM workforce_staging
+            WHERE status IN ('PENDING', 'APPROVED')
+        )
+        """
+    )
+    return promoted
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, List, Tuple
+
+from cbi.apply_engine import DIMENSIONS, normalize_text
+from cbi.staging_conflicts import ensure_reject_reason_column
+
+
+INTAKE_ERROR = "INTAKE_ERROR"
+INTAKE_WARNING = "INTAKE_WARNING"
+
+# Issue codes, in the order their notes are appended to a staging row.
+ISSUE_CODES = (
+    "missing_person_id",
+    "missing_name",
+    "name_case_conflict",
+    "new_person_exists",
+    "duplicate_new",
+    "update_person_missing",
+    "duplicate_row",
+    "unknown_name",
+    "alias_name",
+)
+
+
+def _dimension_issue_queries() -> List[Tuple[str, str, str]]:
+    queries = []
+    for key, (table_name, _id_col, name_col) in DIMENSIONS.items():
+        column = f"{key}_name"
+        queries.append(
+            (
+                "missing_name",
+                INTAKE_ERROR,
+                f"""
+                SELECT staging_id, 'Missing value for {name_col}' AS message
+                FROM intake_rows
+                WHERE {column} IS NULL
+                """,
+            )
+        )
+        # apply_batch matches names exactly; a case variant of an existing
+        # name is rejected by the NOCASE unique index when it is inserted.
+        queries.append(
+            (
+                "name_case_conflict",
+                INTAKE_ERROR,
+                f"""
+                SELECT r.staging_id,
+                       '{name_col} ''' || r.{column} || ''' differs only in case from existing '''
+                       || MIN(d.{name_col}) || '''' AS message
+                FROM intake_rows r
+                JOIN {table_name} d ON d.{name_col} = r.{column} COLLATE NOCASE
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {table_name} e WHERE e.{name_col} = r.{column}
+                )
+                GROUP BY r.staging_id
+                """,
+            )
+        )
+        queries.append(
+            (
+                "unknown_name",
+                INTAKE_WARNING,
+                f"""
+                SELECT staging_id, 'New {key} will be created: ' || {column} AS message
+                FROM intake_rows r
+                WHERE {column} IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {table_name} d WHERE d.{name_col} = r.{column} COLLATE NOCASE
+                  )
+                """,
+            )
+        )
+    return queries
+
+
+# Mirrors the checks _classify_rows_set_based makes at apply time, against the
+# persons table as it is now.
+_PERSON_ISSUE_QUERIES = [
+    (
+        "missing_person_id",
+        INTAKE_ERROR,
+        """
+        SELECT staging_id, action_type || ' record is missing person_id' AS message
+        FROM intake_rows
+        WHERE person_id IS NULL
+        """,
+    ),
+    (
+        "new_person_exists",
+        INTAKE_ERROR,
+        """
+        SELECT staging_id, 'person_id already exists for NEW action' AS message
+        FROM intake_rows
+        WHERE action_type = 'NEW'
+          AND person_exists = 1
+        """,
+    ),
+    (
+        "duplicate_new",
+        INTAKE_ERROR,
+        """
+        SELECT r.staging_id, 'Duplicate NEW for person_id in this batch (first is staging row '
+               || MIN(t.staging_id) || ')' AS message
+        FROM intake_rows r
+        JOIN intake_rows t
+          ON t.person_id = r.person_id
+         AND t.action_type = 'NEW'
+         AND t.staging_id < r.staging_id
+         AND t.has_names = 1
+        WHERE r.action_type = 'NEW'
+          AND r.person_exists = 0
+        GROUP BY r.staging_id
+        """,
+    ),
+    (
+        "update_person_missing",
+        INTAKE_ERROR,
+        """
+        SELECT staging_id, 'person_id not found for UPDATE action' AS message
+        FROM intake_rows r
+        WHERE action_type = 'UPDATE'
+          AND person_exists = 0
+          AND person_staged = 0
+          AND NOT EXISTS (
+              SELECT 1
+              FROM intake_rows t
+              WHERE t.person_id = r.person_id
+                AND t.action_type = 'NEW'
+                AND t.staging_id < r.staging_id
+                AND t.has_names = 1
+          )
+        """,
+    ),
+    (
+        "duplicate_row",
+        INTAKE_WARNING,
+        """
+        SELECT r.staging_id, 'Duplicate of staging row ' || MIN(t.staging_id) AS message
+        FROM intake_rows r
+        JOIN intake_rows t
+          ON t.person_id = r.person_id
+         AND t.action_type = r.action_type
+         AND t.specialty_name IS r.specialty_name
+         AND t.region_name IS r.region_name
+         AND t.workplace_name IS r.workplace_name
+         AND t.staging_id < r.staging_id
+        WHERE r.action_type = 'UPDATE'
+        GROUP BY r.staging_id
+        """,
+    ),
+]
+
+_ALIAS_ISSUE_QUERY = (
+    "alias_name",
+    INTAKE_WARNING,
+    """
+    SELECT r.staging_id,
+           'specialty ''' || r.specialty_name || ''' is an alias of ''' || a.canonical_name || '''' AS message
+    FROM intake_rows r
+    JOIN specialty_aliases a ON a.alias_name = r.specialty_name
+    """,
+)
+
+
+def _table_exists(cur: sqlite3.Cursor, table_name: str) -> bool:
+    row = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (table_name,),
+    ).fetchone()
+    return row is not None
+
+
+def _load_intake_rows(cur: sqlite3.Cursor, batch_id: int) -> int:
+    rows = cur.execute(
+        """
+        SELECT staging_id, person_id, action_type, specialty_name, region_name, workplace_name
+        FROM workforce_staging
+        WHERE batch_id = ?
+          AND status = 'PENDING'
+        """,
+        (batch_id,),
+    ).fetchall()
+
+    cur.execute("DROP TABLE IF EXISTS temp.intake_rows")
+    cur.execute(
+        """
+        CREATE TEMP TABLE intake_rows (
+            staging_id      INTEGER PRIMARY KEY,
+            person_id       TEXT,
+            action_type     TEXT,
+            specialty_name  TEXT,
+            region_name     TEXT,
+            workplace_name  TEXT,
+            person_exists   INTEGER NOT NULL DEFAULT 0,
+            -- A NEW in another active batch may create the person first.
+            person_staged   INTEGER NOT NULL DEFAULT 0,
+            -- Only a NEW row with all three names can create its person.
+            has_names       INTEGER GENERATED ALWAYS AS (
+                specialty_name IS NOT NULL AND region_name IS NOT NULL AND workplace_name IS NOT NULL
+            ) VIRTUAL
+        )
+        """
+    )
+    # Same normalization as apply_batch, so the checks see the values apply will.
+    cur.executemany(
+        """
+        INSERT INTO intake_rows
+        (staging_id, person_id, action_type, specialty_name, region_name, workplace_name)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                staging_id,
+                normalize_text(person_id),
+                (normalize_text(action_type) or "").upper(),
+                normalize_text(specialty_name),
+                normalize_text(region_name),
+                normalize_text(workplace_name),
+            )
+            for staging_id, person_id, action_type, specialty_name, region_name, workplace_name in rows
+        ),
+    )
+    cur.execute("CREATE INDEX temp.idx_intake_rows_person ON intake_rows (person_id, action_type, staging_id)")
+    cur.execute(
+        """
+        UPDATE intake_rows
+        SET person_exists = 1
+        WHERE person_id IN (SELECT person_id FROM persons)
+        """
+    )
+    cur.execute(
+        """
+        UPDATE intake_rows
+        SET person_staged = 1
+        WHERE person_id IN (
+            SELECT TRIM(person_id)
+            FROM workforce_staging
+            WHERE action_type = 'NEW'
+              AND status IN ('PENDING', 'APPROVED')
+              AND batch_id IS NOT ?
+        )
+        """,
+        (batch_id,),
+    )
+    return len(rows)
+
+
+def validate_staged_batch(
+    conn: sqlite3.Connection,
+    batch_id: int,
+    reject_errors: bool = True,
+) -> Dict[str, object]:
+    """
+    Check the PENDING rows of a freshly staged batch against persons, the
+    dimension tables and each other, with a fixed number of set queries.
+
+    Every finding is appended to the row's source_note as INTAKE_ERROR (apply
+    would reject the row against the current data) or INTAKE_WARNING. Rows
+    with errors are marked REJECTED, with reject_reason INTAKE_ERROR, unless
+    reject_errors is False. Runs in the caller's transaction.
+    """
+    cur = conn.cursor()
+    try:
+        checked_rows = _load_intake_rows(cur, batch_id)
+        cur.execute("DROP TABLE IF EXISTS temp.intake_issues")
+        cur.execute(
+            """
+            CREATE TEMP TABLE intake_issues (
+                staging_id  INTEGER NOT NULL,
+                code        TEXT NOT NULL,
+                severity    TEXT NOT NULL,
+                message     TEXT NOT NULL
+            )
+            """
+        )
+
+        queries = _PERSON_ISSUE_QUERIES + _dimension_issue_queries()
+        if _table_exists(cur, "specialty_aliases"):
+            queries.append(_ALIAS_ISSUE_QUERY)
+        queries.sort(key=lambda query: ISSUE_CODES.index(query[0]))
+        for code, severity, query in queries:
+            cur.execute(
+                f"""
+                INSERT INTO intake_issues (staging_id, code, severity, message)
+                SELECT staging_id, ?, ?, message
+                FROM ({query})
+                """,
+                (code, severity),
+            )
+
+        # One note per row, in issue order, keyed for the UPDATE's lookups.
+        cur.execute("DROP TABLE IF EXISTS temp.intake_notes")
+        cur.execute(
+            """
+            CREATE TEMP TABLE intake_notes AS
+            SELECT staging_id, GROUP_CONCAT(note, ' | ') AS text
+            FROM (
+                SELECT staging_id, severity || ': ' || message AS note
+                FROM intake_issues
+                ORDER BY staging_id, rowid
+            )
+            GROUP BY staging_id
+            """
+        )
+        cur.execute("CREATE UNIQUE INDEX temp.idx_intake_notes_staging ON intake_notes (staging_id)")
+        cur.execute(
+            """
+            UPDATE workforce_staging
+            SET source_note = (
+                SELECT CASE
+                    WHEN workforce_staging.source_note IS NULL
+                         OR TRIM(workforce_staging.source_note) = ''
+                    THEN n.text
+                    ELSE workforce_staging.source_note || ' | ' || n.text
+                END
+                FROM intake_notes n
+                WHERE n.staging_id = workforce_staging.staging_id
+            )
+            WHERE staging_id IN (SELECT staging_id FROM intake_notes)
+            """
+        )
+        if reject_errors:
+            ensure_reject_reason_column(conn)
+            cur.execute(
+                """
+                UPDATE workforce_staging
+                SET status = 'REJECTED',
+                    reject_reason = ?
+                WHERE staging_id IN (
+                    SELECT staging_id FROM intake_issues WHERE severity = ?
+                )
+                """,
+                (INTAKE_ERROR, INTAKE_ERROR),
+            )
+
+        issue_counts = dict(
+            cur.execute(
+                "SELECT code, COUNT(*) FROM intake_issues GROUP BY code ORDER BY code"
+            ).fetchall()
+        )
+        error_rows, warning_rows = cur.execute(
+            """
+            SELECT
+                COUNT(DISTINCT CASE WHEN severity = ? THEN staging_id END),
+                COUNT(DISTINCT CASE WHEN severity = ? THEN staging_id END)
+            FROM intake_issues
+            """,
+            (INTAKE_ERROR, INTAKE_WARNING),
+        ).fetchone()
+        return {
+            "batch_id": batch_id,
+            "checked_rows": checked_rows,
+            "error_rows": error_rows,
+            "warning_rows": warning_rows,
+            "rejected_rows": error_rows if reject_errors else 0,
+            "issue_counts": issue_counts,
+        }
+    finally:
+        cur.execute("DROP TABLE IF EXISTS temp.intake_notes")
+        cur.execute("DROP TABLE IF EXISTS temp.intake_issues")
+        cur.execute("DROP TABLE IF EXISTS temp.intake_rows")
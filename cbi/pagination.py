@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Hashable, Optional, Sequence
+
+import pandas as pd
+
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def fetch_keyset_page(
+    conn: sqlite3.Connection,
+    source: str,
+    columns: Sequence[str],
+    key: str,
+    where: str = "WHERE 1 = 1",
+    params: Sequence[object] = (),
+    after: Optional[Hashable] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> pd.DataFrame:
+    """
+    One page of `source` ordered by `key`, starting after the key value `after`.
+
+    `where` must start with WHERE (see canonical_filter_clause). Rows whose
+    key is NULL sort first and only appear on the first page.
+    """
+    query = f"SELECT {', '.join(columns)} FROM {source} {where}"
+    query_params = list(params)
+    if after is not None:
+        query += f" AND {key} {'<' if descending else '>'} ?"
+        query_params.append(after)
+    query += f" ORDER BY {key} {'DESC' if descending else 'ASC'} LIMIT ?"
+    query_params.append(limit)
+    return pd.read_sql(query, conn, params=query_params)
+
+
+def count_rows(
+    conn: sqlite3.Connection,
+    source: str,
+    where: str = "WHERE 1 = 1",
+    params: Sequence[object] = (),
+) -> int:
+    return int(conn.execute(f"SELECT COUNT(*) FROM {source} {where}", list(params)).fetchone()[0])
+
+
+def keyset_slice(
+    df: pd.DataFrame,
+    key: str,
+    after: Optional[Hashable] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+) -> pd.DataFrame:
+    """
+    In-memory counterpart of fetch_keyset_page for frames already held by the
+    server; missing keys compare as "".
+    """
+    keys = df[key].fillna("") if df[key].dtype == object else df[key]
+    if after is not None:
+        df = df[keys < after] if descending else df[keys > after]
+        keys = keys[df.index]
+    order = keys.sort_values(ascending=not descending, kind="stable").index
+    return df.loc[order[:limit]]
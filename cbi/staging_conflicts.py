@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, Sequence
+
+import pandas as pd
+
+
+SUPERSEDED = "SUPERSEDED"
+COLLAPSED = "COLLAPSED"
+
+# Staging rows that may still be applied, and so can collide with each other.
+ACTIVE_STATUSES = ("PENDING", "APPROVED")
+
+CONFLICT_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_staging_person_status
+ON workforce_staging(person_id, status)
+"""
+
+
+def ensure_conflict_index(conn: sqlite3.Connection) -> None:
+    """
+    Create the (person_id, status) index the conflict lookups use, for
+    databases bootstrapped before it was added to 07_create_staging.py.
+    """
+    conn.execute(CONFLICT_INDEX_SQL)
+
+
+def ensure_reject_reason_column(conn: sqlite3.Connection) -> None:
+    """
+    Add the reject_reason column to staging tables bootstrapped before it
+    existed, filling it in from the notes of rows already rejected by the
+    intake checks or a collapse.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(workforce_staging)")}
+    if "reject_reason" in columns:
+        return
+    conn.execute("ALTER TABLE workforce_staging ADD COLUMN reject_reason TEXT")
+    # Local import: intake_validation imports this module.
+    from cbi.intake_validation import INTAKE_ERROR
+
+    for reason in (INTAKE_ERROR, SUPERSEDED):
+        conn.execute(
+            """
+            UPDATE workforce_staging
+            SET reject_reason = ?
+            WHERE status = 'REJECTED'
+              AND reject_reason IS NULL
+              AND source_note LIKE ?
+            """,
+            (reason, f"%{reason}:%"),
+        )
+
+
+def _placeholders(values: Sequence[object]) -> str:
+    return ", ".join("?" for _ in values)
+
+
+def find_batch_conflicts(conn: sqlite3.Connection, batch_id: int) -> pd.DataFrame:
+    """
+    Active rows of a batch that share their person_id with another active row.
+
+    One query: every active row of the batch is joined, through the
+    (person_id, status) index, to the other active rows for the same person.
+    `batch_conflicts` counts the other rows in this batch, whose outcome
+    depends on staging_id order; `cross_batch_conflicts` counts rows in other
+    batches (or not yet in a batch), listed in `other_batches`.
+    """
+    statuses = _placeholders(ACTIVE_STATUSES)
+    return pd.read_sql(
+        f"""
+        SELECT
+            s.staging_id,
+            s.person_id,
+            s.action_type,
+            s.status,
+            SUM(o.batch_id IS s.batch_id) AS batch_conflicts,
+            SUM(o.batch_id IS NOT s.batch_id) AS cross_batch_conflicts,
+            GROUP_CONCAT(DISTINCT CASE WHEN o.batch_id IS NOT s.batch_id THEN o.batch_id END) AS other_batches
+        FROM workforce_staging s
+        JOIN workforce_staging o
+          ON o.person_id = s.person_id
+         AND o.status IN ({statuses})
+         AND o.staging_id <> s.staging_id
+        WHERE s.batch_id = ?
+          AND s.status IN ({statuses})
+        GROUP BY s.staging_id
+        ORDER BY s.staging_id
+        """,
+        conn,
+        params=[*ACTIVE_STATUSES, batch_id, *ACTIVE_STATUSES],
+    )
+
+
+def collapse_batch(
+    conn: sqlite3.Connection,
+    batch_id: int,
+    statuses: Sequence[str] = ACTIVE_STATUSES,
+) -> Dict[str, int]:
+    """
+    Last-write-wins: reduce a batch to one row per person_id among the rows in
+    `statuses`.
+
+    The row with the highest staging_id is kept; the earlier ones are marked
+    REJECTED with reject_reason SUPERSEDED and a note naming it. A kept UPDATE for a person that
+    only an earlier NEW in the batch would have created becomes that NEW.
+    Runs in the caller's transaction.
+    """
+    ensure_conflict_index(conn)
+    ensure_reject_reason_column(conn)
+    cur = conn.cursor()
+    try:
+        cur.execute("DROP TABLE IF EXISTS temp.collapse_rows")
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE collapse_rows AS
+            SELECT
+                staging_id,
+                person_id,
+                action_type,
+                survivor_id,
+                group_rows,
+                has_new,
+                CASE WHEN staging_id = survivor_id
+                     THEN ? || ': last of ' || group_rows || ' rows for this person_id'
+                     ELSE ? || ': by staging row ' || survivor_id
+                END AS note
+            FROM (
+                SELECT
+                    staging_id,
+                    person_id,
+                    action_type,
+                    MAX(staging_id) OVER w AS survivor_id,
+                    COUNT(*) OVER w AS group_rows,
+                    MAX(action_type = 'NEW') OVER w AS has_new
+                FROM workforce_staging
+                WHERE batch_id = ?
+                  AND status IN ({_placeholders(statuses)})
+                  AND person_id IS NOT NULL
+                WINDOW w AS (PARTITION BY person_id)
+            )
+            WHERE group_rows > 1
+            """,
+            (COLLAPSED, SUPERSEDED, batch_id, *statuses),
+        )
+        cur.execute("CREATE UNIQUE INDEX temp.idx_collapse_rows_staging ON collapse_rows (staging_id)")
+
+        converted_rows = cur.execute(
+            """
+            UPDATE workforce_staging
+            SET action_type = 'NEW'
+            WHERE staging_id IN (
+                SELECT staging_id
+                FROM collapse_rows
+                WHERE staging_id = survivor_id
+                  AND action_type = 'UPDATE'
+                  AND has_new = 1
+                  AND person_id NOT IN (SELECT person_id FROM persons)
+            )
+            """
+        ).rowcount
+        cur.execute(
+            """
+            UPDATE workforce_staging
+            SET source_note = (
+                SELECT CASE
+                    WHEN workforce_staging.source_note IS NULL
+                         OR TRIM(workforce_staging.source_note) = ''
+                    THEN c.note
+                    ELSE workforce_staging.source_note || ' | ' || c.note
+                END
+                FROM collapse_rows c
+                WHERE c.staging_id = workforce_staging.staging_id
+            ),
+            status = CASE
+                WHEN staging_id IN (SELECT survivor_id FROM collapse_rows) THEN status
+                ELSE 'REJECTED'
+            END,
+            reject_reason = CASE
+                WHEN staging_id IN (SELECT survivor_id FROM collapse_rows) THEN reject_reason
+                ELSE ?
+            END
+            WHERE staging_id IN (SELECT staging_id FROM collapse_rows)
+            """,
+            (SUPERSEDED,),
+        )
+
+        persons, superseded_rows = cur.execute(
+            "SELECT COUNT(DISTINCT person_id), COUNT(*) - COUNT(DISTINCT person_id) FROM collapse_rows"
+        ).fetchone()
+        return {
+            "batch_id": batch_id,
+            "collapsed_persons": persons,
+            "superseded_rows": superseded_rows,
+            "converted_rows": converted_rows,
+        }
+    finally:
+        cur.execute("DROP TABLE IF EXISTS temp.collapse_rows")
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import sqlite3
+from itertools import islice
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+
+REQUIRED_COLUMNS = [
+    "action_type",
+    "specialty_name",
+    "region_name",
+    "workplace_name",
+]
+ACTION_TYPES = ("NEW", "UPDATE")
+NAME_COLUMNS = ("specialty_name", "region_name", "workplace_name")
+
+STAGING_INSERT_COLUMNS = (
+    "person_id",
+    "action_type",
+    "specialty_name",
+    "region_name",
+    "workplace_name",
+    "source_note",
+    "batch_id",
+)
+DEFAULT_INSERT_CHUNK_SIZE = 5000
+# Rows per frame when streaming an upload; bounds the memory held by pandas.
+DEFAULT_READ_CHUNK_ROWS = 20000
+
+# Called with (rows staged so far, rows seen so far) after every chunk.
+ProgressCallback = Callable[[int, int], None]
+
+# person_id spellings that count as missing for UPDATE rows.
+_MISSING_PERSON_IDS = ("", "nan", "none")
+
+
+def _optional_text(series: pd.Series) -> pd.Series:
+    text = series.astype(str).str.strip()
+    return text.astype(object).where(series.notna() & (text != ""), None)
+
+
+def validate_intake_frame(df: pd.DataFrame) -> Optional[str]:
+    """
+    First problem that stops an uploaded frame from being staged, or None.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        return f"Missing required columns: {missing}"
+
+    actions = df["action_type"].astype(str).str.strip().str.upper()
+    if not actions.isin(ACTION_TYPES).all():
+        return "Invalid action_type values found (allowed: NEW, UPDATE)."
+
+    blank = [c for c in NAME_COLUMNS if (df[c].fillna("").astype(str).str.strip() == "").any()]
+    if blank:
+        return f"Blank values in required columns: {blank}"
+
+    update_mask = actions == "UPDATE"
+    if "person_id" not in df.columns:
+        if update_mask.any():
+            return "Column person_id is required for UPDATE records."
+    elif (
+        df.loc[update_mask, "person_id"].astype(str).str.strip().str.lower().isin(_MISSING_PERSON_IDS).any()
+    ):
+        return "UPDATE records must include person_id."
+    return None
+
+
+def normalize_intake_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Staging columns of a validated upload, normalized column-wise.
+
+    Names are stripped strings, action_type is upper case, and blank
+    person_id and source_note values become None. All values are plain
+    Python objects that sqlite3 can bind.
+    """
+    out = pd.DataFrame(index=df.index)
+    if "person_id" in df.columns:
+        out["person_id"] = _optional_text(df["person_id"])
+    else:
+        out["person_id"] = None
+    out["action_type"] = df["action_type"].astype(str).str.strip().str.upper()
+    for column in NAME_COLUMNS:
+        out[column] = df[column].astype(str).str.strip()
+    if "source_note" in df.columns:
+        notes = df["source_note"].astype(object)
+        blank = notes.astype(str).str.strip() == ""
+        out["source_note"] = notes.where(notes.notna() & ~blank, None)
+    else:
+        out["source_note"] = None
+    return out
+
+
+def iter_staging_rows(frame: pd.DataFrame, batch_id: int) -> Iterator[Tuple[object, ...]]:
+    columns = list(STAGING_INSERT_COLUMNS[:-1])
+    for row in frame[columns].itertuples(index=False, name=None):
+        yield (*row, batch_id)
+
+
+def create_batch(cur: sqlite3.Cursor, batch_name: str, source_type: str = "FILE_UPLOAD") -> int:
+    cur.execute(
+        """
+        INSERT INTO cbi_batches (batch_name, source_type, status)
+        VALUES (?, ?, 'PENDING')
+        """,
+        (batch_name, source_type),
+    )
+    return int(cur.lastrowid)
+
+
+def insert_staging_rows(
+    cur: sqlite3.Cursor,
+    df: pd.DataFrame,
+    batch_id: int,
+    chunk_size: int = DEFAULT_INSERT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """
+    Normalize a validated frame once and write it with executemany in chunks
+    of chunk_size. Returns the number of rows staged.
+    """
+    frame = normalize_intake_frame(df)
+    total = len(frame)
+    rows = iter_staging_rows(frame, batch_id)
+    placeholders = ", ".join("?" for _ in STAGING_INSERT_COLUMNS)
+    query = (
+        f"INSERT INTO workforce_staging ({', '.join(STAGING_INSERT_COLUMNS)}) "
+        f"VALUES ({placeholders})"
+    )
+
+    staged = 0
+    while staged < total:
+        chunk = list(islice(rows, chunk_size))
+        cur.executemany(query, chunk)
+        staged += len(chunk)
+        if progress is not None:
+            progress(staged, total)
+    return staged
+
+
+def stage_frame(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    batch_name: str,
+    source_type: str = "FILE_UPLOAD",
+    chunk_size: int = DEFAULT_INSERT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[int, int]:
+    """
+    Insert a validated upload into workforce_staging as one PENDING batch.
+
+    Everything runs in the caller's transaction, so the caller commits or
+    rolls back. Returns (batch_id, staged rows).
+    """
+    cur = conn.cursor()
+    batch_id = create_batch(cur, batch_name, source_type)
+    return batch_id, insert_staging_rows(cur, df, batch_id, chunk_size, progress)
+
+
+def _iter_csv_chunks(upload: IO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    # Cells stay text, and blanks stay "", so a chunk with a blank person_id
+    # does not turn its numeric ids into floats ("456.0").
+    yield from pd.read_csv(upload, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+
+
+def _iter_xlsx_chunks(upload: IO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    # Imported here so pages that never see an XLSX upload skip openpyxl.
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(upload, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)]
+        # Fully empty rows are dropped, as pandas does for trailing ones.
+        # Cells become text with empty ones as "", like the CSV reader.
+        values = (
+            tuple("" if value is None else str(value) for value in row)
+            for row in rows
+            if any(value is not None for value in row)
+        )
+        while True:
+            chunk = list(islice(values, chunk_rows))
+            if not chunk:
+                return
+            yield pd.DataFrame.from_records(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_upload_chunks(upload: IO, file_name: str, chunk_rows: int = DEFAULT_READ_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Frames of at most chunk_rows rows from an uploaded CSV or XLSX file.
+
+    CSV is read with pandas' chunked reader, XLSX row by row with openpyxl in
+    read-only mode, so only one chunk is held as a frame at a time. Reading
+    starts from the beginning of `upload`.
+    """
+    if hasattr(upload, "seek"):
+        upload.seek(0)
+    if file_name.lower().endswith(".csv"):
+        return _iter_csv_chunks(upload, chunk_rows)
+    return _iter_xlsx_chunks(upload, chunk_rows)
+
+
+def preview_upload(upload: IO, file_name: str, rows: int = 20) -> pd.DataFrame:
+    """
+    First rows of an upload, read without loading the rest of the file.
+    """
+    chunks = iter_upload_chunks(upload, file_name, rows)
+    try:
+        return next(chunks, pd.DataFrame())
+    finally:
+        chunks.close()
+
+
+def stage_chunks(
+    conn: sqlite3.Connection,
+    chunks: Iterable[pd.DataFrame],
+    batch_name: str,
+    source_type: str = "FILE_UPLOAD",
+    chunk_size: int = DEFAULT_INSERT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, object]:
+    """
+    Validate and stage a stream of upload frames into one PENDING batch.
+
+    A frame that fails validate_intake_frame is skipped and reported with its
+    file row range (the header is row 1); the others are staged. Everything
+    runs in the caller's transaction, so a caller that wants all-or-nothing
+    rolls back when `errors` is not empty.
+    """
+    cur = conn.cursor()
+    batch_id = create_batch(cur, batch_name, source_type)
+    staged_rows = 0
+    rows_read = 0
+    errors: List[Dict[str, object]] = []
+
+    for number, chunk in enumerate(chunks, start=1):
+        first_row = rows_read + 2
+        rows_read += len(chunk)
+        error = validate_intake_frame(chunk)
+        if error:
+            errors.append(
+                {"chunk": number, "first_row": first_row, "last_row": rows_read + 1, "error": error}
+            )
+        else:
+            staged_rows += insert_staging_rows(cur, chunk, batch_id, chunk_size)
+        if progress is not None:
+            progress(staged_rows, rows_read)
+
+    return {
+        "batch_id": batch_id,
+        "total_rows": rows_read,
+        "staged_rows": staged_rows,
+        "skipped_rows": rows_read - staged_rows,
+        "errors": errors,
+    }
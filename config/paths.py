@@ -16,6 +16,7 @@ DB_DIR = _resolve_path("WDS_DB_DIR", PROJECT_ROOT / "db")
 LOGS_DIR = _resolve_path("WDS_LOGS_DIR", PROJECT_ROOT / "artifacts" / "logs")
 EXPORTS_DIR = _resolve_path("WDS_EXPORTS_DIR", PROJECT_ROOT / "artifacts" / "exports")
 EXPORT_DIR = EXPORTS_DIR
+CACHE_DIR = _resolve_path("WDS_CACHE_DIR", PROJECT_ROOT / "artifacts" / "cache")
 
 CSV_PATH = _resolve_path("WDS_CSV_PATH", DATA_DIR / "workforce master.csv")
 DB_PATH = _resolve_path("WDS_DB_PATH", DB_DIR / "workforce.db")
@@ -24,3 +25,4 @@ DB_PATH = _resolve_path("WDS_DB_PATH", DB_DIR / "workforce.db")
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
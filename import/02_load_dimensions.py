@@ -1,5 +1,7 @@
 import sqlite3
+import sys
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 
@@ -7,6 +9,11 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "db" / "workforce.db"
 CSV_PATH = BASE_DIR / "data" / "workforce master.csv"
 
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from cbi.data_version import bump_data_version  # noqa: E402
+
 
 def cleaned_values(df: pd.DataFrame, column_name: str):
     values = (
@@ -20,13 +27,13 @@ def cleaned_values(df: pd.DataFrame, column_name: str):
     return values.tolist()
 
 
-df = pd.read_csv(CSV_PATH, low_memory=False)
-
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-
-
-def load_dimension(table_name: str, source_col: str, target_col: str):
+def load_dimension(
+    cur: sqlite3.Cursor,
+    df: pd.DataFrame,
+    table_name: str,
+    source_col: str,
+    target_col: str,
+):
     values = cleaned_values(df, source_col)
     cur.executemany(
         f"INSERT OR IGNORE INTO {table_name} ({target_col}) VALUES (?)",
@@ -35,11 +42,23 @@ def load_dimension(table_name: str, source_col: str, target_col: str):
     print(f"[OK] {table_name}: {len(values)} candidate rows")
 
 
-load_dimension("specialties", "final specialty", "specialty_name")
-load_dimension("regions", "region", "region_name")
-load_dimension("workplaces", "workplace", "workplace_name")
+def load_dimensions(conn: sqlite3.Connection, df: Optional[pd.DataFrame] = None) -> None:
+    if df is None:
+        df = pd.read_csv(CSV_PATH, low_memory=False)
+
+    cur = conn.cursor()
+    load_dimension(cur, df, "specialties", "final specialty", "specialty_name")
+    load_dimension(cur, df, "regions", "region", "region_name")
+    load_dimension(cur, df, "workplaces", "workplace", "workplace_name")
+
+    # Bump the write counter so running apps refresh their cached frames.
+    bump_data_version(conn)
+
+    print("[DONE] Dimensions loaded")
 
-conn.commit()
-conn.close()
 
-print("[DONE] Dimensions loaded")
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    load_dimensions(conn)
+    conn.commit()
+    conn.close()
@@ -1,6 +1,8 @@
 import sqlite3
+import sys
 import pandas as pd
 from pathlib import Path
+from typing import Optional
 
 # --- Paths ---
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -11,101 +13,135 @@ LOGS_DIR.mkdir(exist_ok=True)
 
 WARNINGS_PATH = LOGS_DIR / "import_warnings.csv"
 
-# --- Load CSV ---
-df = pd.read_csv(CSV_PATH, low_memory=False)
-
-# --- Connect DB ---
-conn = sqlite3.connect(DB_PATH)
-conn.execute("PRAGMA foreign_keys = ON;")
-cur = conn.cursor()
-
-# --- Build lookup maps ---
-def build_map(table, id_col, name_col):
-    rows = cur.execute(f"SELECT {id_col}, {name_col} FROM {table}").fetchall()
-    mapping = {}
-    for _id, name in rows:
-        if name is None:
-            continue
-        normalized = str(name).strip()
-        if normalized:
-            mapping[normalized] = _id
-    return mapping
-
-specialty_map = build_map("specialties", "specialty_id", "specialty_name")
-region_map    = build_map("regions", "region_id", "region_name")
-workplace_map = build_map("workplaces", "workplace_id", "workplace_name")
-
-# --- Prepare warnings ---
-warnings = []
-
-# --- Insert persons ---
-inserted = 0
-skipped_duplicates = 0
-
-for idx, row in df.iterrows():
-    person_id = str(row.get("civil id")).strip()
-
-    if not person_id or person_id.lower() == "nan":
-        warnings.append({
-            "row_index": idx,
-            "issue": "missing_civil_id"
-        })
-        continue
-
-    # Check duplicate
-    exists = cur.execute(
-        "SELECT 1 FROM persons WHERE person_id = ?",
-        (person_id,)
-    ).fetchone()
-
-    if exists:
-        skipped_duplicates += 1
-        warnings.append({
-            "row_index": idx,
-            "person_id": person_id,
-            "issue": "duplicate_civil_id"
-        })
-        continue
-
-    specialty_id = specialty_map.get(str(row.get("final specialty")).strip())
-    region_id    = region_map.get(str(row.get("region")).strip())
-    workplace_id = workplace_map.get(str(row.get("workplace")).strip())
-
-    # Log missing dimensions
-    if specialty_id is None:
-        warnings.append({
-            "row_index": idx,
-            "person_id": person_id,
-            "issue": "missing_specialty"
-        })
-    if region_id is None:
-        warnings.append({
-            "row_index": idx,
-            "person_id": person_id,
-            "issue": "missing_region"
-        })
-    if workplace_id is None:
-        warnings.append({
-            "row_index": idx,
-            "person_id": person_id,
-            "issue": "missing_workplace"
-        })
-
-    cur.execute("""
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from cbi.canonical_data import canonical_table_exists, refresh_canonical_base  # noqa: E402
+from cbi.count_cube import count_cube_exists, rebuild_count_cube  # noqa: E402
+from cbi.data_version import bump_data_version  # noqa: E402
+
+ISSUE_ORDER = [
+    "missing_civil_id",
+    "duplicate_civil_id",
+    "missing_specialty",
+    "missing_region",
+    "missing_workplace",
+]
+
+
+def build_map(cur, table, id_col, name_col):
+    rows = cur.execute(f"SELECT {id_col}, {name_col} FROM {table}").fetchall()
+    mapping = {}
+    for _id, name in rows:
+        if name is None:
+            continue
+        normalized = str(name).strip()
+        if normalized:
+            mapping[normalized] = _id
+    return mapping
+
+
+def map_dimension(df, column, mapping):
+    ids = df[column].astype(str).str.strip().map(mapping).astype("Int64")
+    return ids.astype(object).where(ids.notna(), None)
+
+
+def load_persons(conn: sqlite3.Connection, df: Optional[pd.DataFrame] = None) -> None:
+    if df is None:
+        df = pd.read_csv(CSV_PATH, low_memory=False)
+
+    conn.execute("PRAGMA foreign_keys = ON;")
+    cur = conn.cursor()
+
+    # --- Build lookup maps ---
+    specialty_map = build_map(cur, "specialties", "specialty_id", "specialty_name")
+    region_map    = build_map(cur, "regions", "region_id", "region_name")
+    workplace_map = build_map(cur, "workplaces", "workplace_id", "workplace_name")
+
+    # --- Classify rows ---
+    person_ids = df["civil id"].astype(str).str.strip()
+    missing_mask = (person_ids == "") | (person_ids.str.lower() == "nan")
+
+    existing_ids = {row[0] for row in cur.execute("SELECT person_id FROM persons")}
+    # First occurrence wins, as with row-by-row inserts; later ones are duplicates.
+    duplicate_mask = ~missing_mask & (person_ids.isin(existing_ids) | person_ids.duplicated())
+    insert_mask = ~missing_mask & ~duplicate_mask
+
+    specialty_ids = map_dimension(df, "final specialty", specialty_map)
+    region_ids    = map_dimension(df, "region", region_map)
+    workplace_ids = map_dimension(df, "workplace", workplace_map)
+
+    # --- Prepare warnings ---
+    issue_masks = {
+        "missing_civil_id": missing_mask,
+        "duplicate_civil_id": duplicate_mask,
+        "missing_specialty": insert_mask & specialty_ids.isna(),
+        "missing_region": insert_mask & region_ids.isna(),
+        "missing_workplace": insert_mask & workplace_ids.isna(),
+    }
+    warning_frames = []
+    for rank, issue in enumerate(ISSUE_ORDER):
+        mask = issue_masks[issue]
+        if not mask.any():
+            continue
+        warning_frames.append(
+            pd.DataFrame({
+                "row_index": df.index[mask],
+                "person_id": None if issue == "missing_civil_id" else person_ids[mask].values,
+                "issue": issue,
+                "_position": mask.values.nonzero()[0],
+                "_rank": rank,
+            })
+        )
+
+    warnings = pd.DataFrame()
+    if warning_frames:
+        warnings = (
+            pd.concat(warning_frames, ignore_index=True)
+            .sort_values(["_position", "_rank"], kind="stable")
+            .drop(columns=["_position", "_rank"])
+        )
+        if warnings["issue"].iloc[0] == "missing_civil_id":
+            warnings = warnings[["row_index", "issue", "person_id"]]
+
+    # --- Insert persons ---
+    cur.executemany(
+        """
         INSERT INTO persons (person_id, specialty_id, region_id, workplace_id)
         VALUES (?, ?, ?, ?)
-    """, (person_id, specialty_id, region_id, workplace_id))
-
-    inserted += 1
-
-conn.commit()
-conn.close()
-
-# --- Write warnings ---
-if warnings:
-    pd.DataFrame(warnings).to_csv(WARNINGS_PATH, index=False)
-
-print("[DONE] Persons loaded")
-print(f"[INFO] Inserted persons: {inserted}")
-print(f"[INFO] Skipped duplicates: {skipped_duplicates}")
-print(f"[INFO] Warnings file: {WARNINGS_PATH if warnings else 'none'}")
+        """,
+        zip(
+            person_ids[insert_mask].tolist(),
+            specialty_ids[insert_mask].tolist(),
+            region_ids[insert_mask].tolist(),
+            workplace_ids[insert_mask].tolist(),
+        ),
+    )
+
+    inserted = int(insert_mask.sum())
+    skipped_duplicates = int(duplicate_mask.sum())
+
+    # --- Rebuild the derived tables, if they have been built ---
+    if count_cube_exists(conn):
+        rebuild_count_cube(conn)
+    if canonical_table_exists(conn):
+        refresh_canonical_base(conn)
+
+    # --- Bump data version so running apps refresh their caches ---
+    bump_data_version(conn)
+
+    # --- Write warnings ---
+    if not warnings.empty:
+        warnings.to_csv(WARNINGS_PATH, index=False)
+
+    print("[DONE] Persons loaded")
+    print(f"[INFO] Inserted persons: {inserted}")
+    print(f"[INFO] Skipped duplicates: {skipped_duplicates}")
+    print(f"[INFO] Warnings file: {WARNINGS_PATH if not warnings.empty else 'none'}")
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    load_persons(conn)
+    conn.commit()
+    conn.close()
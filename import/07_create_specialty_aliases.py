@@ -4,19 +4,24 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "db" / "workforce.db"
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
 
-cur.executescript("""
-DROP TABLE IF EXISTS specialty_aliases;
+def create_specialty_aliases(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
 
-CREATE TABLE specialty_aliases (
-    alias_name      TEXT PRIMARY KEY,
-    canonical_name  TEXT NOT NULL
-);
-""")
+    cur.executescript("""
+    DROP TABLE IF EXISTS specialty_aliases;
 
-conn.commit()
-conn.close()
+    CREATE TABLE specialty_aliases (
+        alias_name      TEXT PRIMARY KEY,
+        canonical_name  TEXT NOT NULL
+    );
+    """)
 
-print("[OK] specialty_aliases table created")
+    print("[OK] specialty_aliases table created")
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    create_specialty_aliases(conn)
+    conn.commit()
+    conn.close()
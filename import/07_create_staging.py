@@ -36,6 +36,7 @@ CREATE TABLE IF NOT EXISTS workforce_staging (
     ),
     created_at      TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
     batch_id        INTEGER,
+    reject_reason   TEXT,
     FOREIGN KEY (batch_id) REFERENCES cbi_batches(batch_id)
 );
 
@@ -112,36 +113,48 @@ END;
 """
 
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-cur.executescript(SQL)
+def create_staging(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
 
-# Upgrade path: ensure legacy staging tables include batch_id.
-if not table_has_column(conn, "workforce_staging", "batch_id"):
-    cur.execute("ALTER TABLE workforce_staging ADD COLUMN batch_id INTEGER")
+    cur.executescript(SQL)
 
-cur.executescript(
-    """
-    CREATE INDEX IF NOT EXISTS idx_staging_status
-    ON workforce_staging(status);
+    # Upgrade path: ensure legacy staging tables include batch_id.
+    if not table_has_column(conn, "workforce_staging", "batch_id"):
+        cur.execute("ALTER TABLE workforce_staging ADD COLUMN batch_id INTEGER")
 
-    CREATE INDEX IF NOT EXISTS idx_staging_batch_id
-    ON workforce_staging(batch_id);
+    # Upgrade path: ensure legacy staging tables include reject_reason.
+    if not table_has_column(conn, "workforce_staging", "reject_reason"):
+        cur.execute("ALTER TABLE workforce_staging ADD COLUMN reject_reason TEXT")
 
-    CREATE INDEX IF NOT EXISTS idx_staging_batch_status
-    ON workforce_staging(batch_id, status);
+    cur.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_staging_status
+        ON workforce_staging(status);
 
-    CREATE INDEX IF NOT EXISTS idx_batches_status
-    ON cbi_batches(status);
+        CREATE INDEX IF NOT EXISTS idx_staging_batch_id
+        ON workforce_staging(batch_id);
 
-    CREATE INDEX IF NOT EXISTS idx_audit_batch
-    ON workforce_audit_timeline(batch_id);
-    """
-)
+        CREATE INDEX IF NOT EXISTS idx_staging_batch_status
+        ON workforce_staging(batch_id, status);
 
-cur.executescript(TRIGGERS)
+        CREATE INDEX IF NOT EXISTS idx_staging_person_status
+        ON workforce_staging(person_id, status);
 
-conn.commit()
-conn.close()
+        CREATE INDEX IF NOT EXISTS idx_batches_status
+        ON cbi_batches(status);
 
-print("[OK] Staging, batches, and audit tables are ready with constraints")
+        CREATE INDEX IF NOT EXISTS idx_audit_batch
+        ON workforce_audit_timeline(batch_id);
+        """
+    )
+
+    cur.executescript(TRIGGERS)
+
+    print("[OK] Staging, batches, and audit tables are ready with constraints")
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    create_staging(conn)
+    conn.commit()
+    conn.close()
@@ -1,9 +1,16 @@
 import sqlite3
+import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DB_PATH = BASE_DIR / "db" / "workforce.db"
 
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from cbi.canonical_data import canonical_table_exists, refresh_canonical_base  # noqa: E402
+from cbi.data_version import bump_data_version  # noqa: E402
+
 ALIASES = [
     ("عامل", "عامل"),
     ("عمال", "عامل"),
@@ -11,15 +18,26 @@ ALIASES = [
     ("تجهيزات ادوية", "تجهيز أدوية"),
 ]
 
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
 
-cur.executemany(
-    "INSERT OR REPLACE INTO specialty_aliases (alias_name, canonical_name) VALUES (?, ?)",
-    ALIASES
-)
+def load_specialty_aliases(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+
+    cur.executemany(
+        "INSERT OR REPLACE INTO specialty_aliases (alias_name, canonical_name) VALUES (?, ?)",
+        ALIASES
+    )
+    # Full refresh of the materialized view, if 13_materialize_canonical_base.py has run.
+    if canonical_table_exists(conn):
+        refresh_canonical_base(conn)
+
+    # Bump the write counter so running apps refresh their cached frames.
+    bump_data_version(conn)
+
+    print(f"[OK] {len(ALIASES)} specialty aliases loaded")
 
-conn.commit()
-conn.close()
 
-print(f"[OK] {len(ALIASES)} specialty aliases loaded")
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    load_specialty_aliases(conn)
+    conn.commit()
+    conn.close()
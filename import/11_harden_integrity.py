@@ -37,6 +37,9 @@ cur.executescript(
     CREATE INDEX IF NOT EXISTS idx_staging_batch_status
     ON workforce_staging(batch_id, status);
 
+    CREATE INDEX IF NOT EXISTS idx_staging_person_status
+    ON workforce_staging(person_id, status);
+
     CREATE INDEX IF NOT EXISTS idx_batches_status
     ON cbi_batches(status);
 
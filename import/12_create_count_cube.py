@@ -0,0 +1,30 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DB_PATH = BASE_DIR / "db" / "workforce.db"
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from cbi.count_cube import CUBE_TABLE, rebuild_count_cube  # noqa: E402
+
+
+def create_count_cube(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+
+    # Dropped first so a layout change takes effect; apply_batch keeps it
+    # current afterwards.
+    cur.execute(f"DROP TABLE IF EXISTS {CUBE_TABLE}")
+    rebuild_count_cube(conn)
+
+    cells = cur.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+    print(f"[OK] workforce_count_cube: {cells} cells")
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    create_count_cube(conn)
+    conn.commit()
+    conn.close()
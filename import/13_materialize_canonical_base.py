@@ -0,0 +1,48 @@
+import sqlite3
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DB_PATH = BASE_DIR / "db" / "workforce.db"
+
+
+def materialize_canonical_base(conn: sqlite3.Connection) -> None:
+    cur = conn.cursor()
+
+    # Readers use this table instead of the view once it exists; apply_batch
+    # refreshes the persons it touches and alias loads refresh it in full.
+    cur.executescript("""
+    DROP TABLE IF EXISTS workforce_base_canonical;
+
+    CREATE TABLE workforce_base_canonical (
+        person_id       TEXT,
+        specialty_name  TEXT,
+        region_name     TEXT,
+        workplace_name  TEXT
+    );
+
+    INSERT INTO workforce_base_canonical
+    SELECT * FROM v_workforce_base_canonical;
+
+    -- Covering indexes: each filter column leads one, all columns included.
+    CREATE INDEX idx_wbc_person
+        ON workforce_base_canonical (person_id);
+
+    CREATE INDEX idx_wbc_region
+        ON workforce_base_canonical (region_name, workplace_name, specialty_name, person_id);
+
+    CREATE INDEX idx_wbc_workplace
+        ON workforce_base_canonical (workplace_name, specialty_name, region_name, person_id);
+
+    CREATE INDEX idx_wbc_specialty
+        ON workforce_base_canonical (specialty_name, region_name, workplace_name, person_id);
+    """)
+
+    rows = cur.execute("SELECT COUNT(*) FROM workforce_base_canonical").fetchone()[0]
+    print(f"[OK] workforce_base_canonical materialized: {rows} rows")
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    materialize_canonical_base(conn)
+    conn.commit()
+    conn.close()
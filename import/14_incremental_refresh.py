@@ -0,0 +1,271 @@
+import argparse
+import sqlite3
+import string
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+DB_PATH = BASE_DIR / "db" / "workforce.db"
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from cbi.canonical_data import canonical_table_exists, refresh_canonical_base  # noqa: E402
+from cbi.count_cube import count_cube_exists, rebuild_count_cube  # noqa: E402
+from cbi.data_version import bump_data_version  # noqa: E402
+from cbi.fingerprints import create_fingerprint_tables, pending_staged_hashes  # noqa: E402
+
+CSV_PATH = BASE_DIR / "data" / "workforce master.csv"
+
+# Master CSV column -> (dimension table, id column, name column).
+PERSON_COLUMNS = {
+    "final specialty": ("specialties", "specialty_id", "specialty_name"),
+    "region": ("regions", "region_id", "region_name"),
+    "workplace": ("workplaces", "workplace_id", "workplace_name"),
+}
+
+REFRESH_NOTE = "MASTER_CSV_REFRESH"
+
+# The dimension name indexes are NOCASE, which only folds ASCII letters.
+NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def fingerprint_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per civil id (first occurrence wins, as in 03_load_persons.py)
+    with the stripped person columns and a hash over them.
+    """
+    person_ids = df["civil id"].astype(str).str.strip()
+    keep = (person_ids != "") & (person_ids.str.lower() != "nan") & ~person_ids.duplicated()
+
+    values = df.loc[keep, list(PERSON_COLUMNS)].fillna("").astype(str)
+    values = values.apply(lambda column: column.str.strip())
+    hashes = pd.util.hash_pandas_object(values, index=False)
+
+    current = values.copy()
+    current.insert(0, "person_id", person_ids[keep])
+    current["row_hash"] = hashes.map("{:016x}".format)
+    return current.reset_index(drop=True)
+
+
+def dimension_keys(cur: sqlite3.Cursor, table_name: str, id_col: str, name_col: str) -> dict:
+    mapping = {}
+    for _id, name in cur.execute(f"SELECT {id_col}, {name_col} FROM {table_name} ORDER BY {id_col}"):
+        if name is not None:
+            mapping.setdefault(str(name).strip().translate(NOCASE), _id)
+    return mapping
+
+
+def dimension_ids(cur: sqlite3.Cursor, changed: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Ids for the changed rows' names, inserting the names not stored yet. Names
+    are matched as the NOCASE unique index compares them, so a case variant of
+    a stored name resolves to that row instead of being left without an id.
+    """
+    table_name, id_col, name_col = PERSON_COLUMNS[column]
+    keys = changed[column].str.translate(NOCASE)
+    mapping = dimension_keys(cur, table_name, id_col, name_col)
+    missing = (keys != "") & ~keys.isin(list(mapping)) & ~keys.duplicated()
+    if missing.any():
+        cur.executemany(
+            f"INSERT INTO {table_name} ({name_col}) VALUES (?)",
+            [(v,) for v in changed.loc[missing, column]],
+        )
+        mapping = dimension_keys(cur, table_name, id_col, name_col)
+    ids = keys.map(mapping).astype("Int64")
+    return ids.astype(object).where(ids.notna(), None)
+
+
+def save_fingerprints(cur: sqlite3.Cursor, rows: pd.DataFrame) -> None:
+    cur.executemany(
+        """
+        INSERT OR REPLACE INTO person_fingerprints (person_id, row_hash, refreshed_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        """,
+        zip(rows["person_id"].tolist(), rows["row_hash"].tolist()),
+    )
+
+
+def seed_fingerprints(conn: sqlite3.Connection, df: Optional[pd.DataFrame] = None) -> None:
+    """
+    Record the hashes of a freshly bootstrapped CSV so the next refresh only
+    touches what changed.
+    """
+    if df is None:
+        df = pd.read_csv(CSV_PATH, low_memory=False)
+
+    create_fingerprint_tables(conn)
+    cur = conn.cursor()
+    cur.execute("DELETE FROM person_fingerprints")
+    current = fingerprint_rows(df)
+    save_fingerprints(cur, current)
+
+    print(f"[OK] person_fingerprints: {len(current)} rows")
+
+
+def incremental_refresh(
+    conn: sqlite3.Connection,
+    df: Optional[pd.DataFrame] = None,
+    via_staging: bool = False,
+) -> None:
+    if df is None:
+        df = pd.read_csv(CSV_PATH, low_memory=False)
+
+    conn.execute("PRAGMA foreign_keys = ON;")
+    create_fingerprint_tables(conn)
+    cur = conn.cursor()
+
+    # --- Diff against stored fingerprints ---
+    current = fingerprint_rows(df)
+    stored = pd.read_sql("SELECT person_id, row_hash FROM person_fingerprints", conn)
+    existing_ids = {row[0] for row in cur.execute("SELECT person_id FROM persons")}
+
+    merged = current.merge(stored, on="person_id", how="left", suffixes=("", "_stored"))
+    changed = merged[merged["row_hash"] != merged["row_hash_stored"]]
+    is_new = ~changed["person_id"].isin(existing_ids)
+    removed_ids = stored.loc[~stored["person_id"].isin(current["person_id"]), "person_id"]
+
+    if via_staging:
+        # --- Route the delta through governed staging ---
+        complete = (changed[list(PERSON_COLUMNS)] != "").all(axis=1)
+        # Changes already waiting in an open batch are not staged twice.
+        pending = pending_staged_hashes(conn)
+        waiting = changed.merge(pending, on=["person_id", "row_hash"], how="left", indicator=True)["_merge"]
+        waiting = pd.Series((waiting == "both").values, index=changed.index)
+        staged = changed[complete & ~waiting]
+        is_new = is_new[complete & ~waiting]
+
+        staged_rows = 0
+        if not staged.empty:
+            cur.execute(
+                """
+                INSERT INTO cbi_batches (batch_name, source_type, status)
+                VALUES (?, ?, 'PENDING')
+                """,
+                (f"MASTER_REFRESH_{datetime.now().strftime('%Y%m%d_%H%M%S')}", "SYSTEM_AUTO"),
+            )
+            batch_id = cur.lastrowid
+            cur.executemany(
+                """
+                INSERT INTO workforce_staging
+                (
+                    person_id,
+                    action_type,
+                    specialty_name,
+                    region_name,
+                    workplace_name,
+                    source_note,
+                    batch_id
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                zip(
+                    staged["person_id"].tolist(),
+                    is_new.map({True: "NEW", False: "UPDATE"}).tolist(),
+                    staged["final specialty"].tolist(),
+                    staged["region"].tolist(),
+                    staged["workplace"].tolist(),
+                    [REFRESH_NOTE] * len(staged),
+                    [batch_id] * len(staged),
+                ),
+            )
+            # The stored fingerprints only move once apply_batch applies
+            # these rows; until then the hashes wait per staging row.
+            staging_ids = [
+                row[0]
+                for row in cur.execute(
+                    "SELECT staging_id FROM workforce_staging WHERE batch_id = ? ORDER BY staging_id",
+                    (batch_id,),
+                )
+            ]
+            cur.executemany(
+                "INSERT INTO staged_fingerprints (staging_id, row_hash) VALUES (?, ?)",
+                zip(staging_ids, staged["row_hash"].tolist()),
+            )
+            bump_data_version(conn)
+            staged_rows = len(staged)
+            print(f"[OK] Staged {staged_rows} changed persons in batch #{batch_id} (PENDING)")
+
+        if waiting.any():
+            print(f"[INFO] {int(waiting.sum())} changed persons are already staged in an open batch")
+        if (~complete).any():
+            print(f"[WARN] Skipped {int((~complete).sum())} changed rows with missing dimensions")
+        if not removed_ids.empty:
+            # Staging has no DELETE action; fingerprints are kept so the
+            # removals are reported again on the next refresh.
+            print(f"[WARN] {len(removed_ids)} persons missing from the CSV were not deleted")
+
+        print("[DONE] Incremental refresh staged")
+        return
+
+    # --- Apply the delta directly ---
+    specialty_ids = dimension_ids(cur, changed, "final specialty")
+    region_ids = dimension_ids(cur, changed, "region")
+    workplace_ids = dimension_ids(cur, changed, "workplace")
+
+    cur.executemany(
+        """
+        INSERT INTO persons (person_id, specialty_id, region_id, workplace_id)
+        VALUES (?, ?, ?, ?)
+        """,
+        zip(
+            changed.loc[is_new, "person_id"].tolist(),
+            specialty_ids[is_new].tolist(),
+            region_ids[is_new].tolist(),
+            workplace_ids[is_new].tolist(),
+        ),
+    )
+    cur.executemany(
+        """
+        UPDATE persons
+        SET specialty_id = ?, region_id = ?, workplace_id = ?
+        WHERE person_id = ?
+        """,
+        zip(
+            specialty_ids[~is_new].tolist(),
+            region_ids[~is_new].tolist(),
+            workplace_ids[~is_new].tolist(),
+            changed.loc[~is_new, "person_id"].tolist(),
+        ),
+    )
+    cur.executemany(
+        "DELETE FROM persons WHERE person_id = ?",
+        [(person_id,) for person_id in removed_ids],
+    )
+
+    save_fingerprints(cur, changed)
+    cur.executemany(
+        "DELETE FROM person_fingerprints WHERE person_id = ?",
+        [(person_id,) for person_id in removed_ids],
+    )
+    # Rebuilt in full, if 12_create_count_cube.py and 13_materialize_canonical_base.py have run.
+    if count_cube_exists(conn):
+        rebuild_count_cube(conn)
+    if canonical_table_exists(conn):
+        refresh_canonical_base(conn)
+    bump_data_version(conn)
+
+    print("[DONE] Incremental refresh applied")
+    print(f"[INFO] Inserted persons: {int(is_new.sum())}")
+    print(f"[INFO] Updated persons: {int((~is_new).sum())}")
+    print(f"[INFO] Deleted persons: {len(removed_ids)}")
+    print(f"[INFO] Unchanged persons: {len(current) - len(changed)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply only the master CSV rows that changed.")
+    parser.add_argument(
+        "--via-staging",
+        action="store_true",
+        help="Stage changed persons as a SYSTEM_AUTO batch instead of writing persons directly.",
+    )
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    incremental_refresh(conn, via_staging=args.via_staging)
+    conn.commit()
+    conn.close()
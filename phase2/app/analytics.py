@@ -1,39 +1,75 @@
-import importlib.util
-import sqlite3
-import sys
 from io import BytesIO
-from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 
-from config.paths import DB_PATH, PROJECT_ROOT
-
-EXPORT_SCRIPT = PROJECT_ROOT / "import" / "06_export_excel.py"
-CANONICAL_VIEW = "v_workforce_base_canonical"
-
-spec = importlib.util.spec_from_file_location("export_module", EXPORT_SCRIPT)
-export_module = importlib.util.module_from_spec(spec)
-sys.modules["export_module"] = export_module
-assert spec.loader is not None
-spec.loader.exec_module(export_module)
-export_official_excel = export_module.export_official_excel
+from cbi.canonical_data import canonical_filter_clause, canonical_source, read_canonical_base
+from cbi.connections import read_connection
+from cbi.count_cube import CountCubeStore
+from cbi.data_version import current_data_version
+from cbi.export_cache import ExportCache, make_export_key
+from cbi.pagination import count_rows, fetch_keyset_page
+from config.paths import DB_PATH
+from phase2.app.paginated_table import paginated_table
 
 
 def reconcile_state(current, options):
     return [v for v in current if v in options]
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_filtered_rows(data_version, regions, workplaces, specialties):
+    # Filters run in SQL against the indexed canonical table; results are
+    # shared by all sessions asking for the same selection and data version.
+    with read_connection(DB_PATH) as conn:
+        return read_canonical_base(conn, regions, workplaces, specialties)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def count_filtered_rows(data_version, regions, workplaces, specialties):
+    with read_connection(DB_PATH) as conn:
+        where, params = canonical_filter_clause(regions, workplaces, specialties)
+        return count_rows(conn, canonical_source(conn), where, params)
+
+
+def fetch_filtered_page(regions, workplaces, specialties, after):
+    # Only the visible page is read and sent to the browser.
+    with read_connection(DB_PATH) as conn:
+        where, params = canonical_filter_clause(regions, workplaces, specialties)
+        return fetch_keyset_page(
+            conn, canonical_source(conn), ["*"], "person_id", where, params, after=after
+        )
+
+
+@st.cache_resource
+def get_count_cube_store() -> CountCubeStore:
+    # Option lists come from the count cube instead of scanning the base frame.
+    return CountCubeStore(DB_PATH)
+
+
+@st.cache_resource
+def get_export_cache() -> ExportCache:
+    # One cache per server process, shared by all sessions.
+    return ExportCache()
+
+
+def build_official_report(fdf, include_drilldown):
+    # Imported on the first export request so openpyxl stays off the page's
+    # cold-start path.
+    from cbi.excel_export import export_official_excel
+
+    buffer = BytesIO()
+    export_official_excel(fdf, buffer, include_drilldown=include_drilldown)
+    return buffer.getvalue()
+
+
 def run_analytics():
     st.subheader("Analytics")
 
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql(f"SELECT * FROM {CANONICAL_VIEW}", conn)
-    conn.close()
+    cube = get_count_cube_store().get()
 
     st.sidebar.header("Filters")
 
-    regions = sorted(df["region_name"].dropna().unique().tolist())
+    regions = cube.options("region_name")
     st.session_state.setdefault("region_sel", [])
 
     c1, c2 = st.sidebar.columns(2)
@@ -50,8 +86,7 @@ def run_analytics():
         st.info("Select at least one Region to load data.")
         return
 
-    wp_df = df[df["region_name"].isin(st.session_state.region_sel)]
-    workplaces = sorted(wp_df["workplace_name"].dropna().unique().tolist())
+    workplaces = cube.options("workplace_name", regions=st.session_state.region_sel)
 
     st.session_state.setdefault("wp_sel", [])
     st.session_state.wp_sel = reconcile_state(st.session_state.wp_sel, workplaces)
@@ -66,12 +101,11 @@ def run_analytics():
         "Workplace", workplaces, default=st.session_state.wp_sel
     )
 
-    sp_df = (
-        wp_df[wp_df["workplace_name"].isin(st.session_state.wp_sel)]
-        if st.session_state.wp_sel
-        else wp_df
+    specialties = cube.options(
+        "specialty_name",
+        regions=st.session_state.region_sel,
+        workplaces=st.session_state.wp_sel,
     )
-    specialties = sorted(sp_df["specialty_name"].dropna().unique().tolist())
 
     st.session_state.setdefault("sp_sel", [])
     st.session_state.sp_sel = reconcile_state(st.session_state.sp_sel, specialties)
@@ -86,26 +120,55 @@ def run_analytics():
         "Specialty", specialties, default=st.session_state.sp_sel
     )
 
-    fdf = df.copy()
-    if st.session_state.region_sel:
-        fdf = fdf[fdf["region_name"].isin(st.session_state.region_sel)]
-    if st.session_state.wp_sel:
-        fdf = fdf[fdf["workplace_name"].isin(st.session_state.wp_sel)]
-    if st.session_state.sp_sel:
-        fdf = fdf[fdf["specialty_name"].isin(st.session_state.sp_sel)]
+    data_version = current_data_version(DB_PATH)
+    selection = (
+        tuple(sorted(st.session_state.region_sel)),
+        tuple(sorted(st.session_state.wp_sel)),
+        tuple(sorted(st.session_state.sp_sel)),
+    )
+    total_rows = count_filtered_rows(data_version, *selection)
 
-    if fdf.empty:
+    if total_rows == 0:
         st.info("No data for selected filters.")
         return
 
-    st.dataframe(fdf, use_container_width=True)
+    paginated_table(
+        "analytics_rows",
+        lambda after: fetch_filtered_page(*selection, after),
+        total_rows,
+        key_column="person_id",
+        signature=(data_version, selection),
+        use_container_width=True,
+    )
 
-    buffer = BytesIO()
-    export_official_excel(fdf, buffer)
+    include_drilldown = st.checkbox("Include Drilldown_Filtered sheet", value=True)
 
-    st.download_button(
-        "Download Official Report",
-        data=buffer.getvalue(),
-        file_name="Workforce_Analytics_Official.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    # The workbook is only built on request and reused until the selection
+    # or the underlying data changes.
+    export_key = make_export_key(
+        st.session_state.region_sel,
+        st.session_state.wp_sel,
+        st.session_state.sp_sel,
+        data_version,
+        include_drilldown=include_drilldown,
     )
+    export_cache = get_export_cache()
+    export_cache.discard_versions_except(data_version)
+
+    report = export_cache.get(export_key)
+    if report is None and st.button("Prepare Official Report"):
+        with st.spinner("Building workbook..."):
+            report = export_cache.get_or_build(
+                export_key,
+                lambda: build_official_report(
+                    load_filtered_rows(data_version, *selection), include_drilldown
+                ),
+            )
+
+    if report is not None:
+        st.download_button(
+            "Download Official Report",
+            data=report,
+            file_name="Workforce_Analytics_Official.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
@@ -1,24 +1,17 @@
-import sqlite3
-
 import streamlit as st
 
 from cbi.apply_engine import apply_approved_changes
+from cbi.connections import read_connection
 from config.paths import DB_PATH
 
 
-def get_conn():
-    return sqlite3.connect(DB_PATH)
-
-
 def count_approved():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT COUNT(*) FROM workforce_staging WHERE status = 'APPROVED'"
-    )
-    count = cur.fetchone()[0]
-    conn.close()
-    return count
+    with read_connection(DB_PATH) as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT COUNT(*) FROM workforce_staging WHERE status = 'APPROVED'"
+        )
+        return cur.fetchone()[0]
 
 
 def run_apply_changes():
@@ -38,10 +31,23 @@ def run_apply_changes():
         "This action will permanently apply all APPROVED records to the core workforce data."
     )
 
+    collapse_duplicates = st.checkbox(
+        "Last write wins: apply only the last approved row per person_id in each batch",
+        help="Earlier rows for the same person_id are rejected as SUPERSEDED before the batch is applied.",
+    )
+    record_noop_audit = st.checkbox(
+        "Write audit entries for UPDATE rows that change nothing",
+        value=True,
+        help="Unchanged rows never rewrite persons; they are still marked APPLIED.",
+    )
+
     if st.button("Apply Approved Changes", type="primary"):
         try:
             with st.spinner("Applying approved changes..."):
-                results = apply_approved_changes()
+                results = apply_approved_changes(
+                    collapse_duplicates=collapse_duplicates,
+                    noop_audit="record" if record_noop_audit else "skip",
+                )
         except Exception as e:
             st.error(f"Apply failed: {e}")
             return
@@ -52,9 +58,11 @@ def run_apply_changes():
 
         total_applied = sum(r["applied_rows"] for r in results)
         total_rejected = sum(r["rejected_rows"] for r in results)
+        total_elided = sum(r["elided_rows"] for r in results)
 
         st.success(
-            f"Apply completed. Applied={total_applied}, Rejected={total_rejected}."
+            f"Apply completed. Applied={total_applied} ({total_elided} unchanged), "
+            f"Rejected={total_rejected}."
         )
 
         st.subheader("Batch Results")
@@ -63,5 +71,7 @@ def run_apply_changes():
                 f"Batch #{result['batch_id']}: "
                 f"status={result['batch_status']}, "
                 f"applied={result['applied_rows']}, "
-                f"rejected={result['rejected_rows']}."
+                f"unchanged={result['elided_rows']}, "
+                f"rejected={result['rejected_rows']}, "
+                f"superseded={result['superseded_rows']}."
             )
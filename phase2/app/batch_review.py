@@ -3,14 +3,94 @@ import sqlite3
 import pandas as pd
 import streamlit as st
 
+from cbi.apply_engine import update_batch_status
+from cbi.connections import read_connection, write_connection
+from cbi.pagination import count_rows, fetch_keyset_page
+from cbi.staging_conflicts import (
+    SUPERSEDED,
+    collapse_batch,
+    ensure_conflict_index,
+    ensure_reject_reason_column,
+    find_batch_conflicts,
+)
 from config.paths import DB_PATH
+from phase2.app.paginated_table import paginated_table
+
+RECORD_COLUMNS = [
+    "staging_id",
+    "person_id",
+    "action_type",
+    "specialty_name",
+    "region_name",
+    "workplace_name",
+    "status",
+    "reject_reason",
+    "source_note",
+]
+
+
+def set_batch_status(batch_id, status):
+    with write_connection(DB_PATH) as conn:
+        update_batch_status(conn, batch_id, status)
+        conn.commit()
+
+
+def collapse_batch_duplicates(batch_id):
+    with write_connection(DB_PATH) as conn:
+        result = collapse_batch(conn, batch_id)
+        conn.commit()
+    return result
+
+
+def render_conflicts(conn, batch_id):
+    conflicts = find_batch_conflicts(conn, batch_id)
+    if conflicts.empty:
+        st.success("No other pending or approved rows share a person_id with this batch.")
+        return
+
+    in_batch = conflicts[conflicts["batch_conflicts"] > 0]
+    cross_batch = conflicts[conflicts["cross_batch_conflicts"] > 0]
+    if not in_batch.empty:
+        st.warning(
+            f"{in_batch['person_id'].nunique()} person_id(s) have more than one row in this batch; "
+            "they are applied in staging_id order."
+        )
+    if not cross_batch.empty:
+        st.warning(
+            f"{len(cross_batch)} row(s) share a person_id with rows in other pending or approved batches."
+        )
+    st.dataframe(conflicts, use_container_width=True)
+
+    if not in_batch.empty and st.button("Collapse to last row per person"):
+        result = collapse_batch_duplicates(batch_id)
+        st.success(
+            f"Kept the last row for {result['collapsed_persons']} person_id(s); "
+            f"{result['superseded_rows']} earlier row(s) rejected as {SUPERSEDED}."
+        )
+
+
+@st.cache_resource
+def ensure_review_indexes(db_path):
+    # Databases bootstrapped before the conflict index or reject_reason existed
+    # get them once per process; the conflict query is a full self-join without
+    # the index, and set_batch_status filters on reject_reason.
+    with write_connection(db_path) as conn:
+        ensure_conflict_index(conn)
+        ensure_reject_reason_column(conn)
+        conn.commit()
+    return True
 
 
 def run_batch_review():
     st.subheader("Batch Review")
+    ensure_review_indexes(str(DB_PATH))
+
+    with read_connection(DB_PATH) as conn:
+        conn.row_factory = sqlite3.Row
+        render_batch_review(conn)
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+
+def render_batch_review(conn):
 
     df_batches = pd.read_sql(
         """
@@ -27,7 +107,6 @@ def run_batch_review():
 
     if df_batches.empty:
         st.info("No batches available for review.")
-        conn.close()
         return
 
     selected_batch_id = st.selectbox(
@@ -38,7 +117,6 @@ def run_batch_review():
     batch_row = df_batches[df_batches["batch_id"] == selected_batch_id]
     if batch_row.empty:
         st.warning("Selected batch not found.")
-        conn.close()
         return
 
     batch_row = batch_row.iloc[0]
@@ -50,57 +128,35 @@ def run_batch_review():
     """
     )
 
-    df_records = pd.read_sql(
-        """
-        SELECT
-            staging_id,
-            person_id,
-            action_type,
-            specialty_name,
-            region_name,
-            workplace_name,
-            status
-        FROM workforce_staging
-        WHERE batch_id = ?
-        ORDER BY staging_id
-        """,
-        conn,
-        params=[selected_batch_id],
-    )
+    batch_filter = ("WHERE batch_id = ?", [selected_batch_id])
+    total_records = count_rows(conn, "workforce_staging", *batch_filter)
 
-    if df_records.empty:
+    if total_records == 0:
         st.info("No records found for this batch.")
-        conn.close()
         return
 
     st.subheader("Staging Records")
-    st.dataframe(df_records, use_container_width=True)
+    paginated_table(
+        "batch_records",
+        lambda after: fetch_keyset_page(
+            conn, "workforce_staging", RECORD_COLUMNS, "staging_id", *batch_filter, after=after
+        ),
+        total_records,
+        key_column="staging_id",
+        signature=selected_batch_id,
+        use_container_width=True,
+    )
+
+    st.subheader("Conflicts")
+    render_conflicts(conn, selected_batch_id)
 
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Approve Batch"):
-            conn.execute(
-                "UPDATE cbi_batches SET status = 'APPROVED' WHERE batch_id = ?",
-                (selected_batch_id,),
-            )
-            conn.execute(
-                "UPDATE workforce_staging SET status = 'APPROVED' WHERE batch_id = ?",
-                (selected_batch_id,),
-            )
-            conn.commit()
+            set_batch_status(selected_batch_id, "APPROVED")
             st.success("Batch approved successfully.")
 
     with col2:
         if st.button("Reject Batch"):
-            conn.execute(
-                "UPDATE cbi_batches SET status = 'REJECTED' WHERE batch_id = ?",
-                (selected_batch_id,),
-            )
-            conn.execute(
-                "UPDATE workforce_staging SET status = 'REJECTED' WHERE batch_id = ?",
-                (selected_batch_id,),
-            )
-            conn.commit()
+            set_batch_status(selected_batch_id, "REJECTED")
             st.error("Batch rejected.")
-
-    conn.close()
@@ -6,10 +6,12 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(PROJECT_ROOT))
 
 import streamlit as st
-import sqlite3
-import pandas as pd
 
+from cbi.connections import write_connection
+from cbi.intake_validation import validate_staged_batch
+from cbi.staging_intake import REQUIRED_COLUMNS, iter_upload_chunks, preview_upload, stage_chunks
 from config.paths import DB_PATH
+from phase2.app.intake_checks import render_intake_checks
 
 
 # ================= Page Config =================
@@ -22,24 +24,6 @@ st.title("Workforce – Bulk Upload")
 st.caption("Phase 6 · Controlled Bulk Intake · Staging Only")
 
 
-# ================= Helpers =================
-def get_conn():
-    return sqlite3.connect(DB_PATH)
-
-
-REQUIRED_COLUMNS = [
-    "action_type",
-    "specialty_name",
-    "region_name",
-    "workplace_name",
-]
-
-
-def validate_columns(df: pd.DataFrame):
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
-    return missing
-
-
 # ================= UI =================
 uploaded = st.file_uploader(
     "Upload Excel or CSV file",
@@ -52,68 +36,57 @@ if not uploaded:
 
 
 # ================= Load File =================
+# Only a preview is read here; the file is streamed in chunks on load.
 try:
-    if uploaded.name.endswith(".csv"):
-        df = pd.read_csv(uploaded)
-    else:
-        df = pd.read_excel(uploaded)
+    preview = preview_upload(uploaded, uploaded.name)
 except Exception as e:
     st.error(f"Failed to read file: {e}")
     st.stop()
 
 st.subheader("Preview")
-st.dataframe(df.head(20), use_container_width=True)
+st.dataframe(preview, use_container_width=True)
 
 # ================= Validation =================
-missing_cols = validate_columns(df)
+missing_cols = [c for c in REQUIRED_COLUMNS if c not in preview.columns]
 
 if missing_cols:
     st.error(f"Missing required columns: {missing_cols}")
     st.stop()
 
-if "action_type" in df.columns:
-    invalid_actions = df[~df["action_type"].isin(["NEW", "UPDATE"])]
-    if not invalid_actions.empty:
-        st.error("Invalid action_type values found (allowed: NEW, UPDATE).")
-        st.stop()
-
 st.success("File structure validated successfully.")
 
 # ================= Insert to Staging =================
 if st.button("Load into Staging (PENDING)", type="primary"):
-    conn = get_conn()
-    cur = conn.cursor()
-
-    inserted = 0
-
-    for _, row in df.iterrows():
-        cur.execute(
-            """
-            INSERT INTO workforce_staging
-            (
-                person_id,
-                action_type,
-                specialty_name,
-                region_name,
-                workplace_name,
-                source_note
-            )
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                str(row.get("person_id")).strip()
-                if pd.notna(row.get("person_id")) else None,
-                row["action_type"],
-                row["specialty_name"],
-                row["region_name"],
-                row["workplace_name"],
-                row.get("source_note"),
+    status = st.empty()
+    # All or nothing: the file is staged in one transaction, which is rolled
+    # back if any chunk is invalid or the load fails.
+    with write_connection(DB_PATH) as conn:
+        try:
+            result = stage_chunks(
+                conn,
+                iter_upload_chunks(uploaded, uploaded.name),
+                uploaded.name,
+                progress=lambda staged, seen: status.caption(f"{seen:,} rows read, {staged:,} staged"),
             )
-        )
-        inserted += 1
-
-    conn.commit()
-    conn.close()
-
-    st.success(f"{inserted} records loaded into staging (PENDING).")
-    st.info("Proceed to Review tab to approve records.")
+            if result["errors"] or not result["staged_rows"]:
+                conn.rollback()
+            else:
+                checks = validate_staged_batch(conn, result["batch_id"])
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            status.empty()
+            st.error(f"Failed to load file into staging: {e}")
+            st.stop()
+    status.empty()
+
+    if result["errors"]:
+        for chunk_error in result["errors"]:
+            st.error(f"Rows {chunk_error['first_row']}–{chunk_error['last_row']}: {chunk_error['error']}")
+        st.warning("Nothing was loaded. Fix the rows above and upload the file again.")
+    elif result["staged_rows"]:
+        st.success(f"{result['staged_rows']} records loaded into staging batch #{result['batch_id']} (PENDING).")
+        render_intake_checks(checks)
+        st.info("Proceed to Review tab to approve or reject this batch.")
+    else:
+        st.warning("No records were loaded into staging.")
@@ -1,20 +1,18 @@
-import sqlite3
+import time
 
-import pandas as pd
 import streamlit as st
 
+from cbi.connections import write_connection
+from cbi.intake_validation import validate_staged_batch
+from cbi.staging_intake import (
+    DEFAULT_READ_CHUNK_ROWS,
+    REQUIRED_COLUMNS,
+    iter_upload_chunks,
+    preview_upload,
+    stage_chunks,
+)
 from config.paths import DB_PATH
-
-REQUIRED_COLUMNS = [
-    "action_type",
-    "specialty_name",
-    "region_name",
-    "workplace_name",
-]
-
-
-def get_conn():
-    return sqlite3.connect(DB_PATH)
+from phase2.app.intake_checks import render_intake_checks
 
 
 def run_data_entry():
@@ -31,102 +29,65 @@ def run_data_entry():
         return
 
     try:
-        if uploaded.name.lower().endswith(".csv"):
-            df = pd.read_csv(uploaded)
-        else:
-            df = pd.read_excel(uploaded)
+        preview = preview_upload(uploaded, uploaded.name)
     except Exception as e:
         st.error(f"Failed to read file: {e}")
         return
 
     st.subheader("Preview")
-    st.dataframe(df.head(20), use_container_width=True)
+    st.dataframe(preview, use_container_width=True)
 
-    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in preview.columns]
     if missing:
         st.error(f"Missing required columns: {missing}")
         return
 
-    df["action_type"] = df["action_type"].astype(str).str.strip().str.upper()
-    invalid = df[~df["action_type"].isin(["NEW", "UPDATE"])]
-    if not invalid.empty:
-        st.error("Invalid action_type values found (allowed: NEW, UPDATE).")
-        return
-
-    if "person_id" in df.columns:
-        update_mask = df["action_type"] == "UPDATE"
-        update_person_ids = (
-            df.loc[update_mask, "person_id"]
-            .astype(str)
-            .str.strip()
-            .str.lower()
-        )
-        if update_person_ids.isin(["", "nan", "none"]).any():
-            st.error("UPDATE records must include person_id.")
-            return
-    elif (df["action_type"] == "UPDATE").any():
-        st.error("Column person_id is required for UPDATE records.")
-        return
-
-    st.success("File validated successfully.")
+    st.success("File structure validated successfully.")
+    st.caption(
+        f"Rows are read, validated and staged in chunks of {DEFAULT_READ_CHUNK_ROWS:,}; "
+        "if any chunk has invalid rows, nothing is loaded and the rows are listed."
+    )
 
     if st.button("Load into Staging (PENDING)", type="primary"):
-        conn = get_conn()
-        cur = conn.cursor()
-
-        try:
-            cur.execute(
-                """
-                INSERT INTO cbi_batches (batch_name, source_type, status)
-                VALUES (?, ?, 'PENDING')
-                """,
-                (uploaded.name, "FILE_UPLOAD"),
-            )
-            batch_id = cur.lastrowid
-
-            inserted = 0
-            for _, row in df.iterrows():
-                person_value = row.get("person_id")
-                person_id = (
-                    str(person_value).strip()
-                    if pd.notna(person_value) and str(person_value).strip()
-                    else None
-                )
-
-                cur.execute(
-                    """
-                    INSERT INTO workforce_staging
-                    (
-                        person_id,
-                        action_type,
-                        specialty_name,
-                        region_name,
-                        workplace_name,
-                        source_note,
-                        batch_id
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        person_id,
-                        row["action_type"],
-                        str(row["specialty_name"]).strip(),
-                        str(row["region_name"]).strip(),
-                        str(row["workplace_name"]).strip(),
-                        row.get("source_note"),
-                        batch_id,
-                    ),
+        status = st.empty()
+
+        def report(staged, seen):
+            status.caption(f"Loading into staging... {seen:,} rows read, {staged:,} staged")
+
+        started = time.perf_counter()
+        with write_connection(DB_PATH) as conn:
+            try:
+                result = stage_chunks(
+                    conn,
+                    iter_upload_chunks(uploaded, uploaded.name),
+                    uploaded.name,
+                    progress=report,
                 )
-                inserted += 1
-
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            st.error(f"Failed to insert into staging: {e}")
-            conn.close()
+                # All or nothing: one invalid chunk rolls back the whole file.
+                if result["errors"] or result["staged_rows"] == 0:
+                    conn.rollback()
+                else:
+                    checks = validate_staged_batch(conn, result["batch_id"])
+                    conn.commit()
+            except Exception as e:
+                conn.rollback()
+                status.empty()
+                st.error(f"Failed to insert into staging: {e}")
+                return
+        elapsed = time.perf_counter() - started
+        status.empty()
+
+        if result["errors"]:
+            for chunk_error in result["errors"]:
+                st.error(f"Rows {chunk_error['first_row']}–{chunk_error['last_row']}: {chunk_error['error']}")
+            st.warning("Nothing was loaded. Fix the rows above and upload the file again.")
+            return
+        inserted = result["staged_rows"]
+        if inserted == 0:
+            st.warning("No records were loaded into staging.")
             return
 
-        conn.close()
-
-        st.success(f"{inserted} records loaded into staging batch #{batch_id} (PENDING).")
+        st.success(f"{inserted} records loaded into staging batch #{result['batch_id']} (PENDING).")
+        st.caption(f"Staged and checked in {elapsed:.2f}s ({result['total_rows'] / max(elapsed, 1e-9):,.0f} rows/s).")
+        render_intake_checks(checks)
         st.info("Proceed to Batch Review to approve or reject this batch.")
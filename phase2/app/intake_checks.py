@@ -0,0 +1,41 @@
+import pandas as pd
+import streamlit as st
+
+ISSUE_LABELS = {
+    "missing_person_id": "Missing person_id",
+    "missing_name": "Missing specialty, region or workplace",
+    "name_case_conflict": "Name differs only in case from an existing one",
+    "new_person_exists": "NEW for a person that already exists",
+    "duplicate_new": "More than one NEW for a person",
+    "update_person_missing": "UPDATE for an unknown person",
+    "duplicate_row": "Repeated UPDATE row",
+    "unknown_name": "New specialty, region or workplace",
+    "alias_name": "Specialty given by an alias",
+}
+
+
+def render_intake_checks(checks):
+    """
+    Summary of validate_staged_batch findings for the batch just staged.
+    """
+    if not checks["issue_counts"]:
+        st.success(f"Intake checks passed for all {checks['checked_rows']} rows.")
+        return
+
+    if checks["rejected_rows"]:
+        st.error(
+            f"{checks['rejected_rows']} rows would fail on apply against the current data "
+            "and were marked REJECTED (INTAKE_ERROR in source_note)."
+        )
+    if checks["warning_rows"]:
+        st.warning(f"{checks['warning_rows']} rows have INTAKE_WARNING notes for reviewers.")
+    st.dataframe(
+        pd.DataFrame(
+            [
+                {"Check": ISSUE_LABELS.get(code, code), "Rows": count}
+                for code, count in checks["issue_counts"].items()
+            ]
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
@@ -0,0 +1,70 @@
+from typing import Callable, Hashable, Optional
+
+import pandas as pd
+import streamlit as st
+
+from cbi.pagination import DEFAULT_PAGE_SIZE
+
+
+def _to_python(value):
+    # numpy scalars cannot be bound as SQLite parameters.
+    return value.item() if hasattr(value, "item") else value
+
+
+def _next_page(state_key, last_key):
+    st.session_state[state_key].append(last_key)
+
+
+def _previous_page(state_key):
+    if len(st.session_state[state_key]) > 1:
+        st.session_state[state_key].pop()
+
+
+def paginated_table(
+    state_key: str,
+    fetch_page: Callable[[Optional[Hashable]], pd.DataFrame],
+    total_rows: int,
+    key_column: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    signature: Hashable = None,
+    **dataframe_kwargs,
+) -> pd.DataFrame:
+    """
+    Render one keyset page with Previous/Next controls and return it.
+
+    `fetch_page(after)` returns up to page_size rows after the given key. The
+    start keys of visited pages are kept in session state and reset whenever
+    `signature` (e.g. the active filters) changes.
+    """
+    signature_key = f"{state_key}_signature"
+    if st.session_state.get(signature_key) != signature or state_key not in st.session_state:
+        st.session_state[signature_key] = signature
+        st.session_state[state_key] = [None]
+
+    starts = st.session_state[state_key]
+    page = fetch_page(starts[-1])
+    first_row = (len(starts) - 1) * page_size + 1
+
+    st.dataframe(page, **dataframe_kwargs)
+
+    c1, c2, c3 = st.columns([1, 1, 4])
+    c1.button(
+        "Previous",
+        key=f"{state_key}_prev",
+        disabled=len(starts) == 1,
+        on_click=_previous_page,
+        args=(state_key,),
+    )
+    last_row = first_row + len(page) - 1
+    c2.button(
+        "Next",
+        key=f"{state_key}_next",
+        disabled=page.empty or last_row >= total_rows,
+        on_click=_next_page,
+        args=(state_key, _to_python(page[key_column].iloc[-1]) if not page.empty else None),
+    )
+    if page.empty:
+        c3.caption(f"No rows · {total_rows} total")
+    else:
+        c3.caption(f"Rows {first_row}–{last_row} of {total_rows}")
+    return page
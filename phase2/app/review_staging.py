@@ -6,10 +6,12 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(PROJECT_ROOT))
 
 import streamlit as st
-import sqlite3
-import pandas as pd
 
+from cbi.apply_engine import update_batch_status
+from cbi.connections import read_connection, write_connection
+from cbi.pagination import count_rows, fetch_keyset_page
 from config.paths import DB_PATH
+from phase2.app.paginated_table import paginated_table
 
 # ================= Page Config =================
 st.set_page_config(
@@ -18,48 +20,71 @@ st.set_page_config(
 )
 
 # ================= DB Helpers =================
-def get_conn():
-    return sqlite3.connect(DB_PATH)
-
-def load_staging():
-    conn = get_conn()
-    df = pd.read_sql(
-        """
-        SELECT
-            staging_id,
-            action_type,
-            person_id,
-            specialty_name,
-            region_name,
-            workplace_name,
-            status,
-            source_note,
-            created_at
-        FROM workforce_staging
-        ORDER BY created_at DESC
-        """,
-        conn
-    )
-    conn.close()
-    return df
+STAGING_COLUMNS = [
+    "staging_id",
+    "action_type",
+    "person_id",
+    "specialty_name",
+    "region_name",
+    "workplace_name",
+    "status",
+    "source_note",
+    "created_at",
+    "batch_id",
+]
+
+def status_clause(statuses):
+    if not statuses:
+        return "WHERE 1 = 1", []
+    placeholders = ",".join("?" for _ in statuses)
+    return f"WHERE status IN ({placeholders})", list(statuses)
+
+def count_staging(statuses=None):
+    where, params = status_clause(statuses)
+    with read_connection(DB_PATH) as conn:
+        return count_rows(conn, "workforce_staging", where, params)
+
+def load_staging_page(statuses, after):
+    # Newest first, paged on staging_id and counted through idx_staging_status.
+    where, params = status_clause(statuses)
+    with read_connection(DB_PATH) as conn:
+        return fetch_keyset_page(
+            conn,
+            "workforce_staging",
+            STAGING_COLUMNS,
+            "staging_id",
+            where,
+            params,
+            after=after,
+            descending=True
+        )
+
+def load_staging_row(staging_id):
+    with read_connection(DB_PATH) as conn:
+        return conn.execute(
+            f"SELECT {', '.join(STAGING_COLUMNS)} FROM workforce_staging WHERE staging_id = ?",
+            (staging_id,)
+        ).fetchone()
 
 def update_status(staging_id, new_status):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "UPDATE workforce_staging SET status = ? WHERE staging_id = ?",
-        (new_status, staging_id)
-    )
-    conn.commit()
-    conn.close()
+    with write_connection(DB_PATH) as conn:
+        conn.execute(
+            "UPDATE workforce_staging SET status = ? WHERE staging_id = ?",
+            (new_status, staging_id)
+        )
+        conn.commit()
+
+def update_batch(batch_id, new_status):
+    # Only APPROVED batches are applied, so batched rows are reviewed together.
+    with write_connection(DB_PATH) as conn:
+        update_batch_status(conn, batch_id, new_status)
+        conn.commit()
 
 # ================= UI =================
 st.title("Workforce – Review & Approve")
 st.caption("Phase 2 · Staging Review · No Apply Yet")
 
-df = load_staging()
-
-if df.empty:
+if count_staging() == 0:
     st.info("No staging records found.")
     st.stop()
 
@@ -72,13 +97,14 @@ with st.sidebar:
         default=["PENDING"]
     )
 
-if status_filter:
-    df = df[df["status"].isin(status_filter)]
-
 # -------- Table --------
 st.subheader("Staging Records")
-st.dataframe(
-    df,
+df = paginated_table(
+    "staging_rows",
+    lambda after: load_staging_page(status_filter, after),
+    count_staging(status_filter),
+    key_column="staging_id",
+    signature=tuple(status_filter),
     use_container_width=True,
     height=400
 )
@@ -88,21 +114,43 @@ st.divider()
 # -------- Actions --------
 st.subheader("Review Action")
 
-selected_id = st.selectbox(
-    "Select staging_id",
-    options=df["staging_id"].tolist()
+# Any staging_id can be looked up, not only the rows on the current page.
+selected_id = int(st.number_input(
+    "staging_id",
+    min_value=1,
+    step=1,
+    value=int(df["staging_id"].iloc[0]) if not df.empty else 1
+))
+selected_row = load_staging_row(selected_id)
+if selected_row is None:
+    st.warning(f"No staging record with staging_id {selected_id}.")
+    st.stop()
+st.caption(
+    f"{selected_row[1]} · person_id {selected_row[2]} · "
+    f"{selected_row[3]} / {selected_row[4]} / {selected_row[5]} · {selected_row[6]}"
 )
+batch_id = selected_row[9]
+if batch_id is not None:
+    st.info(f"Record {selected_id} belongs to batch #{batch_id}; the whole batch is approved or rejected.")
 
 col1, col2 = st.columns(2)
 
 with col1:
     if st.button("Approve"):
-        update_status(selected_id, "APPROVED")
-        st.success(f"Record {selected_id} approved")
+        if batch_id is None:
+            update_status(selected_id, "APPROVED")
+            st.success(f"Record {selected_id} approved")
+        else:
+            update_batch(batch_id, "APPROVED")
+            st.success(f"Batch #{batch_id} approved")
         st.rerun()
 
 with col2:
     if st.button("Reject"):
-        update_status(selected_id, "REJECTED")
-        st.warning(f"Record {selected_id} rejected")
+        if batch_id is None:
+            update_status(selected_id, "REJECTED")
+            st.warning(f"Record {selected_id} rejected")
+        else:
+            update_batch(batch_id, "REJECTED")
+            st.warning(f"Batch #{batch_id} rejected")
         st.rerun()
@@ -1,7 +1,77 @@
+import sqlite3
 import sys
+from importlib.util import module_from_spec, spec_from_file_location
 from pathlib import Path
 
+import pytest
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
+
+from cbi.connections import close_pools  # noqa: E402
+
+# The bootstrap steps that lay down the schema, in run order; the loaders are
+# left out so every test seeds its own rows.
+SCHEMA_STEPS = [
+    ("01_create_schema.py", "create_schema"),
+    ("07_create_staging.py", "create_staging"),
+    ("07_create_specialty_aliases.py", "create_specialty_aliases"),
+    ("10_create_canonical_base_view.py", "create_canonical_base_view"),
+]
+
+
+def load_import_module(file_name: str):
+    module_path = PROJECT_ROOT / "import" / file_name
+    spec = spec_from_file_location(f"import_{module_path.stem}_for_tests", module_path)
+    module = module_from_spec(spec)
+    assert spec.loader is not None
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_workforce_schema(conn: sqlite3.Connection) -> None:
+    for file_name, function_name in SCHEMA_STEPS:
+        getattr(load_import_module(file_name), function_name)(conn)
+    conn.commit()
+
+
+@pytest.fixture
+def make_workforce_db(tmp_path):
+    """
+    Factory for file databases built by the bootstrap schema scripts.
+    """
+
+    def make(name: str = "workforce_test.db") -> Path:
+        db_path = tmp_path / name
+        conn = sqlite3.connect(db_path)
+        try:
+            create_workforce_schema(conn)
+        finally:
+            conn.close()
+        return db_path
+
+    return make
+
+
+@pytest.fixture
+def workforce_db(make_workforce_db) -> Path:
+    return make_workforce_db()
+
+
+@pytest.fixture
+def workforce_conn():
+    """
+    In-memory connection with the bootstrap schema.
+    """
+    conn = sqlite3.connect(":memory:")
+    create_workforce_schema(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def close_connection_pools():
+    yield
+    close_pools()
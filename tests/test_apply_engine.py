@@ -1,76 +1,15 @@
 import sqlite3
 from pathlib import Path
 
-from cbi import apply_engine
-
+import pytest
 
-def create_test_db(db_path: Path) -> None:
-    conn = sqlite3.connect(db_path)
-    cur = conn.cursor()
-    cur.executescript(
-        """
-        PRAGMA foreign_keys = ON;
-
-        CREATE TABLE specialties (
-            specialty_id   INTEGER PRIMARY KEY AUTOINCREMENT,
-            specialty_name TEXT NOT NULL
-        );
-
-        CREATE TABLE regions (
-            region_id   INTEGER PRIMARY KEY AUTOINCREMENT,
-            region_name TEXT NOT NULL
-        );
-
-        CREATE TABLE workplaces (
-            workplace_id   INTEGER PRIMARY KEY AUTOINCREMENT,
-            workplace_name TEXT NOT NULL
-        );
-
-        CREATE TABLE persons (
-            person_id    TEXT PRIMARY KEY,
-            specialty_id INTEGER,
-            region_id    INTEGER,
-            workplace_id INTEGER
-        );
-
-        CREATE TABLE cbi_batches (
-            batch_id     INTEGER PRIMARY KEY AUTOINCREMENT,
-            batch_name   TEXT,
-            source_type  TEXT NOT NULL,
-            status       TEXT NOT NULL DEFAULT 'PENDING',
-            created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE workforce_staging (
-            staging_id      INTEGER PRIMARY KEY AUTOINCREMENT,
-            person_id       TEXT,
-            action_type     TEXT NOT NULL,
-            specialty_name  TEXT NOT NULL,
-            region_name     TEXT NOT NULL,
-            workplace_name  TEXT NOT NULL,
-            source_note     TEXT,
-            status          TEXT NOT NULL DEFAULT 'PENDING',
-            created_at      TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            batch_id        INTEGER
-        );
-
-        CREATE TABLE workforce_audit_timeline (
-            audit_id         INTEGER PRIMARY KEY AUTOINCREMENT,
-            person_id        TEXT NOT NULL,
-            batch_id         INTEGER NOT NULL,
-            action_type      TEXT NOT NULL,
-            change_summary   TEXT NOT NULL,
-            applied_at       TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-        );
-        """
-    )
-    conn.commit()
-    conn.close()
+from cbi import apply_engine
+from cbi.data_version import bump_data_version, read_write_counter
+from conftest import load_import_module
 
 
-def test_apply_batch_handles_success_and_rejections(tmp_path, monkeypatch):
-    db_path = tmp_path / "workforce_test.db"
-    create_test_db(db_path)
+def test_apply_batch_handles_success_and_rejections(workforce_db, monkeypatch):
+    db_path = workforce_db
     monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
 
     conn = sqlite3.connect(db_path)
@@ -120,17 +59,18 @@ def test_apply_batch_handles_success_and_rejections(tmp_path, monkeypatch):
         ("P100", "UPD_SPECIALTY", "UPD_REGION", "UPD_WORKPLACE", batch_id),
     )
 
-    # Invalid UPDATE without person_id.
+    # Invalid NEW without person_id.
     cur.execute(
         """
         INSERT INTO workforce_staging
         (person_id, action_type, specialty_name, region_name, workplace_name, status, batch_id)
-        VALUES (NULL, 'UPDATE', ?, ?, ?, 'APPROVED', ?)
+        VALUES (NULL, 'NEW', ?, ?, ?, 'APPROVED', ?)
         """,
         ("BAD_SPECIALTY", "BAD_REGION", "BAD_WORKPLACE", batch_id),
     )
 
     conn.commit()
+    version_before = read_write_counter(conn)
     conn.close()
 
     result = apply_engine.apply_batch(batch_id)
@@ -140,6 +80,7 @@ def test_apply_batch_handles_success_and_rejections(tmp_path, monkeypatch):
 
     conn = sqlite3.connect(db_path)
     cur = conn.cursor()
+    assert read_write_counter(conn) == version_before + 1
     statuses = dict(
         cur.execute(
             """
@@ -182,9 +123,8 @@ def test_apply_batch_handles_success_and_rejections(tmp_path, monkeypatch):
     conn.close()
 
 
-def test_apply_approved_changes_auto_creates_batch_for_unassigned_rows(tmp_path, monkeypatch):
-    db_path = tmp_path / "workforce_test.db"
-    create_test_db(db_path)
+def test_apply_approved_changes_auto_creates_batch_for_unassigned_rows(workforce_db, monkeypatch):
+    db_path = workforce_db
     monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
 
     conn = sqlite3.connect(db_path)
@@ -210,3 +150,346 @@ def test_apply_approved_changes_auto_creates_batch_for_unassigned_rows(tmp_path,
     batch_count = cur.execute("SELECT COUNT(*) FROM cbi_batches").fetchone()[0]
     assert batch_count == 1
     conn.close()
+
+
+def _seed_mixed_batch(db_path: Path) -> int:
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO specialties (specialty_name) VALUES ('OLD_SPECIALTY')")
+    cur.execute("INSERT INTO regions (region_name) VALUES ('OLD_REGION')")
+    cur.execute("INSERT INTO workplaces (workplace_name) VALUES ('OLD_WORKPLACE')")
+    cur.execute(
+        "INSERT INTO persons (person_id, specialty_id, region_id, workplace_id) VALUES ('P100', 1, 1, 1)"
+    )
+    cur.execute(
+        "INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('MIXED', 'MANUAL', 'APPROVED')"
+    )
+    batch_id = cur.lastrowid
+
+    staged = [
+        ("P200", "NEW", "S_A", "R_A", "W_A", None),
+        ("P200", "NEW", "S_B", "R_B", "W_B", "second new"),
+        ("P200", "UPDATE", " S_C ", "R_A", "W_A", None),
+        ("P100", "UPDATE", "OLD_SPECIALTY", "OLD_REGION", "OLD_WORKPLACE", None),
+        ("P100", "UPDATE", "S_A", "R_B", "OLD_WORKPLACE", ""),
+        ("P100", "NEW", "S_A", "R_A", "W_A", None),
+        ("P300", "UPDATE", "S_A", "R_A", "W_A", None),
+        ("P300", "NEW", "S_D", "R_D", "W_D", None),
+        (None, "NEW", "S_A", "R_A", "W_A", None),
+        ("P400", "NEW", "nan", "R_E", "W_E", None),
+        ("P400", "NEW", "S_E", "nan", "W_E", None),
+    ]
+    cur.executemany(
+        """
+        INSERT INTO workforce_staging
+        (person_id, action_type, specialty_name, region_name, workplace_name,
+         source_note, status, batch_id)
+        VALUES (?, ?, ?, ?, ?, ?, 'APPROVED', ?)
+        """,
+        [row + (batch_id,) for row in staged],
+    )
+    conn.commit()
+    conn.close()
+    return batch_id
+
+
+def _snapshot(db_path: Path) -> dict:
+    conn = sqlite3.connect(db_path)
+    queries = {
+        "persons": "SELECT * FROM persons ORDER BY person_id",
+        "specialties": "SELECT * FROM specialties ORDER BY specialty_id",
+        "regions": "SELECT * FROM regions ORDER BY region_id",
+        "workplaces": "SELECT * FROM workplaces ORDER BY workplace_id",
+        "staging": "SELECT staging_id, status, source_note FROM workforce_staging ORDER BY staging_id",
+        "audit": (
+            "SELECT audit_id, person_id, batch_id, action_type, change_summary "
+            "FROM workforce_audit_timeline ORDER BY audit_id"
+        ),
+        "batches": "SELECT batch_id, status FROM cbi_batches ORDER BY batch_id",
+    }
+    snapshot = {name: conn.execute(sql).fetchall() for name, sql in queries.items()}
+    conn.close()
+    return snapshot
+
+
+def test_set_based_apply_matches_row_loop(make_workforce_db, monkeypatch):
+    results = {}
+    snapshots = {}
+    for mode in ("row", "set"):
+        db_path = make_workforce_db(f"workforce_{mode}.db")
+        batch_id = _seed_mixed_batch(db_path)
+        monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+        results[mode] = apply_engine.apply_batch(batch_id, mode=mode)
+        snapshots[mode] = _snapshot(db_path)
+
+    assert results["set"] == results["row"]
+    assert results["set"]["applied_rows"] == 5
+    assert results["set"]["batch_status"] == "PARTIAL_APPLIED"
+    for table, rows in snapshots["row"].items():
+        assert snapshots["set"][table] == rows, table
+
+
+def test_set_based_apply_gives_case_variants_no_dimension_ids(make_workforce_db, monkeypatch):
+    snapshots = {}
+    for mode in ("row", "set"):
+        db_path = make_workforce_db(f"case_{mode}.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO regions (region_name) VALUES ('North')")
+        conn.execute("INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('case', 'MANUAL', 'APPROVED')")
+        conn.executemany(
+            """
+            INSERT INTO workforce_staging
+            (person_id, action_type, specialty_name, region_name, workplace_name, status, batch_id)
+            VALUES (?, 'NEW', ?, ?, 'Clinic', 'APPROVED', 1)
+            """,
+            [
+                ("P1", "Surgery", "north"),
+                ("P2", "surgery", "South"),
+                ("P3", "Nursing", "south"),
+                ("P4", "Dentistry", "East"),
+            ],
+        )
+        conn.commit()
+        conn.close()
+        monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+        apply_engine.apply_batch(1, mode=mode)
+        snapshots[mode] = _snapshot(db_path)
+
+    assert snapshots["set"] == snapshots["row"]
+    # P1 and P2 fail on their case variants; P2 fails before creating South.
+    assert snapshots["set"]["persons"] == [("P3", 2, 2, 1), ("P4", 3, 3, 1)]
+
+
+def test_apply_batch_rejects_unknown_mode(workforce_db, monkeypatch):
+    db_path = workforce_db
+    monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+
+    with pytest.raises(ValueError, match="Unsupported apply mode"):
+        apply_engine.apply_batch(1, mode="bogus")
+
+
+def test_dimension_cache_resolves_and_bulk_inserts(workforce_db):
+    db_path = workforce_db
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO regions (region_name) VALUES (?)",
+        [("R1",), ("R2",), ("R0",)],
+    )
+
+    cache = apply_engine.DimensionCache.load(cur)
+    assert cache.get_id("regions", "R1") == 1
+    assert cache.get_name("regions", 3) == "R0"
+    assert cache.get_id("regions", "R3") is None
+
+    cache.ensure_ids(cur, "regions", ["R3", "R2", "R4", "R3"])
+    assert cache.get_id("regions", "R3") == 4
+    assert cache.get_id("regions", "R4") == 5
+    assert cur.execute("SELECT COUNT(*) FROM regions").fetchone()[0] == 5
+
+    # Case variants are skipped without using up an id, as in the row loop.
+    cache.ensure_ids(cur, "regions", ["r1", "R6", "r6", "R5"])
+    assert cache.get_id("regions", "r1") is None
+    assert cache.get_id("regions", "r6") is None
+    assert (cache.get_id("regions", "R6"), cache.get_id("regions", "R5")) == (6, 7)
+    conn.close()
+
+
+def test_shared_dimension_cache_is_published_after_commit(workforce_db, monkeypatch):
+    db_path = workforce_db
+    monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+    apply_engine.invalidate_dimension_cache()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('B1', 'MANUAL', 'APPROVED')"
+    )
+    conn.execute(
+        """
+        INSERT INTO workforce_staging
+        (person_id, action_type, specialty_name, region_name, workplace_name, status, batch_id)
+        VALUES ('P1', 'NEW', 'S1', 'R1', 'W1', 'APPROVED', 1)
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    apply_engine.apply_batch(1, share_dimension_cache=True)
+    assert apply_engine._shared_dimension_cache is not None
+    conn = sqlite3.connect(db_path)
+    shared = apply_engine._dimension_cache_for_apply(conn.cursor(), shared=True)
+    assert shared.get_id("specialties", "S1") == 1
+
+    # A write that bumps the data version, like a reload through the import
+    # scripts, retires the shared cache.
+    conn.execute("INSERT INTO specialties (specialty_name) VALUES ('S2')")
+    bump_data_version(conn)
+    conn.commit()
+    assert apply_engine._dimension_cache_for_apply(conn.cursor(), shared=True).get_id("specialties", "S2") == 2
+    conn.close()
+
+    apply_engine.invalidate_dimension_cache()
+    assert apply_engine._shared_dimension_cache is None
+
+
+def test_apply_batch_keeps_count_cube_in_step(make_workforce_db, monkeypatch):
+    from cbi.count_cube import rebuild_count_cube
+
+    for mode in ("row", "set"):
+        db_path = make_workforce_db(f"workforce_cube_{mode}.db")
+        batch_id = _seed_mixed_batch(db_path)
+        conn = sqlite3.connect(db_path)
+        rebuild_count_cube(conn)
+        conn.commit()
+        conn.close()
+
+        monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+        apply_engine.apply_batch(batch_id, mode=mode)
+
+        conn = sqlite3.connect(db_path)
+        query = "SELECT * FROM workforce_count_cube ORDER BY 1, 2, 3"
+        maintained = conn.execute(query).fetchall()
+        rebuild_count_cube(conn)
+        assert maintained == conn.execute(query).fetchall()
+        assert sum(row[3] for row in maintained) == conn.execute("SELECT COUNT(*) FROM persons").fetchone()[0]
+        conn.close()
+
+
+def test_apply_batch_refreshes_materialized_canonical_base(make_workforce_db, monkeypatch):
+    from cbi.canonical_data import refresh_canonical_base
+
+    view_rows = "SELECT * FROM v_workforce_base_canonical ORDER BY person_id"
+    table_rows = "SELECT * FROM workforce_base_canonical ORDER BY person_id"
+
+    for mode in ("row", "set"):
+        db_path = make_workforce_db(f"workforce_canonical_{mode}.db")
+        batch_id = _seed_mixed_batch(db_path)
+        conn = sqlite3.connect(db_path)
+        load_import_module("13_materialize_canonical_base.py").materialize_canonical_base(conn)
+        conn.commit()
+        conn.close()
+
+        monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+        apply_engine.apply_batch(batch_id, mode=mode)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute(table_rows).fetchall() == conn.execute(view_rows).fetchall()
+
+        person_id, specialty_name = conn.execute(table_rows).fetchone()[:2]
+        conn.execute("INSERT INTO specialty_aliases VALUES (?, 'Renamed')", (specialty_name,))
+        refresh_canonical_base(conn)
+        assert conn.execute(table_rows).fetchall() == conn.execute(view_rows).fetchall()
+        assert conn.execute(
+            "SELECT specialty_name FROM workforce_base_canonical WHERE person_id = ?", (person_id,)
+        ).fetchone() == ("Renamed",)
+        conn.close()
+
+
+def test_readers_proceed_while_a_batch_is_applied(make_workforce_db, monkeypatch):
+    import threading
+    import time
+
+    from cbi.connections import connect, read_connection
+
+    db_path = make_workforce_db("workforce_wal.db")
+    batch_id = _seed_mixed_batch(db_path)
+    monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+
+    # Hold apply_batch inside its write transaction, just before the commit.
+    in_transaction = threading.Event()
+    resume = threading.Event()
+    bump = apply_engine.bump_data_version
+
+    def paused_bump(conn):
+        bump(conn)
+        in_transaction.set()
+        assert resume.wait(10)
+
+    monkeypatch.setattr(apply_engine, "bump_data_version", paused_bump)
+
+    persons = "SELECT * FROM persons ORDER BY person_id"
+    # A reader that keeps one read transaction open across the whole apply.
+    long_reader = connect(db_path, read_only=True)
+    long_reader.execute("BEGIN")
+    before = long_reader.execute(persons).fetchall()
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(apply_engine.apply_batch(batch_id)))
+    worker.start()
+    try:
+        assert in_transaction.wait(10)
+        started = time.perf_counter()
+        with read_connection(db_path) as conn:
+            assert conn.execute(persons).fetchall() == before
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert time.perf_counter() - started < 1
+    finally:
+        resume.set()
+        worker.join(10)
+
+    # The open reader did not hold up the commit and still sees its snapshot.
+    assert results and results[0]["batch_status"] == "PARTIAL_APPLIED"
+    assert long_reader.execute(persons).fetchall() == before
+    long_reader.rollback()
+    assert long_reader.execute(persons).fetchall() != before
+    long_reader.close()
+
+
+def test_noop_updates_are_elided_in_both_modes(make_workforce_db, monkeypatch):
+    results = {}
+    snapshots = {}
+    writes = {}
+    for mode in ("row", "set"):
+        for policy in apply_engine.NOOP_AUDIT_POLICIES:
+            db_path = make_workforce_db(f"workforce_{mode}_{policy}.db")
+            batch_id = _seed_mixed_batch(db_path)
+            conn = sqlite3.connect(db_path)
+            conn.executescript(
+                """
+                CREATE TABLE person_writes (person_id TEXT);
+                CREATE TRIGGER trg_log_person_update AFTER UPDATE ON persons
+                BEGIN
+                    INSERT INTO person_writes VALUES (NEW.person_id);
+                END;
+                """
+            )
+            conn.close()
+            monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+            results[mode, policy] = apply_engine.apply_batch(batch_id, mode=mode, noop_audit=policy)
+            snapshots[mode, policy] = _snapshot(db_path)
+            conn = sqlite3.connect(db_path)
+            writes[mode, policy] = conn.execute("SELECT COUNT(*) FROM person_writes").fetchone()[0]
+            conn.close()
+
+    for policy in apply_engine.NOOP_AUDIT_POLICIES:
+        assert results["set", policy] == results["row", policy]
+        assert snapshots["set", policy] == snapshots["row", policy]
+        # P100's first UPDATE repeats its current values; P200's UPDATE is real.
+        assert results["set", policy]["elided_rows"] == 1
+        assert results["set", policy]["applied_rows"] == 5
+    assert writes["row", "record"] == 2
+    assert writes["set", "record"] == 2
+
+    recorded = snapshots["set", "record"]
+    skipped = snapshots["set", "skip"]
+    assert recorded["persons"] == skipped["persons"]
+    assert recorded["staging"] == skipped["staging"]
+    assert [row[1:] for row in recorded["audit"] if "No data change" not in row[4]] == [row[1:] for row in skipped["audit"]]
+    assert len(recorded["audit"]) == len(skipped["audit"]) + 1
+
+
+def test_apply_batch_rejects_unknown_noop_audit_policy(workforce_db, monkeypatch):
+    db_path = workforce_db
+    monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+
+    with pytest.raises(ValueError, match="Unsupported no-op audit policy"):
+        apply_engine.apply_batch(1, noop_audit="bogus")
+
+
+def test_audit_summaries_use_the_stored_names():
+    assert apply_engine._new_summary(" R_A", "W_A ", " S_A ") == (
+        "Initial record created (Region=R_A, Workplace=W_A, Specialty=S_A)"
+    )
+    assert apply_engine._update_summary("S_A", "R_A", "W_A", " S_A ", "R_A ", "W_A") == "No data change detected"
+    assert apply_engine._update_summary("S_A", "R_A", "W_A", " S_B", "R_A", "W_A") == "Specialty changed: S_A -> S_B"
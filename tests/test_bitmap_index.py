@@ -0,0 +1,74 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from cbi.bitmap_index import BitmapIndex, BitmapIndexStore
+
+
+def make_frame(rows: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame(
+        {
+            "person_id": [f"P{i}" for i in range(rows)],
+            "specialty_name": rng.choice(["Nursing", "Surgery", "Pharmacy", None], rows),
+            "region_name": rng.choice(["North", "South", "East"], rows),
+            "workplace_name": rng.choice([f"Clinic {i}" for i in range(20)] + [None], rows),
+        }
+    )
+    for column in ("region_name", "workplace_name", "specialty_name"):
+        df[column] = df[column].astype("category")
+    return df
+
+
+def test_bitmap_index_matches_pandas_filters():
+    df = make_frame()
+    index = BitmapIndex(df)
+
+    selections = [
+        {},
+        {"regions": ["North"]},
+        {"regions": ["North", "East"], "specialties": ["Surgery"]},
+        {"workplaces": ["Clinic 3", "Clinic 11"], "specialties": ["Nursing", "Pharmacy"]},
+        {"regions": ["Nowhere"]},
+    ]
+    for selection in selections:
+        mask = pd.Series(True, index=df.index)
+        for column, key in (("region_name", "regions"), ("workplace_name", "workplaces"), ("specialty_name", "specialties")):
+            if selection.get(key):
+                mask &= df[column].isin(selection[key])
+        expected = df[mask]
+
+        assert index.count(**selection) == len(expected)
+        pd.testing.assert_frame_equal(index.frame(**selection), expected)
+        for column in ("region_name", "workplace_name", "specialty_name"):
+            assert index.options(column, **selection) == sorted(expected[column].dropna().unique().tolist())
+
+
+def test_bitmap_index_store_reloads_once_per_version(workforce_db):
+    conn = sqlite3.connect(workforce_db)
+    conn.executescript(
+        """
+        INSERT INTO specialties (specialty_name) VALUES ('Nursing');
+        INSERT INTO regions (region_name) VALUES ('North');
+        INSERT INTO workplaces (workplace_name) VALUES ('Clinic A');
+        INSERT INTO persons VALUES ('P1', 1, 1, 1);
+        """
+    )
+    version = {"value": 1}
+    store = BitmapIndexStore(workforce_db, version_fn=lambda _: version["value"])
+
+    index = store.get()
+    assert isinstance(index.df["region_name"].dtype, pd.CategoricalDtype)
+    assert store.get() is index
+
+    conn.execute("INSERT INTO persons VALUES ('P2', 1, 1, 1)")
+    conn.commit()
+    conn.close()
+    assert store.get() is index
+
+    version["value"] = 2
+    reloaded = store.get()
+    assert reloaded is not index
+    assert reloaded.count(regions=["North"]) == 2
+    assert store.snapshot() == (2, reloaded)
@@ -0,0 +1,39 @@
+import sqlite3
+from pathlib import Path
+
+from cbi.canonical_data import canonical_filter_clause, read_canonical_base
+
+
+def seed_canonical(db_path: Path) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO specialties VALUES (1, 'Nursing'), (2, 'nurse'), (3, 'Surgery');
+        INSERT INTO specialty_aliases VALUES ('nurse', 'Nursing');
+        INSERT INTO regions VALUES (1, 'South'), (2, 'North');
+        INSERT INTO workplaces VALUES (1, 'Clinic B'), (2, 'Clinic A');
+        INSERT INTO persons VALUES
+            ('P1', 1, 1, 1),
+            ('P2', 2, 2, 2),
+            ('P3', 3, 1, NULL);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_read_canonical_base_pushes_filters_into_sql(workforce_db):
+    db_path = workforce_db
+    seed_canonical(db_path)
+    conn = sqlite3.connect(db_path)
+
+    clause, params = canonical_filter_clause(["South"], [], ["Nursing", "Surgery"])
+    assert clause == "WHERE 1 = 1 AND region_name IN (?) AND specialty_name IN (?,?)"
+    assert params == ["South", "Nursing", "Surgery"]
+
+    full = read_canonical_base(conn)
+    filtered = read_canonical_base(conn, regions=["South"], specialties=["Surgery"])
+    assert filtered["person_id"].tolist() == ["P3"]
+    expected = full[(full["region_name"] == "South") & (full["specialty_name"] == "Surgery")]
+    assert filtered["person_id"].tolist() == expected["person_id"].tolist()
+    conn.close()
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from cbi.connections import ConnectionPool, checkpoint, connect, get_pool, read_connection, write_connection
+
+
+def _make_db(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.close()
+
+
+def test_connections_apply_pragmas(tmp_path):
+    db_path = tmp_path / "pragmas.db"
+    _make_db(db_path)
+
+    conn = connect(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    conn.close()
+
+    reader = connect(db_path, read_only=True)
+    assert reader.execute("PRAGMA query_only").fetchone()[0] == 1
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("INSERT INTO t VALUES (1)")
+    reader.close()
+
+
+def test_pool_reuses_connections_and_resets_them(tmp_path):
+    db_path = tmp_path / "pool.db"
+    _make_db(db_path)
+    pool = ConnectionPool(db_path, max_idle=1)
+
+    with pool.connection() as conn:
+        conn.row_factory = sqlite3.Row
+        conn.execute("INSERT INTO t VALUES (1)")
+    assert len(pool) == 1
+
+    with pool.connection() as again:
+        assert again is conn
+        assert again.row_factory is None
+        # The uncommitted insert was rolled back on release.
+        assert again.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+        with pool.connection() as extra:
+            assert extra is not conn
+    assert len(pool) == 1
+
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_read_and_write_pools_are_separate(tmp_path):
+    db_path = tmp_path / "shared.db"
+    _make_db(db_path)
+
+    assert get_pool(db_path) is get_pool(db_path)
+    assert get_pool(db_path) is not get_pool(db_path, read_only=True)
+
+    with write_connection(db_path) as conn:
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+    with read_connection(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 1
+
+
+def test_first_reader_switches_database_to_wal(tmp_path):
+    db_path = tmp_path / "wal.db"
+    _make_db(db_path)
+
+    reader = connect(db_path, read_only=True)
+    assert reader.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    writer = connect(db_path)
+    writer.execute("INSERT INTO t VALUES (1)")
+    writer.commit()
+    busy, log_pages, checkpointed = checkpoint(writer, "TRUNCATE")
+    assert busy == 0 and log_pages == checkpointed == 0
+    with pytest.raises(ValueError):
+        checkpoint(writer, "EVERYTHING")
+
+    writer.close()
+    reader.close()
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pandas as pd
+
+from cbi.connections import read_connection
+from cbi.count_cube import CountCube, count_cube_exists, rebuild_count_cube
+
+
+def seed_cube(conn: sqlite3.Connection) -> sqlite3.Connection:
+    conn.executescript(
+        """
+        INSERT INTO specialties VALUES (1, 'Nursing'), (2, 'nurse'), (3, 'Surgery');
+        INSERT INTO specialty_aliases VALUES ('nurse', 'Nursing');
+        INSERT INTO regions VALUES (1, 'South'), (2, 'North');
+        INSERT INTO workplaces VALUES (1, 'Clinic B'), (2, 'Clinic A');
+        INSERT INTO persons VALUES
+            ('P1', 1, 1, 1),
+            ('P2', 2, 1, 1),
+            ('P3', 3, 1, 2),
+            ('P4', 3, 2, 2),
+            ('P5', 1, 2, NULL),
+            ('P6', NULL, 2, 2);
+        """
+    )
+    return conn
+
+
+def test_count_cube_answers_options_and_totals(workforce_conn):
+    conn = seed_cube(workforce_conn)
+    cube = CountCube.from_connection(conn)
+
+    assert cube.options("region_name") == ["North", "South"]
+    assert cube.options("workplace_name", regions=["North"]) == ["Clinic A"]
+    assert cube.options("specialty_name", regions=["South"], workplaces=["Clinic B"]) == ["Nursing"]
+    assert cube.totals() == {"persons": 5, "regions": 2, "workplaces": 2, "specialties": 2}
+    assert cube.totals(regions=["South"], specialties=["Nursing"])["persons"] == 2
+
+
+def test_reading_the_cube_never_builds_it(workforce_db):
+    conn = sqlite3.connect(workforce_db)
+    seed_cube(conn)
+    conn.commit()
+    conn.close()
+
+    with read_connection(workforce_db) as conn:
+        live = CountCube.from_connection(conn).cells
+        assert not count_cube_exists(conn)
+
+    conn = sqlite3.connect(workforce_db)
+    rebuild_count_cube(conn)
+    conn.commit()
+    built = CountCube.from_connection(conn).cells
+    conn.close()
+
+    columns = ["region_name", "workplace_name", "specialty_name"]
+    pd.testing.assert_frame_equal(
+        live.sort_values(columns, na_position="first").reset_index(drop=True),
+        built.sort_values(columns, na_position="first").reset_index(drop=True),
+    )
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pandas as pd
+
+from cbi.data_version import DataVersionTracker, bump_data_version, read_write_counter
+from conftest import load_import_module
+
+
+def test_tracker_moves_on_commits_from_other_connections(tmp_path):
+    db_path = tmp_path / "version.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+
+    tracker = DataVersionTracker(db_path)
+    first = tracker.current()
+    assert tracker.current() == first
+
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    second = tracker.current()
+    assert second > first
+    assert tracker.current() == second
+
+    bump_data_version(conn)
+    conn.commit()
+    assert read_write_counter(conn) == 1
+    assert tracker.current() > second
+
+    conn.execute("INSERT INTO t VALUES (2)")
+    assert tracker.current() == second + 1  # uncommitted writes are invisible
+
+    conn.close()
+    tracker.close()
+
+
+def test_import_loaders_bump_databases_without_a_version_table(workforce_conn):
+    # Databases bootstrapped before the counter existed.
+    workforce_conn.execute("DROP TABLE cbi_data_version")
+    df = pd.DataFrame({"civil id": ["1"], "final specialty": ["S1"], "region": ["R1"], "workplace": ["W1"]})
+
+    load_import_module("02_load_dimensions.py").load_dimensions(workforce_conn, df)
+    assert read_write_counter(workforce_conn) == 1
+    load_import_module("08_load_specialty_aliases.py").load_specialty_aliases(workforce_conn)
+    assert read_write_counter(workforce_conn) == 2
@@ -0,0 +1,42 @@
+from cbi.export_cache import ExportCache, make_export_key
+
+
+def test_export_key_ignores_selection_order_and_duplicates():
+    key = make_export_key(["R2", "R1"], [], ["S1", "S1"], 7, include_drilldown=True)
+
+    assert key == make_export_key(["R1", " R2"], None, ["S1"], 7, include_drilldown=True)
+    assert key != make_export_key(["R1", "R2"], [], ["S1"], 8, include_drilldown=True)
+    assert key != make_export_key(["R1", "R2"], [], ["S1"], 7, include_drilldown=False)
+
+
+def test_export_cache_evicts_least_recently_used_by_bytes():
+    cache = ExportCache(max_bytes=10)
+    built = []
+
+    def build(data):
+        def _build():
+            built.append(data)
+            return data
+
+        return _build
+
+    key_a = make_export_key(["A"], [], [], 1)
+    key_b = make_export_key(["B"], [], [], 1)
+    key_c = make_export_key(["C"], [], [], 1)
+
+    assert cache.get_or_build(key_a, build(b"aaaa")) == b"aaaa"
+    assert cache.get_or_build(key_a, build(b"xxxx")) == b"aaaa"
+    cache.get_or_build(key_b, build(b"bbbb"))
+    cache.get(key_a)
+    cache.get_or_build(key_c, build(b"cccc"))
+
+    assert built == [b"aaaa", b"bbbb", b"cccc"]
+    assert key_a in cache and key_c in cache and key_b not in cache
+    assert cache.total_bytes == 8
+
+    cache.put(make_export_key(["D"], [], [], 1), b"d" * 11)
+    assert len(cache) == 2
+
+    cache.discard_versions_except(2)
+    assert len(cache) == 0 and cache.total_bytes == 0
+
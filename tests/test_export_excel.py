@@ -6,7 +6,7 @@ from openpyxl import load_workbook
 
 
 def load_export_module():
-    module_path = Path(__file__).resolve().parents[1] / "import" / "06_export_excel.py"
+    module_path = Path(__file__).resolve().parents[1] / "cbi" / "excel_export.py"
     spec = spec_from_file_location("export_module_for_tests", module_path)
     module = module_from_spec(spec)
     assert spec.loader is not None
@@ -56,11 +56,12 @@ def test_export_official_excel_includes_original_csv_drilldown(tmp_path):
 
     # Redirect drilldown source for this test.
     module.CSV_PATH = source_csv
+    module.DRILLDOWN_CACHE_DIR = tmp_path / "cache"
 
     base_df = pd.DataFrame(
         [
-            {"person_id": "P1", "region_name": "R1", "workplace_name": "W1", "specialty_name": "F1"},
-            {"person_id": "P2", "region_name": "R2", "workplace_name": "W2", "specialty_name": "F2"},
+            {"person_id": "1", "region_name": "R1", "workplace_name": "W1", "specialty_name": "F1"},
+            {"person_id": "2", "region_name": "R2", "workplace_name": "W2", "specialty_name": "F2"},
         ]
     )
 
@@ -97,3 +98,150 @@ def test_export_official_excel_validates_required_columns(tmp_path):
         assert "Missing required columns" in str(exc)
     else:
         raise AssertionError("Expected ValueError for missing required columns")
+
+
+def test_drilldown_source_is_served_from_columnar_cache(tmp_path, monkeypatch):
+    module = load_export_module()
+
+    source_csv = tmp_path / "source.csv"
+    pd.DataFrame(
+        {
+            "civil id": ["1", "2", "3", "4"],
+            "full name": ["Alice", "Bob", None, "Dan"],
+            "region": ["R1", "R1", "R2", None],
+            "pay grade": [1.0, None, 3.0, 4.0],
+        }
+    ).to_csv(source_csv, index=False)
+    module.CSV_PATH = source_csv
+    module.DRILLDOWN_CACHE_DIR = tmp_path / "cache"
+
+    from_csv = module._load_original_drilldown_data()
+    assert len(list(module.DRILLDOWN_CACHE_DIR.iterdir())) == 1
+
+    def fail_read_csv(*args, **kwargs):
+        raise AssertionError("CSV should not be parsed on a cache hit")
+
+    monkeypatch.setattr(module.pd, "read_csv", fail_read_csv)
+    from_cache = module._load_original_drilldown_data()
+
+    pd.testing.assert_frame_equal(from_cache.astype(object), from_csv.astype(object))
+
+
+def test_drilldown_sheet_is_limited_to_exported_persons(tmp_path):
+    module = load_export_module()
+
+    source_csv = tmp_path / "source.csv"
+    pd.DataFrame(
+        {
+            "civil id": [101, 102, 103, 102],
+            "full name": ["Alice", "Bob", "Carol", "Bob (dup)"],
+            "region": ["R1", "R1", "R2", "R1"],
+        }
+    ).to_csv(source_csv, index=False)
+    module.CSV_PATH = source_csv
+    module.DRILLDOWN_CACHE_DIR = tmp_path / "cache"
+
+    base_df = pd.DataFrame(
+        [
+            {"person_id": "102", "region_name": "R1", "workplace_name": "W1", "specialty_name": "F1"},
+            {"person_id": "103", "region_name": "R2", "workplace_name": "W2", "specialty_name": "F2"},
+        ]
+    )
+
+    output_path = tmp_path / "out.xlsx"
+    module.export_official_excel(base_df, output_path)
+    ws_drilldown = load_workbook(output_path)["Drilldown_Filtered"]
+    names = [ws_drilldown.cell(r, 2).value for r in range(2, ws_drilldown.max_row + 1)]
+    assert names == ["Bob", "Carol", "Bob (dup)"]
+
+    module.export_official_excel(base_df, output_path, include_drilldown=False)
+    assert load_workbook(output_path).sheetnames == [
+        "Region x Specialty",
+        "Region+Workplace x Specialty",
+    ]
+
+
+def test_drilldown_without_the_key_column_is_exported_whole(tmp_path):
+    module = load_export_module()
+
+    source_csv = tmp_path / "source.csv"
+    pd.DataFrame({"full name": ["Alice", "Bob"], "region": ["R1", "R2"]}).to_csv(source_csv, index=False)
+    module.CSV_PATH = source_csv
+    module.DRILLDOWN_CACHE_DIR = tmp_path / "cache"
+
+    base_df = pd.DataFrame(
+        [{"person_id": "102", "region_name": "R1", "workplace_name": "W1", "specialty_name": "F1"}]
+    )
+
+    output_path = tmp_path / "out.xlsx"
+    module.export_official_excel(base_df, output_path)
+    ws_drilldown = load_workbook(output_path)["Drilldown_Filtered"]
+    assert [ws_drilldown.cell(r, 1).value for r in range(2, ws_drilldown.max_row + 1)] == ["Alice", "Bob"]
+
+
+def _sheet_layout(ws):
+    cells = [
+        (cell.value, cell.font.b, cell.fill.fgColor.rgb, cell.border.left.style)
+        for row in ws.iter_rows()
+        for cell in row
+    ]
+    widths = {key: dim.width for key, dim in ws.column_dimensions.items() if dim.width}
+    return cells, widths, ws.freeze_panes
+
+
+def test_streaming_engine_matches_standard_layout(tmp_path):
+    module = load_export_module()
+
+    source_csv = tmp_path / "source.csv"
+    pd.DataFrame(
+        {
+            "civil id": ["1", "2", "3", "4"],
+            "full name": ["Alice", "Bob", "Carol with a very long name indeed", None],
+            "region": ["R1", "R1", "R2", "R2"],
+        }
+    ).to_csv(source_csv, index=False)
+    module.CSV_PATH = source_csv
+    module.DRILLDOWN_CACHE_DIR = tmp_path / "cache"
+
+    base_df = pd.DataFrame(
+        [
+            {"person_id": "1", "region_name": "R1", "workplace_name": "W1", "specialty_name": "F1"},
+            {"person_id": "2", "region_name": "R1", "workplace_name": "W2", "specialty_name": "Long specialty"},
+            {"person_id": "3", "region_name": "R2", "workplace_name": "W3", "specialty_name": "F1"},
+            {"person_id": "4", "region_name": "R2", "workplace_name": "W3", "specialty_name": "F1"},
+        ]
+    )
+
+    streaming_path = tmp_path / "streaming.xlsx"
+    standard_path = tmp_path / "standard.xlsx"
+    module.export_official_excel(base_df, streaming_path, engine="streaming")
+    module.export_official_excel(base_df, standard_path, engine="standard")
+
+    streaming_wb = load_workbook(streaming_path)
+    standard_wb = load_workbook(standard_path)
+    assert streaming_wb.sheetnames == standard_wb.sheetnames
+    for name in standard_wb.sheetnames:
+        assert _sheet_layout(streaming_wb[name]) == _sheet_layout(standard_wb[name])
+
+    try:
+        module.export_official_excel(base_df, streaming_path, engine="pandas")
+    except ValueError as exc:
+        assert "Unsupported export engine" in str(exc)
+    else:
+        raise AssertionError("Expected ValueError for unknown engine")
+
+
+def test_plan_column_widths_measures_dataframe_values():
+    module = load_export_module()
+
+    df = pd.DataFrame(
+        {
+            "id": ["1", "2", "3"],
+            "name": ["short", None, "a considerably longer value"],
+            "a header longer than any value": [1, 2, 3],
+        }
+    )
+
+    assert module._plan_column_widths(df, 10, 50) == [10, 29, 32]
+    assert module._plan_column_widths(df, 10, 20) == [10, 20, 20]
+    assert module._plan_column_widths(df, 7, 45, sample_rows=1) == [7, 7, 32]
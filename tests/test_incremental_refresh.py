@@ -0,0 +1,168 @@
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from conftest import load_import_module
+
+
+def master_frame(rows):
+    return pd.DataFrame(
+        rows,
+        columns=["civil id", "full name", "region", "workplace", "final specialty"],
+    )
+
+
+def bootstrap(tmp_path: Path, df: pd.DataFrame) -> sqlite3.Connection:
+    conn = sqlite3.connect(tmp_path / "workforce_test.db")
+    load_import_module("01_create_schema.py").create_schema(conn)
+    load_import_module("02_load_dimensions.py").load_dimensions(conn, df)
+    load_import_module("03_load_persons.py").load_persons(conn, df)
+    load_import_module("07_create_staging.py").create_staging(conn)
+    load_import_module("14_incremental_refresh.py").seed_fingerprints(conn, df)
+    conn.commit()
+    return conn
+
+
+def persons(conn: sqlite3.Connection) -> dict:
+    rows = conn.execute(
+        """
+        SELECT p.person_id, r.region_name, w.workplace_name, s.specialty_name
+        FROM persons p
+        LEFT JOIN regions r ON p.region_id = r.region_id
+        LEFT JOIN workplaces w ON p.workplace_id = w.workplace_id
+        LEFT JOIN specialties s ON p.specialty_id = s.specialty_id
+        """
+    ).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+ORIGINAL = [
+    ("1", "Alice", "R1", "W1", "S1"),
+    ("2", "Bob", "R1", "W2", "S2"),
+    ("3", "Carol", "R2", "W2", "S1"),
+]
+
+REFRESHED = [
+    ("1", "Alice Renamed", "R1", "W1", "S1"),
+    ("2", "Bob", "R3", "W2", "S2"),
+    ("4", "Dan", "R2", "W3", "S3"),
+]
+
+
+def test_incremental_refresh_applies_only_the_delta(tmp_path, capsys):
+    conn = bootstrap(tmp_path, master_frame(ORIGINAL))
+    module = load_import_module("14_incremental_refresh.py")
+
+    module.incremental_refresh(conn, master_frame(REFRESHED))
+    conn.commit()
+
+    assert persons(conn) == {
+        "1": ("R1", "W1", "S1"),
+        "2": ("R3", "W2", "S2"),
+        "4": ("R2", "W3", "S3"),
+    }
+    output = capsys.readouterr().out
+    assert "Inserted persons: 1" in output
+    assert "Updated persons: 1" in output
+    assert "Deleted persons: 1" in output
+    assert "Unchanged persons: 1" in output
+
+    # A second run over the same file is a no-op.
+    module.incremental_refresh(conn, master_frame(REFRESHED))
+    assert "Unchanged persons: 3" in capsys.readouterr().out
+    conn.close()
+
+
+def test_incremental_refresh_can_route_changes_through_staging(tmp_path):
+    conn = bootstrap(tmp_path, master_frame(ORIGINAL))
+    module = load_import_module("14_incremental_refresh.py")
+
+    module.incremental_refresh(conn, master_frame(REFRESHED), via_staging=True)
+    conn.commit()
+
+    batch = conn.execute("SELECT source_type, status FROM cbi_batches").fetchall()
+    assert batch == [("SYSTEM_AUTO", "PENDING")]
+    staged = conn.execute(
+        "SELECT person_id, action_type, region_name FROM workforce_staging ORDER BY person_id"
+    ).fetchall()
+    assert staged == [("2", "UPDATE", "R3"), ("4", "NEW", "R2")]
+    # Persons are untouched until the batch is reviewed and applied.
+    assert persons(conn)["2"] == ("R1", "W2", "S2")
+    conn.close()
+
+
+def test_staged_changes_only_move_fingerprints_once_applied(tmp_path, monkeypatch):
+    from cbi import apply_engine
+
+    db_path = tmp_path / "workforce_test.db"
+    conn = bootstrap(tmp_path, master_frame(ORIGINAL))
+    module = load_import_module("14_incremental_refresh.py")
+
+    def staged_batches():
+        return conn.execute(
+            "SELECT batch_id, COUNT(*) FROM workforce_staging GROUP BY batch_id ORDER BY batch_id"
+        ).fetchall()
+
+    module.incremental_refresh(conn, master_frame(REFRESHED), via_staging=True)
+    conn.commit()
+    # While the batch is open, the same delta is not staged again.
+    module.incremental_refresh(conn, master_frame(REFRESHED), via_staging=True)
+    conn.commit()
+    assert staged_batches() == [(1, 2)]
+
+    # A rejected batch leaves the stored fingerprints alone, so the next
+    # refresh stages the same delta again.
+    conn.execute("UPDATE workforce_staging SET status = 'REJECTED' WHERE batch_id = 1")
+    conn.execute("UPDATE cbi_batches SET status = 'REJECTED' WHERE batch_id = 1")
+    conn.commit()
+    module.incremental_refresh(conn, master_frame(REFRESHED), via_staging=True)
+    conn.commit()
+    assert staged_batches() == [(1, 2), (2, 2)]
+
+    conn.execute("UPDATE workforce_staging SET status = 'APPROVED' WHERE batch_id = 2")
+    conn.execute("UPDATE cbi_batches SET status = 'APPROVED' WHERE batch_id = 2")
+    conn.commit()
+    monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+    assert apply_engine.apply_batch(2)["batch_status"] == "APPLIED"
+
+    module.incremental_refresh(conn, master_frame(REFRESHED), via_staging=True)
+    conn.commit()
+    assert staged_batches() == [(1, 2), (2, 2)]
+    assert conn.execute("SELECT COUNT(*) FROM staged_fingerprints").fetchone()[0] == 0
+    conn.close()
+
+
+def test_refresh_matches_dimension_names_without_case(tmp_path):
+    conn = bootstrap(tmp_path, master_frame(ORIGINAL))
+    module = load_import_module("14_incremental_refresh.py")
+
+    refreshed = [
+        ("1", "Alice", "r1", "W1", "S9"),
+        ("2", "Bob", "R1", "W2", "s9"),
+        ("3", "Carol", "R2", "W2", "S1"),
+    ]
+    module.incremental_refresh(conn, master_frame(refreshed))
+    conn.commit()
+
+    assert persons(conn) == {
+        "1": ("R1", "W1", "S9"),
+        "2": ("R1", "W2", "S9"),
+        "3": ("R2", "W2", "S1"),
+    }
+    # One new specialty, with the next id.
+    specialties = conn.execute("SELECT specialty_id, specialty_name FROM specialties WHERE specialty_name = 'S9'")
+    assert specialties.fetchall() == [(3, "S9")]
+    conn.close()
+
+
+def test_schema_rebuild_drops_staged_fingerprints(tmp_path):
+    conn = bootstrap(tmp_path, master_frame(ORIGINAL))
+    load_import_module("14_incremental_refresh.py").incremental_refresh(conn, master_frame(REFRESHED), via_staging=True)
+    conn.commit()
+    assert conn.execute("SELECT COUNT(*) FROM staged_fingerprints").fetchone()[0] == 2
+
+    load_import_module("01_create_schema.py").create_schema(conn)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not tables & {"person_fingerprints", "staged_fingerprints"}
+    conn.close()
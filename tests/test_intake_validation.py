@@ -0,0 +1,150 @@
+import sqlite3
+from pathlib import Path
+
+from cbi import apply_engine
+from cbi.intake_validation import INTAKE_ERROR, validate_staged_batch
+
+
+def seed_intake_batch(db_path: Path) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO specialties (specialty_name) VALUES ('Cardiology'), ('Cardio');
+        INSERT INTO regions (region_name) VALUES ('North');
+        INSERT INTO workplaces (workplace_name) VALUES ('Clinic');
+        INSERT INTO specialty_aliases VALUES ('Cardio', 'Cardiology');
+        INSERT INTO persons VALUES ('P1', 1, 1, 1);
+        INSERT INTO cbi_batches (batch_name, source_type) VALUES ('upload.csv', 'FILE_UPLOAD');
+        """
+    )
+    staged = [
+        ("P1", "NEW", "Cardiology", "North", "Clinic", None),        # exists
+        ("P2", "NEW", "Cardiology", "North", "Clinic", "first"),     # ok
+        ("P2", "NEW", "Cardiology", "North", "Clinic", None),        # duplicate NEW
+        ("P2", "UPDATE", "Cardio", "North", "Clinic", None),         # alias, ok via earlier NEW
+        ("P2", "UPDATE", "Cardio", "North", "Clinic", None),         # duplicate row
+        ("P3", "UPDATE", "Cardiology", "North", "Clinic", None),     # not found
+        ("P1", "UPDATE", "cardiology", "North", "Clinic", None),     # case conflict
+        ("P1", "UPDATE", "Neurology", "South", "Clinic", None),      # new names
+        ("P4", "NEW", "nan", "North", "Clinic", None),               # missing name
+        ("P4", "NEW", "Cardiology", "North", "Clinic", None),        # ok, first valid NEW
+        (None, "NEW", "Cardiology", "North", "Clinic", None),        # missing person_id
+    ]
+    conn.executemany(
+        """
+        INSERT INTO workforce_staging
+        (person_id, action_type, specialty_name, region_name, workplace_name, source_note, batch_id)
+        VALUES (?, ?, ?, ?, ?, ?, 1)
+        """,
+        staged,
+    )
+    conn.commit()
+    conn.close()
+
+
+def _staging(conn):
+    return conn.execute("SELECT staging_id, status, source_note FROM workforce_staging ORDER BY staging_id").fetchall()
+
+
+def test_validate_staged_batch_annotates_rows_in_bulk(workforce_db):
+    db_path = workforce_db
+    seed_intake_batch(db_path)
+    conn = sqlite3.connect(db_path)
+
+    result = validate_staged_batch(conn, 1)
+    conn.commit()
+
+    assert result["checked_rows"] == 11
+    assert result["error_rows"] == result["rejected_rows"] == 6
+    assert result["issue_counts"] == {
+        "alias_name": 2,
+        "duplicate_new": 1,
+        "duplicate_row": 1,
+        "missing_name": 1,
+        "missing_person_id": 1,
+        "name_case_conflict": 1,
+        "new_person_exists": 1,
+        "unknown_name": 2,
+        "update_person_missing": 1,
+    }
+
+    rows = _staging(conn)
+    assert [status for _, status, _ in rows] == [
+        "REJECTED", "PENDING", "REJECTED", "PENDING", "PENDING", "REJECTED",
+        "REJECTED", "PENDING", "REJECTED", "PENDING", "REJECTED",
+    ]
+    assert set(conn.execute("SELECT DISTINCT status, reject_reason FROM workforce_staging")) == {
+        ("PENDING", None),
+        ("REJECTED", INTAKE_ERROR),
+    }
+    notes = {staging_id: note for staging_id, _, note in rows}
+    assert notes[1] == "INTAKE_ERROR: person_id already exists for NEW action"
+    assert notes[2] == "first"
+    assert notes[3] == "INTAKE_ERROR: Duplicate NEW for person_id in this batch (first is staging row 2)"
+    assert notes[5] == (
+        "INTAKE_WARNING: Duplicate of staging row 4 | "
+        "INTAKE_WARNING: specialty 'Cardio' is an alias of 'Cardiology'"
+    )
+    assert notes[7] == "INTAKE_ERROR: specialty_name 'cardiology' differs only in case from existing 'Cardiology'"
+    assert notes[8] == "INTAKE_WARNING: New specialty will be created: Neurology | INTAKE_WARNING: New region will be created: South"
+    assert notes[9] == "INTAKE_ERROR: Missing value for specialty_name"
+    assert notes[10] is None
+    assert notes[11] == "INTAKE_ERROR: NEW record is missing person_id"
+    conn.close()
+
+
+def test_intake_errors_match_apply_rejections(workforce_db, monkeypatch):
+    db_path = workforce_db
+    seed_intake_batch(db_path)
+    conn = sqlite3.connect(db_path)
+    validate_staged_batch(conn, 1, reject_errors=False)
+    conn.execute("UPDATE workforce_staging SET status = 'APPROVED'")
+    conn.commit()
+    flagged = {
+        row[0]
+        for row in conn.execute(
+            "SELECT staging_id FROM workforce_staging WHERE source_note LIKE ?", (f"%{INTAKE_ERROR}%",)
+        )
+    }
+    conn.close()
+
+    monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+    apply_engine.apply_batch(1)
+
+    conn = sqlite3.connect(db_path)
+    rejected = {row[0] for row in conn.execute("SELECT staging_id FROM workforce_staging WHERE status = 'REJECTED'")}
+    conn.close()
+    assert flagged == rejected
+
+
+def test_update_of_a_person_staged_as_new_in_another_batch_is_kept(workforce_db):
+    conn = sqlite3.connect(workforce_db)
+    conn.executescript(
+        """
+        INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('hires.csv', 'FILE_UPLOAD', 'APPROVED');
+        INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('moves.csv', 'FILE_UPLOAD', 'PENDING');
+        INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('dropped.csv', 'FILE_UPLOAD', 'REJECTED');
+        """
+    )
+    conn.executemany(
+        """
+        INSERT INTO workforce_staging
+        (person_id, action_type, specialty_name, region_name, workplace_name, status, batch_id)
+        VALUES (?, ?, 'Cardiology', 'North', 'Clinic', ?, ?)
+        """,
+        [
+            ("P5", "NEW", "APPROVED", 1),
+            ("P6", "NEW", "REJECTED", 3),
+            ("P5", "UPDATE", "PENDING", 2),
+            ("P6", "UPDATE", "PENDING", 2),
+        ],
+    )
+
+    result = validate_staged_batch(conn, 2)
+
+    # Only the NEW that can still be applied vouches for its person.
+    assert result["issue_counts"].get("update_person_missing") == 1
+    assert conn.execute(
+        "SELECT person_id, status FROM workforce_staging WHERE batch_id = 2 ORDER BY staging_id"
+    ).fetchall() == [("P5", "PENDING"), ("P6", "REJECTED")]
+    conn.close()
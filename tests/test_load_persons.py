@@ -0,0 +1,127 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from conftest import load_import_module
+
+
+def load_persons_row_by_row(conn: sqlite3.Connection, df: pd.DataFrame, warnings_path: Path) -> None:
+    """
+    The original iterrows loader of 03_load_persons.py, kept as the reference.
+    """
+    cur = conn.cursor()
+
+    def build_map(table, id_col, name_col):
+        mapping = {}
+        for _id, name in cur.execute(f"SELECT {id_col}, {name_col} FROM {table}").fetchall():
+            if name is None:
+                continue
+            normalized = str(name).strip()
+            if normalized:
+                mapping[normalized] = _id
+        return mapping
+
+    specialty_map = build_map("specialties", "specialty_id", "specialty_name")
+    region_map = build_map("regions", "region_id", "region_name")
+    workplace_map = build_map("workplaces", "workplace_id", "workplace_name")
+
+    warnings = []
+    for idx, row in df.iterrows():
+        person_id = str(row.get("civil id")).strip()
+        if not person_id or person_id.lower() == "nan":
+            warnings.append({"row_index": idx, "issue": "missing_civil_id"})
+            continue
+        if cur.execute("SELECT 1 FROM persons WHERE person_id = ?", (person_id,)).fetchone():
+            warnings.append({"row_index": idx, "person_id": person_id, "issue": "duplicate_civil_id"})
+            continue
+
+        specialty_id = specialty_map.get(str(row.get("final specialty")).strip())
+        region_id = region_map.get(str(row.get("region")).strip())
+        workplace_id = workplace_map.get(str(row.get("workplace")).strip())
+        if specialty_id is None:
+            warnings.append({"row_index": idx, "person_id": person_id, "issue": "missing_specialty"})
+        if region_id is None:
+            warnings.append({"row_index": idx, "person_id": person_id, "issue": "missing_region"})
+        if workplace_id is None:
+            warnings.append({"row_index": idx, "person_id": person_id, "issue": "missing_workplace"})
+
+        cur.execute(
+            "INSERT INTO persons (person_id, specialty_id, region_id, workplace_id) VALUES (?, ?, ?, ?)",
+            (person_id, specialty_id, region_id, workplace_id),
+        )
+
+    if warnings:
+        pd.DataFrame(warnings).to_csv(warnings_path, index=False)
+
+
+def seed_dimensions(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO specialties (specialty_name) VALUES ('Nursing'), ('Surgery');
+        INSERT INTO regions (region_name) VALUES ('North'), ('South');
+        INSERT INTO workplaces (workplace_name) VALUES ('Clinic A'), ('Clinic B');
+        INSERT INTO persons VALUES ('P9', 1, 1, 1);
+        """
+    )
+    return conn
+
+
+def dirty_frame(first_id: object) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "civil id": [first_id, " P1 ", "P2", "P1", "P9", np.nan, "nan", "P3", "P4"],
+            "final specialty": [" Nursing", "Surgery", "Dentistry", "Nursing", "Nursing", "Nursing", "Surgery", np.nan, "Surgery"],
+            "region": ["North", "South ", "North", "North", "South", "North", "North", "Nowhere", "South"],
+            "workplace": ["Clinic A", "Clinic B", "Clinic A", "Clinic C", "Clinic A", "Clinic B", "Clinic A", np.nan, " Clinic B"],
+        },
+        index=range(10, 19),
+    )
+
+
+def test_vectorized_loader_matches_row_by_row_loader(make_workforce_db, monkeypatch):
+    module = load_import_module("03_load_persons.py")
+
+    # A leading missing id changes the column order of the warnings file.
+    for first_id in ("P0", ""):
+        df = dirty_frame(first_id)
+
+        reference_db = make_workforce_db(f"reference_{first_id or 'blank'}.db")
+        reference_warnings = reference_db.with_suffix(".csv")
+        conn = seed_dimensions(reference_db)
+        load_persons_row_by_row(conn, df, reference_warnings)
+        expected = conn.execute("SELECT * FROM persons ORDER BY rowid").fetchall()
+        conn.close()
+
+        vectorized_db = make_workforce_db(f"vectorized_{first_id or 'blank'}.db")
+        vectorized_warnings = vectorized_db.with_suffix(".csv")
+        monkeypatch.setattr(module, "WARNINGS_PATH", vectorized_warnings)
+        conn = seed_dimensions(vectorized_db)
+        module.load_persons(conn, df)
+        assert conn.execute("SELECT * FROM persons ORDER BY rowid").fetchall() == expected
+        conn.close()
+
+        assert vectorized_warnings.read_text() == reference_warnings.read_text()
+
+
+def test_loader_rebuilds_the_derived_tables(workforce_db, monkeypatch, tmp_path):
+    module = load_import_module("03_load_persons.py")
+    monkeypatch.setattr(module, "WARNINGS_PATH", tmp_path / "warnings.csv")
+    conn = seed_dimensions(workforce_db)
+    load_import_module("12_create_count_cube.py").create_count_cube(conn)
+    load_import_module("13_materialize_canonical_base.py").materialize_canonical_base(conn)
+
+    module.load_persons(conn, dirty_frame("P0"))
+    assert conn.execute("SELECT SUM(person_count) FROM workforce_count_cube").fetchone()[0] == 6
+    assert (
+        conn.execute("SELECT * FROM workforce_base_canonical ORDER BY person_id").fetchall()
+        == conn.execute("SELECT * FROM v_workforce_base_canonical ORDER BY person_id").fetchall()
+    )
+
+    # A schema rebuild drops them with the tables they are derived from.
+    load_import_module("01_create_schema.py").create_schema(conn)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not tables & {"workforce_count_cube", "workforce_base_canonical"}
+    conn.close()
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pandas as pd
+
+from cbi.pagination import count_rows, fetch_keyset_page, keyset_slice
+
+
+def make_staging() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE workforce_staging (staging_id INTEGER PRIMARY KEY, status TEXT)")
+    conn.execute("CREATE INDEX idx_staging_status ON workforce_staging(status)")
+    conn.executemany(
+        "INSERT INTO workforce_staging VALUES (?, ?)",
+        [(i, "PENDING" if i % 3 else "APPROVED") for i in range(1, 101)],
+    )
+    return conn
+
+
+def walk(fetch, key):
+    seen, after = [], None
+    while True:
+        page = fetch(after)
+        if page.empty:
+            return seen
+        seen.extend(page[key].tolist())
+        after = page[key].iloc[-1].item()
+
+
+def test_keyset_pages_cover_the_filtered_rows_once():
+    conn = make_staging()
+    where, params = "WHERE status IN (?)", ["PENDING"]
+
+    ids = walk(
+        lambda after: fetch_keyset_page(
+            conn, "workforce_staging", ["staging_id"], "staging_id", where, params, after=after, limit=7
+        ),
+        "staging_id",
+    )
+    assert ids == [i for i in range(1, 101) if i % 3]
+    assert count_rows(conn, "workforce_staging", where, params) == len(ids)
+
+    newest_first = walk(
+        lambda after: fetch_keyset_page(
+            conn, "workforce_staging", ["staging_id"], "staging_id", after=after, limit=9, descending=True
+        ),
+        "staging_id",
+    )
+    assert newest_first == list(range(100, 0, -1))
+
+
+def test_keyset_slice_pages_an_in_memory_frame():
+    df = pd.DataFrame({"person_id": ["P3", None, "P1", "P2", "P5", "P4"], "n": range(6)})
+
+    first = keyset_slice(df, "person_id", limit=3)
+    assert first["n"].tolist() == [1, 2, 3]
+    second = keyset_slice(df, "person_id", after="P2", limit=3)
+    assert second["person_id"].tolist() == ["P3", "P4", "P5"]
@@ -0,0 +1,29 @@
+import sqlite3
+
+import pandas as pd
+
+from conftest import load_import_module
+
+
+def test_run_bootstrap_loads_and_restores_wal(tmp_path):
+    csv_path = tmp_path / "workforce master.csv"
+    pd.DataFrame(
+        [
+            ("1", "Alice", "R1", "W1", "S1"),
+            ("2", "Bob", "R2", "W1", "S2"),
+        ],
+        columns=["civil id", "full name", "region", "workplace", "final specialty"],
+    ).to_csv(csv_path, index=False)
+    db_path = tmp_path / "db" / "workforce.db"
+
+    module = load_import_module("run_bootstrap.py")
+    module.run_bootstrap(db_path, csv_path)
+
+    conn = sqlite3.connect(db_path)
+    # The bulk-load PRAGMAs are undone: the file is back in WAL mode.
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("SELECT COUNT(*) FROM persons").fetchone()[0] == 2
+    assert conn.execute("SELECT SUM(person_count) FROM workforce_count_cube").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM workforce_base_canonical").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM person_fingerprints").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,140 @@
+import sqlite3
+from pathlib import Path
+
+from cbi import apply_engine
+from cbi.intake_validation import INTAKE_ERROR
+from cbi.staging_conflicts import SUPERSEDED, collapse_batch, ensure_reject_reason_column, find_batch_conflicts
+
+
+def seed_conflicts(db_path: Path) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        INSERT INTO specialties (specialty_name) VALUES ('S_A');
+        INSERT INTO regions (region_name) VALUES ('R_A');
+        INSERT INTO workplaces (workplace_name) VALUES ('W_A');
+        INSERT INTO persons VALUES ('P1', 1, 1, 1);
+        INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('first', 'MANUAL', 'APPROVED');
+        INSERT INTO cbi_batches (batch_name, source_type, status) VALUES ('second', 'MANUAL', 'PENDING');
+        """
+    )
+    staged = [
+        ("P1", "UPDATE", "S_B", "R_A", "W_A", "APPROVED", 1),
+        ("P2", "NEW", "S_A", "R_A", "W_A", "APPROVED", 1),
+        ("P1", "UPDATE", "S_C", "R_A", "W_A", "APPROVED", 1),
+        ("P2", "UPDATE", "S_B", "R_B", "W_A", "APPROVED", 1),
+        ("P3", "NEW", "S_A", "R_A", "W_A", "APPROVED", 1),
+        ("P3", "UPDATE", "S_A", "R_A", "W_B", "PENDING", 2),
+        ("P1", "UPDATE", "S_D", "R_A", "W_A", "APPLIED", 2),
+    ]
+    conn.executemany(
+        """
+        INSERT INTO workforce_staging
+        (person_id, action_type, specialty_name, region_name, workplace_name, status, batch_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        staged,
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_find_batch_conflicts_flags_in_batch_and_cross_batch_rows(workforce_db):
+    db_path = workforce_db
+    seed_conflicts(db_path)
+    conn = sqlite3.connect(db_path)
+
+    conflicts = find_batch_conflicts(conn, 1)
+
+    assert conflicts["staging_id"].tolist() == [1, 2, 3, 4, 5]
+    assert conflicts["batch_conflicts"].tolist() == [1, 1, 1, 1, 0]
+    # The APPLIED row for P1 in batch 2 is no longer a conflict.
+    assert conflicts["cross_batch_conflicts"].tolist() == [0, 0, 0, 0, 1]
+    assert conflicts.loc[conflicts["staging_id"] == 5, "other_batches"].item() == "2"
+    conn.close()
+
+
+def test_collapse_batch_keeps_last_row_per_person(workforce_db):
+    db_path = workforce_db
+    seed_conflicts(db_path)
+    conn = sqlite3.connect(db_path)
+
+    result = collapse_batch(conn, 1)
+    conn.commit()
+
+    assert result == {"batch_id": 1, "collapsed_persons": 2, "superseded_rows": 2, "converted_rows": 1}
+    rows = conn.execute(
+        """
+        SELECT staging_id, action_type, status, reject_reason, source_note
+        FROM workforce_staging
+        WHERE batch_id = 1
+        ORDER BY staging_id
+        """
+    ).fetchall()
+    assert rows == [
+        (1, "UPDATE", "REJECTED", SUPERSEDED, f"{SUPERSEDED}: by staging row 3"),
+        (2, "NEW", "REJECTED", SUPERSEDED, f"{SUPERSEDED}: by staging row 4"),
+        (3, "UPDATE", "APPROVED", None, "COLLAPSED: last of 2 rows for this person_id"),
+        # P2 only exists through the superseded NEW, so the kept row creates it.
+        (4, "NEW", "APPROVED", None, "COLLAPSED: last of 2 rows for this person_id"),
+        (5, "NEW", "APPROVED", None, None),
+    ]
+    assert find_batch_conflicts(conn, 1)["batch_conflicts"].sum() == 0
+    conn.close()
+
+
+def test_apply_batch_collapse_gives_last_write_outcome(make_workforce_db, monkeypatch):
+    outcomes = {}
+    for collapse in (False, True):
+        db_path = make_workforce_db(f"apply_{collapse}.db")
+        seed_conflicts(db_path)
+        monkeypatch.setattr(apply_engine, "DB_PATH", db_path)
+        result = apply_engine.apply_batch(1, collapse_duplicates=collapse)
+
+        conn = sqlite3.connect(db_path)
+        persons = conn.execute(
+            """
+            SELECT p.person_id, s.specialty_name, r.region_name
+            FROM persons p
+            JOIN specialties s ON s.specialty_id = p.specialty_id
+            JOIN regions r ON r.region_id = p.region_id
+            ORDER BY p.person_id
+            """
+        ).fetchall()
+        audit_rows = conn.execute("SELECT COUNT(*) FROM workforce_audit_timeline").fetchone()[0]
+        conn.close()
+        outcomes[collapse] = (result, persons, audit_rows)
+
+    plain, collapsed = outcomes[False], outcomes[True]
+    assert plain[1] == collapsed[1] == [("P1", "S_C", "R_A"), ("P2", "S_B", "R_B"), ("P3", "S_A", "R_A")]
+    assert plain[0]["applied_rows"] == 5 and plain[0]["superseded_rows"] == 0
+    assert collapsed[0]["applied_rows"] == 3 and collapsed[0]["superseded_rows"] == 2
+    assert collapsed[0]["batch_status"] == "APPLIED"
+    assert (plain[2], collapsed[2]) == (5, 3)
+
+
+def test_reject_reason_is_backfilled_for_legacy_staging_tables():
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        """
+        CREATE TABLE workforce_staging (
+            staging_id INTEGER PRIMARY KEY, status TEXT, source_note TEXT
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT INTO workforce_staging (status, source_note) VALUES (?, ?)",
+        [
+            ("REJECTED", f"{INTAKE_ERROR}: person_id not found for UPDATE action"),
+            ("REJECTED", f"{SUPERSEDED}: by staging row 4"),
+            ("REJECTED", f"reviewer says {SUPERSEDED} is wrong"),
+            ("PENDING", f"{INTAKE_ERROR}: kept for review"),
+        ],
+    )
+
+    ensure_reject_reason_column(conn)
+    ensure_reject_reason_column(conn)
+
+    reasons = conn.execute("SELECT reject_reason FROM workforce_staging ORDER BY staging_id").fetchall()
+    assert reasons == [(INTAKE_ERROR,), (SUPERSEDED,), (None,), (None,)]
+    conn.close()
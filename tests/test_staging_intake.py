@@ -0,0 +1,185 @@
+import sqlite3
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from cbi import apply_engine
+from cbi.intake_validation import validate_staged_batch
+from cbi.staging_intake import (
+    iter_upload_chunks,
+    normalize_intake_frame,
+    preview_upload,
+    stage_chunks,
+    stage_frame,
+    validate_intake_frame,
+)
+
+
+def upload_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "person_id": ["P1", np.nan, "  ", " P4 "],
+            "action_type": [" new", "NEW", "New ", "update"],
+            "specialty_name": [" S1 ", "S2", "S3", "S4"],
+            "region_name": ["R1", " R2", "R3", "R4"],
+            "workplace_name": ["W1", "W2", "W3 ", "W4"],
+            "source_note": ["first", np.nan, None, 7],
+        }
+    )
+
+
+def test_validate_intake_frame_reports_first_problem():
+    df = upload_frame()
+    assert validate_intake_frame(df) is None
+    assert validate_intake_frame(df.drop(columns="region_name")) == "Missing required columns: ['region_name']"
+    assert validate_intake_frame(df.assign(region_name=["R1", " ", "R3", "R4"])) == (
+        "Blank values in required columns: ['region_name']"
+    )
+    assert validate_intake_frame(df.assign(action_type="DELETE")).startswith("Invalid action_type")
+    assert validate_intake_frame(df.drop(columns="person_id")) == "Column person_id is required for UPDATE records."
+    assert validate_intake_frame(df.assign(person_id="nan")) == "UPDATE records must include person_id."
+
+
+def test_normalize_intake_frame_returns_bindable_values():
+    frame = normalize_intake_frame(upload_frame())
+    assert frame["person_id"].tolist() == ["P1", None, None, "P4"]
+    assert frame["action_type"].tolist() == ["NEW", "NEW", "NEW", "UPDATE"]
+    assert frame["specialty_name"].tolist() == ["S1", "S2", "S3", "S4"]
+    assert frame["source_note"].tolist() == ["first", None, None, 7]
+    assert type(frame["source_note"].iloc[3]) is int
+
+
+def test_stage_frame_inserts_one_batch_in_chunks(workforce_conn):
+    conn = workforce_conn
+    calls = []
+    batch_id, staged = stage_frame(
+        conn, upload_frame(), "upload.csv", chunk_size=3, progress=lambda done, total: calls.append((done, total))
+    )
+    conn.commit()
+
+    assert staged == 4
+    assert calls == [(3, 4), (4, 4)]
+    assert conn.execute("SELECT batch_name, source_type, status FROM cbi_batches").fetchall() == [
+        ("upload.csv", "FILE_UPLOAD", "PENDING")
+    ]
+    rows = conn.execute(
+        """
+        SELECT person_id, action_type, specialty_name, region_name, workplace_name, source_note, batch_id
+        FROM workforce_staging ORDER BY staging_id
+        """
+    ).fetchall()
+    assert rows == [
+        ("P1", "NEW", "S1", "R1", "W1", "first", batch_id),
+        (None, "NEW", "S2", "R2", "W2", None, batch_id),
+        (None, "NEW", "S3", "R3", "W3", None, batch_id),
+        ("P4", "UPDATE", "S4", "R4", "W4", "7", batch_id),
+    ]
+
+
+def test_iter_upload_chunks_streams_csv_and_xlsx(tmp_path):
+    from openpyxl import Workbook
+
+    df = upload_frame()
+    csv_buffer = BytesIO(df.to_csv(index=False).encode())
+    xlsx_buffer = BytesIO()
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(df.columns))
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False):
+        sheet.append(list(row))
+    sheet.append([None] * len(df.columns))
+    workbook.save(xlsx_buffer)
+
+    for buffer, name in ((csv_buffer, "upload.csv"), (xlsx_buffer, "upload.XLSX")):
+        assert preview_upload(buffer, name, rows=2)["action_type"].tolist() == [" new", "NEW"]
+        chunks = list(iter_upload_chunks(buffer, name, chunk_rows=3))
+        assert [len(chunk) for chunk in chunks] == [3, 1]
+        frame = normalize_intake_frame(pd.concat(chunks, ignore_index=True))
+        assert frame["person_id"].tolist() == ["P1", None, None, "P4"]
+        assert frame["workplace_name"].tolist() == ["W1", "W2", "W3", "W4"]
+
+
+def test_stage_chunks_skips_and_reports_invalid_chunks(workforce_conn):
+    conn = workforce_conn
+    df = upload_frame()
+    bad = df.assign(action_type="DELETE")
+    calls = []
+    result = stage_chunks(
+        conn, [df, bad, df.iloc[:1]], "upload.csv", progress=lambda staged, seen: calls.append((staged, seen))
+    )
+    conn.commit()
+
+    assert result["staged_rows"] == 5
+    assert result["skipped_rows"] == 4
+    assert result["total_rows"] == 9
+    assert result["errors"] == [
+        {
+            "chunk": 2,
+            "first_row": 6,
+            "last_row": 9,
+            "error": "Invalid action_type values found (allowed: NEW, UPDATE).",
+        }
+    ]
+    assert calls == [(4, 4), (4, 8), (5, 9)]
+    assert conn.execute("SELECT COUNT(*), COUNT(DISTINCT batch_id) FROM workforce_staging").fetchone() == (5, 1)
+    assert conn.execute("SELECT COUNT(*) FROM cbi_batches").fetchone()[0] == 1
+
+
+def test_numeric_ids_stay_text_when_a_later_chunk_has_a_blank_id():
+    from openpyxl import Workbook
+
+    rows = [
+        ("101", "UPDATE", "S1", "R1", "W1", ""),
+        ("102", "UPDATE", "S1", "R1", "W1", ""),
+        ("", "NEW", "S1", "R1", "W1", ""),
+        ("456", "UPDATE", "S1", "R1", "W1", "NA"),
+    ]
+    columns = ["person_id", "action_type", "specialty_name", "region_name", "workplace_name", "source_note"]
+    csv_buffer = BytesIO(pd.DataFrame(rows, columns=columns).to_csv(index=False).encode())
+    xlsx_buffer = BytesIO()
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(columns)
+    for row in rows:
+        sheet.append([int(value) if value.isdigit() else (value or None) for value in row])
+    workbook.save(xlsx_buffer)
+
+    for buffer, name in ((csv_buffer, "upload.csv"), (xlsx_buffer, "upload.xlsx")):
+        chunks = list(iter_upload_chunks(buffer, name, chunk_rows=2))
+        assert [validate_intake_frame(chunk) for chunk in chunks] == [None, None]
+        frame = normalize_intake_frame(pd.concat(chunks, ignore_index=True))
+        assert frame["person_id"].tolist() == ["101", "102", None, "456"]
+        assert frame["source_note"].tolist() == [None, None, None, "NA"]
+
+
+def test_uploaded_batch_is_applied_once_approved(workforce_db, monkeypatch):
+    upload = BytesIO(
+        b"person_id,action_type,specialty_name,region_name,workplace_name\n"
+        b"101,NEW,S1,R1,W1\n"
+        b"102,NEW,S2,R1,W2\n"
+        b"999,UPDATE,S1,R1,W1\n"
+    )
+    conn = sqlite3.connect(workforce_db)
+    result = stage_chunks(conn, iter_upload_chunks(upload, "upload.csv", chunk_rows=2), "upload.csv")
+    checks = validate_staged_batch(conn, result["batch_id"])
+    conn.commit()
+    assert (result["staged_rows"], checks["rejected_rows"]) == (3, 1)
+
+    # Approving the batch keeps the intake rejection and makes the rows appliable.
+    apply_engine.update_batch_status(conn, result["batch_id"], "APPROVED")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(apply_engine, "DB_PATH", workforce_db)
+    applied = apply_engine.apply_approved_changes()
+    assert [(r["batch_id"], r["applied_rows"], r["batch_status"]) for r in applied] == [
+        (result["batch_id"], 2, "APPLIED")
+    ]
+
+    conn = sqlite3.connect(workforce_db)
+    assert conn.execute("SELECT person_id FROM persons ORDER BY person_id").fetchall() == [("101",), ("102",)]
+    assert conn.execute("SELECT status FROM workforce_staging ORDER BY staging_id").fetchall() == [
+        ("APPLIED",), ("APPLIED",), ("REJECTED",)
+    ]
+    conn.close()